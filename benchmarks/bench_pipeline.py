@@ -0,0 +1,230 @@
+"""Benchmark the end-to-end bronze ingestion against the local stand-in of the SpaceX API
+
+Runs `load_spacex_bronze_data` for one month against the stand-in at several data scales, the realistic volumes of
+the API multiplied by the scale with every launch falling in the loaded month. Each scale runs in a fresh process,
+so its peak RSS is its own. For each resource it records the rows loaded, the response bytes served, the extract,
+normalize and load seconds taken from the dlt trace and the resulting rows/s and bytes/s into a JSON file.
+
+The runs load with the `--performance-profile` given, by default the profile of DuckDB, and fail when the files
+loaded are not in the loader file format of the profile. `--performance-profile default` runs with the settings of dlt.
+
+Given a previous JSON file as `--baseline`, it compares the two and exits with 1 when a throughput drops, or a stage
+time or the peak RSS grows, by more than `--threshold`. Timings shorter than `--min-seconds` are too noisy to compare.
+
+Usage:
+    uv run python -m benchmarks.bench_pipeline --scales 1 10 100 --output benchmarks/results/pipeline.json
+    uv run python -m benchmarks.bench_pipeline --baseline benchmarks/results/pipeline.json --threshold 0.2
+    uv run python -m benchmarks.bench_pipeline --performance-profile default --output benchmarks/results/default.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from resource import RUSAGE_SELF, getrusage
+from typing import Any
+
+import dlt
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.instrumentation import STAGES, get_stage_seconds
+from dlt_dbt_dagster.dlt.performance_profiles import DESTINATION_PROFILES, PERFORMANCE_PROFILES
+from dlt_dbt_dagster.utils.processing_utils import get_month_range
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator, parse_date
+from tests.stand_in.server import SpaceXStandIn
+
+YEAR = 2021
+MONTH = 3
+RESOURCES = {
+    BronzeSchema.LAUNCHES: Endpoints.LAUNCHES,
+    BronzeSchema.ROCKETS: Endpoints.ROCKETS,
+    BronzeSchema.CORES: Endpoints.CORES,
+    BronzeSchema.PAYLOADS: Endpoints.PAYLOADS,
+    BronzeSchema.LAUNCHPADS: Endpoints.LAUNCHPADS,
+    BronzeSchema.SHIPS: Endpoints.SHIPS,
+}
+
+
+def make_generator(scale: float) -> SpaceXDataGenerator:
+    """Make the stand-in data of a scale, with every launch in the benchmarked month"""
+    start_date, end_date = get_month_range(YEAR, MONTH)
+    return SpaceXDataGenerator(
+        counts={endpoint: max(1, round(count * scale)) for endpoint, count in REALISTIC_COUNTS.items()},
+        first_launch=datetime.fromtimestamp(parse_date(start_date), tz=timezone.utc),
+        last_launch=datetime.fromtimestamp(parse_date(end_date) - 1, tz=timezone.utc),
+    )
+
+
+def run_scale(base_url: str, work_dir: str, parallelized: bool, performance_profile: str) -> dict[str, Any]:
+    """Load a month from the stand-in in this process and collect the stage metrics of the dlt trace"""
+    os.environ["SOURCES__SPACEX_API_SOURCE__BASE_URL"] = base_url
+    os.environ["DLT_DATA_DIR"] = work_dir
+    os.environ["DESTINATION__DUCKDB__CREDENTIALS"] = str(Path(work_dir) / "bench.duckdb")
+    # The log progress of the pipeline asks for psutil to report memory, the peak RSS is measured here instead
+    warnings.filterwarnings("ignore", message="psutil dependency is not installed")
+    from dlt_dbt_dagster.dlt.spacex_pipeline import load_spacex_bronze_data
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_info = load_spacex_bronze_data(
+            year=YEAR, month=MONTH, parallelized=parallelized, performance_profile=performance_profile
+        )
+    wall_seconds = time.perf_counter() - started
+
+    trace = load_info.pipeline.last_trace
+
+    peak_rss = getrusage(RUSAGE_SELF).ru_maxrss
+    return {
+        "wall_seconds": wall_seconds,
+        "peak_rss_mb": peak_rss / 1024**2 if sys.platform == "darwin" else peak_rss / 1024,
+        "stages": {step.step: (step.finished_at - step.started_at).total_seconds() for step in trace.steps},
+        "rows": dict(trace.last_normalize_info.row_counts),
+        "resource_seconds": get_stage_seconds(trace),
+        # dlt writes its state in a format of its own, and merges the bronze tables with sql jobs whatever the format
+        "file_formats": sorted({
+            job.job_file_info.file_format
+            for package in load_info.load_packages
+            for job in package.jobs["completed_jobs"]
+            if job.job_file_info.file_format != "sql" and not job.job_file_info.table_name.startswith("_dlt")
+        }),
+    }
+
+
+def bench_scale(scale: float, parallelized: bool, performance_profile: str) -> dict[str, Any]:
+    """Serve a scale from the stand-in in this process and load it from a fresh one"""
+    spawn = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as work_dir, SpaceXStandIn(make_generator(scale)) as stand_in:
+        executor = ProcessPoolExecutor(max_workers=1, mp_context=spawn)
+        try:
+            run = executor.submit(run_scale, stand_in.base_url, work_dir, parallelized, performance_profile).result()
+        finally:
+            executor.shutdown()
+    loader_file_format = PERFORMANCE_PROFILES[performance_profile].loader_file_format
+    if loader_file_format is not None and run["file_formats"] != [loader_file_format]:
+        raise RuntimeError(  # noqa: TRY003
+            f"The {performance_profile} profile loaded {', '.join(run['file_formats'])} files, not {loader_file_format}"
+        )
+
+    resources = {}
+    for schema_type, endpoint in RESOURCES.items():
+        name = schema_type.value
+        seconds = {stage: run["resource_seconds"][stage].get(name, 0.0) for stage in STAGES}
+        total_seconds = sum(seconds.values())
+        rows, response_bytes = run["rows"].get(name, 0), stand_in.bytes_sent[endpoint.value]
+        resources[name] = {
+            "rows": rows,
+            "bytes": response_bytes,
+            "rows_per_second": rows / total_seconds if total_seconds else 0.0,
+            "bytes_per_second": response_bytes / total_seconds if total_seconds else 0.0,
+            **{f"{stage}_seconds": seconds[stage] for stage in STAGES},
+        }
+    return {
+        "scale": scale,
+        "wall_seconds": run["wall_seconds"],
+        "peak_rss_mb": run["peak_rss_mb"],
+        "file_formats": run["file_formats"],
+        "stages": {stage: run["stages"].get(stage, 0.0) for stage in STAGES},
+        "resources": resources,
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float, min_seconds: float) -> list[str]:
+    """List the metrics of the results that regressed by more than the threshold against the baseline"""
+    regressions = []
+    for scale, current in results["scales"].items():
+        previous = baseline["scales"].get(scale)
+        if previous is None:
+            continue
+        if current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + threshold):
+            regressions.append(
+                f"scale {scale}: peak RSS {previous['peak_rss_mb']:.0f} -> {current['peak_rss_mb']:.0f} MB"
+            )
+        for stage in STAGES:
+            before, after = previous["stages"].get(stage, 0.0), current["stages"][stage]
+            if max(before, after) >= min_seconds and after > before * (1 + threshold):
+                regressions.append(f"scale {scale}: {stage} {before:.2f} -> {after:.2f} s")
+        for name, resource in current["resources"].items():
+            previous_resource = previous["resources"].get(name)
+            if previous_resource is None:
+                continue
+            seconds = sum(resource[f"{stage}_seconds"] for stage in STAGES)
+            before, after = previous_resource["rows_per_second"], resource["rows_per_second"]
+            if seconds >= min_seconds and after < before * (1 - threshold):
+                regressions.append(f"scale {scale}: {name} {before:,.0f} -> {after:,.0f} rows/s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100], help="multipliers of the API volumes")
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/pipeline.json"))
+    parser.add_argument("--baseline", type=Path, help="previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative regression that fails the comparison")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="shortest timing compared")
+    parser.add_argument("--parallelized", action="store_true", help="extract the resources concurrently")
+    parser.add_argument(
+        "--performance-profile",
+        choices=list(PERFORMANCE_PROFILES),
+        default=DESTINATION_PROFILES["duckdb"],
+        help="loader files and workers of the runs",
+    )
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dlt": dlt.__version__,
+        "parallelized": args.parallelized,
+        "performance_profile": args.performance_profile,
+        "profile_settings": PERFORMANCE_PROFILES[args.performance_profile]._asdict(),
+        "scales": {},
+    }
+    print(
+        f"{'scale':>7}  {'resource':<20}{'rows':>10}{'MB':>9}{'rows/s':>11}{'MB/s':>8}"
+        + "".join(f"{stage + ' s':>12}" for stage in STAGES)
+    )
+    for scale in args.scales:
+        result = results["scales"][f"{scale:g}"] = bench_scale(scale, args.parallelized, args.performance_profile)
+        for name, resource in result["resources"].items():
+            print(
+                f"{scale:>7g}  {name:<20}{resource['rows']:>10}{resource['bytes'] / 1e6:>9.2f}"
+                f"{resource['rows_per_second']:>11,.0f}{resource['bytes_per_second'] / 1e6:>8.2f}"
+                + "".join(f"{resource[f'{stage}_seconds']:>12.2f}" for stage in STAGES)
+            )
+        print(
+            f"{scale:>7g}  {'total':<20}{'':>38}"
+            + "".join(f"{result['stages'][stage]:>12.2f}" for stage in STAGES)
+            + f"  {result['wall_seconds']:.2f} s wall, {result['peak_rss_mb']:.0f} MB peak RSS,"
+            + f" {', '.join(result['file_formats'])} files"
+        )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("performance_profile", args.performance_profile) != args.performance_profile:
+            print(f"Comparing the {args.performance_profile} profile with the {baseline['performance_profile']} one")
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        for regression in regressions:
+            print(f"Regression {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression above {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
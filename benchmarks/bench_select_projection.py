@@ -0,0 +1,77 @@
+"""Benchmark the server-side `select` projection against a local stand-in of the SpaceX API
+
+Serves synthetic full-size SpaceX documents from the local stand-in of the API and pages through every endpoint
+twice, once with the full documents and once with the `select` projection built from `BronzeSchema`, reporting the
+response bytes and the time spent per resource.
+
+Usage:
+    uv run python -m benchmarks.bench_select_projection --docs 5000
+"""
+
+import argparse
+import time
+from typing import Any, Optional
+
+from dlt.sources.helpers.rest_client import RESTClient
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.custom_paginator import CustomJsonPaginator
+from dlt_dbt_dagster.utils.processing_utils import keep_projected_columns, keep_specific_columns
+from tests.stand_in.generator import SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+RESOURCES = {
+    BronzeSchema.LAUNCHES: Endpoints.LAUNCHES,
+    BronzeSchema.ROCKETS: Endpoints.ROCKETS,
+    BronzeSchema.CORES: Endpoints.CORES,
+    BronzeSchema.PAYLOADS: Endpoints.PAYLOADS,
+    BronzeSchema.LAUNCHPADS: Endpoints.LAUNCHPADS,
+    BronzeSchema.SHIPS: Endpoints.SHIPS,
+}
+
+
+def run_resource(base_url: str, schema_type: BronzeSchema, select: Optional[dict[str, int]]) -> tuple[int, float]:
+    """Page through one resource and apply its client-side column step, returning response bytes and seconds"""
+    options: dict[str, Any] = {"limit": 50}
+    if select is not None:
+        options["select"] = select
+    columns = BronzeSchema.get_columns(schema_type)
+    keep_columns = keep_projected_columns(columns) if select is not None else keep_specific_columns(columns)
+
+    client = RESTClient(base_url=base_url, paginator=CustomJsonPaginator())
+    response_bytes = 0
+    started = time.perf_counter()
+    for page in client.paginate(
+        RESOURCES[schema_type].value, method="POST", json={"query": {}, "options": options}, data_selector="docs[*]"
+    ):
+        response_bytes += len(page.response.content)
+        for record in page:
+            keep_columns(record)
+    return response_bytes, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000, help="documents served per endpoint")
+    args = parser.parse_args()
+
+    generator = SpaceXDataGenerator(counts=dict.fromkeys(RESOURCES.values(), args.docs))
+    stand_in = SpaceXStandIn(generator).start()
+    base_url = stand_in.base_url
+
+    print(f"{'resource':<20}{'full MB':>10}{'select MB':>12}{'bytes saved':>13}{'full s':>9}{'select s':>10}")
+    try:
+        for schema_type in RESOURCES:
+            full_bytes, full_seconds = run_resource(base_url, schema_type, select=None)
+            select_bytes, select_seconds = run_resource(base_url, schema_type, BronzeSchema.get_select(schema_type))
+            print(
+                f"{schema_type.value:<20}{full_bytes / 1e6:>10.2f}{select_bytes / 1e6:>12.2f}"
+                f"{1 - select_bytes / full_bytes:>13.1%}{full_seconds:>9.2f}{select_seconds:>10.2f}"
+            )
+    finally:
+        stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Benchmark the incremental runs of the silver dbt models as the scd2 history in bronze grows
+
+Builds synthetic scd2 bronze tables in a local DuckDB database with a growing number of past loads, builds the silver
+models from scratch, then appends one new load (a new version for 5% of the ids) and times the incremental run. With
+the watermark filter of `new_loads_filter` the incremental run touches the same rows whatever the size of the history.
+The same runs are made with a copy of the project using the previous filter, which re-selects every retired version.
+
+bronze_launches is not part of it, dlt loads it with delete-insert so it has no scd2 history.
+
+Usage:
+    uv run python benchmarks/bench_silver_incremental.py --ids 20000 --history 10 50 200
+"""
+
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+from typing import cast
+
+import duckdb
+from dbt.artifacts.schemas.run import RunExecutionResult
+from dbt.cli.main import dbtRunner
+
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+
+DBT_PROJECT_DIR = Path(__file__).parents[1] / "dlt_dbt_dagster" / "dbt_spacex"
+SCD2_TABLES = [
+    BronzeSchema.CORES,
+    BronzeSchema.LAUNCHPADS,
+    BronzeSchema.PAYLOADS,
+    BronzeSchema.ROCKETS,
+    BronzeSchema.SHIPS,
+]
+# Each load makes a new version of the ids with `id % CHANGE_EVERY == load % CHANGE_EVERY`, so 5% of them
+CHANGE_EVERY = 20
+FIRST_LOAD_EPOCH = 1_700_000_000
+SQL_TYPES = {
+    "text": "varchar",
+    "bigint": "bigint",
+    "double": "double",
+    "bool": "boolean",
+    "timestamp": "timestamptz",
+    "json": "json",
+}
+PROFILE = """
+dbt_spacex:
+  target: main
+  outputs:
+    main:
+      type: duckdb
+      path: "{path}"
+      schema: main
+      threads: 1
+    legacy:
+      type: duckdb
+      path: "{path}"
+      schema: legacy
+      threads: 1
+"""
+LEGACY_FILTER = """
+{% macro new_loads_filter() %}
+  {%- if is_incremental() %}
+  where (
+    valid_from > (select coalesce(max(valid_from), '1900-01-01'::timestamp) from {{ this }})
+    or (valid_from is not null and valid_to is not null)
+  )
+  {%- endif %}
+{% endmacro %}
+"""
+
+
+def load_timestamp_sql(load: str) -> str:
+    return f"to_timestamp({FIRST_LOAD_EPOCH} + {load} * 3600)"
+
+
+def value_sql(column: str, data_type: str) -> str:
+    """Synthetic value of a bronze column for the id `i` at the load `k`"""
+    values = {
+        "text": "'2010-06-04'" if column == "first_flight" else f"'{column}_' || i || '_' || k",
+        "bigint": "(i + k) % 100",
+        "double": "(i + k) / 10.0",
+        "bool": "(i + k) % 2 = 0",
+        "timestamp": load_timestamp_sql("k"),
+        "json": "to_json(['ref_' || i])",
+    }
+    return f"cast({values[data_type]} as {SQL_TYPES[data_type]}) as {column}"
+
+
+def versions_sql(schema_type: BronzeSchema, versions: str) -> str:
+    """Select the bronze rows of the `(i, k)` id and load pairs of the `versions` relation"""
+    columns = ",\n".join(
+        value_sql(column, data_type) for column, data_type in BronzeSchema.get_column_types(schema_type).items()
+    )
+    return f"""
+        select
+            'id_' || i as id,
+            {columns},
+            printf('%d.%06d', {FIRST_LOAD_EPOCH} + k * 3600, 0) as _dlt_load_id,
+            md5(i || '_' || k) as _dlt_id,
+            {load_timestamp_sql("k")} as _dlt_valid_from,
+            cast(null as timestamptz) as _dlt_valid_to
+        from {versions}
+        order by k, i
+    """
+
+
+def create_bronze(connection: duckdb.DuckDBPyConnection, ids: int, loads: int) -> None:
+    """Create the scd2 bronze tables with the history of `loads` past loads"""
+    connection.execute("create schema if not exists bronze")
+    for schema_type in SCD2_TABLES:
+        table = f"bronze.{schema_type.value}"
+        versions = f"""(
+            select i, k
+            from range({ids}) as ids(i), range({loads}) as loads(k)
+            where k = 0 or i % {CHANGE_EVERY} = k % {CHANGE_EVERY}
+        )"""
+        connection.execute(f"create or replace table {table} as {versions_sql(schema_type, versions)}")
+        connection.execute(f"""
+            update {table} as t
+            set _dlt_valid_to = next_version.valid_to
+            from (
+                select _dlt_id, lead(_dlt_valid_from) over (partition by id order by _dlt_valid_from) as valid_to
+                from {table}
+            ) as next_version
+            where t._dlt_id = next_version._dlt_id and next_version.valid_to is not null
+        """)
+
+
+def append_load(connection: duckdb.DuckDBPyConnection, ids: int, load: int) -> None:
+    """Add a load the way the dlt scd2 merge does, retiring the active versions it replaces"""
+    for schema_type in SCD2_TABLES:
+        table = f"bronze.{schema_type.value}"
+        connection.execute(f"""
+            update {table}
+            set _dlt_valid_to = {load_timestamp_sql(str(load))}
+            where _dlt_valid_to is null and cast(substr(id, 4) as integer) % {CHANGE_EVERY} = {load % CHANGE_EVERY}
+        """)
+        versions = f"""(
+            select i, {load} as k
+            from range({ids}) as ids(i)
+            where i % {CHANGE_EVERY} = {load % CHANGE_EVERY}
+        )"""
+        connection.execute(f"insert into {table} {versions_sql(schema_type, versions)}")
+
+
+def make_legacy_project(work_dir: Path) -> Path:
+    """Copy the dbt project with the previous incremental filter in place of `new_loads_filter`"""
+    project_dir = work_dir / "legacy_project"
+    shutil.copytree(DBT_PROJECT_DIR, project_dir, ignore=shutil.ignore_patterns("target", "logs"))
+    (project_dir / "macros" / "new_loads_filter.sql").write_text(LEGACY_FILTER)
+    return project_dir
+
+
+def run_dbt(work_dir: Path, project_dir: Path, *args: str) -> dict[str, float]:
+    """Run dbt against the benchmark database and return the execution time of each silver model"""
+    result = dbtRunner().invoke([
+        *args,
+        "--project-dir",
+        str(project_dir),
+        "--profiles-dir",
+        str(work_dir),
+        "--target-path",
+        str(work_dir / "target"),
+        "--log-path",
+        str(work_dir / "logs"),
+        "--quiet",
+    ])
+    if not result.success:
+        raise RuntimeError(f"dbt {args[0]} failed: {result.exception}")  # noqa: TRY003
+    if args[0] != "run":
+        return {}
+    run_results = cast(RunExecutionResult, result.result)
+    return {node.node.name: node.execution_time for node in run_results.results}
+
+
+def count_touched_rows(connection: duckdb.DuckDBPyConnection, schema: str) -> int:
+    """Count the silver rows written by the last run, they all share its silver_load_timestamp"""
+    touched = 0
+    for schema_type in SCD2_TABLES:
+        model = f"{schema}.{schema_type.value.replace('bronze_', 'silver_')}"
+        touched += connection.execute(f"""
+            select count(*) from {model}
+            where silver_load_timestamp = (select max(silver_load_timestamp) from {model})
+        """).fetchall()[0][0]
+    return touched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ids", type=int, default=20000, help="ids per bronze table")
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 50, 200], help="past loads in bronze")
+    args = parser.parse_args()
+
+    models = [schema_type.value.replace("bronze_", "silver_") for schema_type in SCD2_TABLES]
+    print(
+        f"{'loads':>6}{'bronze rows':>13}{'full refresh s':>16}"
+        f"{'rows touched':>14}{'incremental s':>15}{'legacy rows':>13}{'legacy s':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        database = work_dir / "bench.duckdb"
+        (work_dir / "profiles.yml").write_text(PROFILE.format(path=database))
+        if not (DBT_PROJECT_DIR / "dbt_packages").exists():
+            run_dbt(work_dir, DBT_PROJECT_DIR, "deps")
+        projects = {"main": DBT_PROJECT_DIR, "legacy": make_legacy_project(work_dir)}
+
+        for loads in args.history:
+            with duckdb.connect(str(database)) as connection:
+                create_bronze(connection, args.ids, loads)
+            full_refresh = {
+                target: run_dbt(work_dir, project_dir, "run", "--full-refresh", "--target", target, "--select", *models)
+                for target, project_dir in projects.items()
+            }
+
+            with duckdb.connect(str(database)) as connection:
+                append_load(connection, args.ids, loads)
+                bronze_rows = connection.execute(f"select count(*) from bronze.{BronzeSchema.CORES.value}").fetchall()[
+                    0
+                ][0]
+            incremental = {
+                target: run_dbt(work_dir, project_dir, "run", "--target", target, "--select", *models)
+                for target, project_dir in projects.items()
+            }
+
+            with duckdb.connect(str(database)) as connection:
+                touched = {target: count_touched_rows(connection, target) for target in projects}
+            print(
+                f"{loads:>6}{bronze_rows * len(SCD2_TABLES):>13}{sum(full_refresh['main'].values()):>16.2f}"
+                f"{touched['main']:>14}{sum(incremental['main'].values()):>15.2f}"
+                f"{touched['legacy']:>13}{sum(incremental['legacy'].values()):>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark the startup of the Dagster code location: the import of the definitions and their load
+
+Each run imports `dlt_dbt_dagster.definitions` and loads its definitions in a fresh process, like a reload of the code
+location, and records the import and load seconds, the source of the dbt manifest (cached, packaged or parsed) and
+which of the heavy modules the load imported. With `--cold` the cached manifests are removed first, so the first run
+parses the project (under `--dev`, otherwise it falls back to the packaged manifest) and the next ones reuse its
+manifest. The results are written into a JSON file.
+
+Given a previous JSON file as `--baseline`, it compares the two and exits with 1 when the median import or load time
+grows by more than `--threshold`. Timings shorter than `--min-seconds` are too noisy to compare.
+
+Usage:
+    uv run python benchmarks/bench_startup.py --runs 5 --output benchmarks/results/startup.json
+    uv run python benchmarks/bench_startup.py --dev --cold
+    uv run python benchmarks/bench_startup.py --baseline benchmarks/results/startup.json --threshold 0.2
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+# Nothing heavy is imported here, the runs import the definitions in processes spawned from this module
+HEAVY_MODULES = ("dagster", "dagster_dbt", "dbt.cli.main", "dlt", "dlt.sources.rest_api", "pyarrow", "dotenv")
+TIMINGS = ("import_seconds", "defs_seconds", "total_seconds")
+
+
+def run_startup(dev: bool) -> dict[str, Any]:
+    """Import and load the definitions in this process"""
+    if dev:
+        os.environ["DAGSTER_IS_DEV_CLI"] = "1"
+    started = time.perf_counter()
+    from dlt_dbt_dagster import definitions
+
+    imported = time.perf_counter()
+    definitions.defs()
+    loaded = time.perf_counter()
+
+    from dlt_dbt_dagster.defs.dbt_project import dbt_spacex_project, get_cached_manifest_path
+
+    if get_cached_manifest_path().exists():
+        manifest = "cached"
+    elif dbt_spacex_project.manifest_path.exists():
+        manifest = "packaged"
+    else:
+        manifest = "missing"
+    return {
+        "import_seconds": imported - started,
+        "defs_seconds": loaded - imported,
+        "total_seconds": loaded - started,
+        "manifest": manifest,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def bench_run(dev: bool) -> dict[str, Any]:
+    """Run the startup in a fresh process"""
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        return executor.submit(run_startup, dev).result()
+    finally:
+        executor.shutdown()
+
+
+def clear_manifest_cache() -> None:
+    """Remove the cached manifests of the project, in a process of its own to keep this one light"""
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        cache_dir = executor.submit(get_manifest_cache_dir).result()
+    finally:
+        executor.shutdown()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def get_manifest_cache_dir() -> Path:
+    """Directory of the cached manifests of the project"""
+    from dlt_dbt_dagster.defs.dbt_project import get_cached_manifest_path
+
+    return get_cached_manifest_path().parent
+
+
+def summarize(runs: list[dict[str, Any]]) -> dict[str, float]:
+    """Median of each timing over the runs"""
+    return {timing: statistics.median(run[timing] for run in runs) for timing in TIMINGS}
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float, min_seconds: float) -> list[str]:
+    """List the median timings that regressed by more than the threshold against the baseline"""
+    regressions = []
+    for timing in TIMINGS:
+        before, after = baseline["median"][timing], results["median"][timing]
+        if max(before, after) >= min_seconds and after > before * (1 + threshold):
+            regressions.append(f"{timing} {before:.2f} -> {after:.2f} s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes started")
+    parser.add_argument("--dev", action="store_true", help="start like `dagster dev`, parsing a changed project")
+    parser.add_argument("--cold", action="store_true", help="remove the cached manifests before the first run")
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/startup.json"))
+    parser.add_argument("--baseline", type=Path, help="previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative regression that fails the comparison")
+    parser.add_argument("--min-seconds", type=float, default=0.1, help="shortest timing compared")
+    args = parser.parse_args()
+
+    if args.cold:
+        clear_manifest_cache()
+    print(f"{'run':>4}{'import s':>10}{'defs s':>9}{'total s':>10}  {'manifest':<10}heavy modules")
+    runs = []
+    for run_number in range(1, args.runs + 1):
+        run = bench_run(args.dev)
+        runs.append(run)
+        print(
+            f"{run_number:>4}{run['import_seconds']:>10.2f}{run['defs_seconds']:>9.2f}{run['total_seconds']:>10.2f}"
+            f"  {run['manifest']:<10}{', '.join(run['heavy_modules'])}"
+        )
+    results: dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dev": args.dev,
+        "cold": args.cold,
+        "runs": runs,
+        # The first run of a cold start parses the project, the median is the one of the warm starts
+        "median": summarize(runs[1:] if args.cold and len(runs) > 1 else runs),
+    }
+    print(
+        f"{'median':>4}{results['median']['import_seconds']:>10.2f}{results['median']['defs_seconds']:>9.2f}"
+        f"{results['median']['total_seconds']:>10.2f}"
+    )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold, args.min_seconds)
+        for regression in regressions:
+            print(f"Regression {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression above {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
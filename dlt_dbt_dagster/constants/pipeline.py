@@ -0,0 +1,8 @@
+# Defaults of the SpaceX pipeline, kept apart from it so the Dagster definitions read them without importing dlt
+YEAR = 2021
+MONTH = 3
+# One extract worker per SpaceX resource, so parallel extraction takes as long as the slowest endpoint
+EXTRACT_WORKERS = 6
+# Default bounds of the adaptive page size
+DEFAULT_MIN_LIMIT = 10
+DEFAULT_MAX_LIMIT = 1000
@@ -24,86 +24,96 @@ class BronzeSchema(str, Enum):
     @classmethod
     def get_columns(cls, schema_type: "BronzeSchema") -> list[str]:
         """Get the column list for a specific schema type"""
+        return list(cls.get_column_types(schema_type))
+
+    @classmethod
+    def get_column_types(cls, schema_type: "BronzeSchema") -> dict[str, str]:
+        """Get the dlt data type of each column for a specific schema type"""
         column_mapping = {
-            cls.LAUNCHES: [
-                "id",
-                "name",
-                "details",
-                "flight_number",
-                "launchpad",
-                "date_utc",
-                "rocket",
-                "payloads",
-                "ships",
-                "cores",
-                "success",
-            ],
-            cls.ROCKETS: [
-                "id",
-                "name",
-                "description",
-                "company",
-                "type",
-                "active",
-                "stages",
-                "boosters",
-                "cost_per_launch",
-                "success_rate_pct",
-                "first_flight",
-                "country",
-            ],
-            cls.LAUNCHPADS: [
-                "id",
-                "name",
-                "full_name",
-                "locality",
-                "region",
-                "latitude",
-                "longitude",
-                "launch_attempts",
-                "launch_successes",
-                "launches",
-                "rockets",
-                "status",
-                "details",
-                "timezone",
-            ],
-            cls.PAYLOADS: [
-                "id",
-                "name",
-                "type",
-                "launch",
-                "reused",
-                "manufacturers",
-                "customers",
-                "nationalities",
-                "mass_kg",
-                "orbit",
-                "lifespan_years",
-                "epoch",
-            ],
-            cls.SHIPS: [
-                "id",
-                "name",
-                "model",
-                "type",
-                "active",
-                "mass_kg",
-                "year_built",
-                "home_port",
-                "launches",
-            ],
-            cls.CORES: [
-                "id",
-                "status",
-                "serial",
-                "reuse_count",
-                "launches",
-                "last_update",
-            ],
+            cls.LAUNCHES: {
+                "id": "text",
+                "name": "text",
+                "details": "text",
+                "flight_number": "bigint",
+                "launchpad": "text",
+                "date_utc": "timestamp",
+                "rocket": "text",
+                "payloads": "json",
+                "ships": "json",
+                "cores": "json",
+                "success": "bool",
+            },
+            cls.ROCKETS: {
+                "id": "text",
+                "name": "text",
+                "description": "text",
+                "company": "text",
+                "type": "text",
+                "active": "bool",
+                "stages": "bigint",
+                "boosters": "bigint",
+                "cost_per_launch": "bigint",
+                "success_rate_pct": "bigint",
+                "first_flight": "text",
+                "country": "text",
+            },
+            cls.LAUNCHPADS: {
+                "id": "text",
+                "name": "text",
+                "full_name": "text",
+                "locality": "text",
+                "region": "text",
+                "latitude": "double",
+                "longitude": "double",
+                "launch_attempts": "bigint",
+                "launch_successes": "bigint",
+                "launches": "json",
+                "rockets": "json",
+                "status": "text",
+                "details": "text",
+                "timezone": "text",
+            },
+            cls.PAYLOADS: {
+                "id": "text",
+                "name": "text",
+                "type": "text",
+                "launch": "text",
+                "reused": "bool",
+                "manufacturers": "json",
+                "customers": "json",
+                "nationalities": "json",
+                "mass_kg": "double",
+                "orbit": "text",
+                "lifespan_years": "double",
+                "epoch": "timestamp",
+            },
+            cls.SHIPS: {
+                "id": "text",
+                "name": "text",
+                "model": "text",
+                "type": "text",
+                "active": "bool",
+                "mass_kg": "bigint",
+                "year_built": "bigint",
+                "home_port": "text",
+                "launches": "json",
+            },
+            cls.CORES: {
+                "id": "text",
+                "status": "text",
+                "serial": "text",
+                "reuse_count": "bigint",
+                "launches": "json",
+                "last_update": "text",
+            },
         }
 
         if schema_type not in column_mapping:
             raise ValueError(f"Unknown schema type: {schema_type}. Available types: {list(column_mapping.keys())}")  # noqa: TRY003
 
         return column_mapping[schema_type]
+
+    @classmethod
+    def get_select(cls, schema_type: "BronzeSchema") -> dict[str, int]:
+        """Get the SpaceX API `select` projection for a specific schema type"""
+        return dict.fromkeys(cls.get_columns(schema_type), 1)
@@ -0,0 +1,15 @@
+{#
+  Current state of an scd2 silver model, one row per id. Each run takes the versions of the new loads and the ones
+  retired since with new_loads_filter, and keeps the latest version of each of their ids: the delete+insert (merge in
+  Snowflake) on id upserts it, then delete_retired_ids, the post-hook of the model, deletes the ids whose latest
+  version was retired. A run touches the changed ids only, whatever the length of the history.
+#}
+{% macro current_versions(relation) %}
+select * from {{ relation }}
+{{ new_loads_filter() }}
+qualify row_number() over (partition by id order by valid_from desc) = 1
+{% endmacro %}
+
+{% macro delete_retired_ids() %}
+delete from {{ this }} where not is_current_record
+{% endmacro %}
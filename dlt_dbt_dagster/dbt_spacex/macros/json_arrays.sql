@@ -0,0 +1,20 @@
+{#
+  Unnesting of the JSON array columns dlt loads from the SpaceX API, one row per element. unnest_json_array joins each
+  row to the elements of its array column, json_element reads an element, or one of its fields, as text. The arrays
+  are JSON columns in DuckDB, text in the Parquet lake and variants in Snowflake.
+#}
+{% macro unnest_json_array(column, alias) %}
+  {%- if target.type == 'snowflake' -%}
+  cross join lateral flatten(input => parse_json(to_varchar({{ column }}))) as {{ alias }}
+  {%- else -%}
+  cross join unnest(from_json({{ column }}, '["json"]')) as {{ alias }}(value)
+  {%- endif %}
+{% endmacro %}
+
+{% macro json_element(alias, field=none) %}
+  {%- if target.type == 'snowflake' -%}
+  {{ alias }}.value{% if field %}:{{ field }}{% endif %}::string
+  {%- else -%}
+  {{ alias }}.value ->> '{{ field or "$" }}'
+  {%- endif %}
+{% endmacro %}
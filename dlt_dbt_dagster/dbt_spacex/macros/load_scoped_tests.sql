@@ -0,0 +1,47 @@
+{#
+  Load-scoped tests of the bronze sources. Only the rows of the latest dlt load of a table can have made it invalid,
+  so only they are checked, the latest load id being a single aggregate over the table. A column is unique when the
+  values of the latest load are, among the rows holding them: the group by covers the new values only, and with a
+  valid_to_column only the current records of an scd2 table, whose ids repeat across their versions. Setting the
+  bronze_tests_full_scan var checks every row instead, for periodic audits:
+    dbt test --select source:bronze_spacex --vars '{bronze_tests_full_scan: true}'
+#}
+{% macro latest_load_filter(model, load_id_column='_dlt_load_id') %}
+  {%- if var('bronze_tests_full_scan', false) -%}
+  true
+  {%- else -%}
+  {{ load_id_column }} = (select max({{ load_id_column }}) from {{ model }})
+  {%- endif -%}
+{% endmacro %}
+
+{% test load_scoped_not_null(model, column_name, load_id_column='_dlt_load_id') %}
+select {{ column_name }}
+from {{ model }}
+where {{ column_name }} is null
+  and {{ latest_load_filter(model, load_id_column) }}
+{% endtest %}
+
+{% test load_scoped_unique(model, column_name, load_id_column='_dlt_load_id', valid_to_column=none) %}
+with checked_rows as (
+  select {{ column_name }}
+  from {{ model }}
+  where {{ column_name }} is not null
+  {%- if valid_to_column %}
+    and {{ valid_to_column }} is null
+  {%- endif %}
+  {%- if not var('bronze_tests_full_scan', false) %}
+    and {{ column_name }} in (
+      select {{ column_name }}
+      from {{ model }}
+      where {{ latest_load_filter(model, load_id_column) }}
+    )
+  {%- endif %}
+)
+
+select
+  {{ column_name }} as unique_field,
+  count(*) as n_records
+from checked_rows
+group by {{ column_name }}
+having count(*) > 1
+{% endtest %}
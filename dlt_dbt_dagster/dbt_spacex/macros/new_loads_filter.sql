@@ -0,0 +1,24 @@
+{#
+  Incremental filter of the silver models: keeps the rows of the dlt loads newer than the last load already in the
+  model, plus the scd2 versions retired since the last run. dlt retires a version by setting its valid_to without
+  changing its load id, so retirements are tracked with the latest validity timestamp already in the model.
+  Both watermarks are single aggregates over the model, so each run only touches the rows of the new loads. Models of
+  sources without scd2 validity, like the delete-insert launches, pass `valid_to_column=none` to only use the first.
+#}
+{% macro new_loads_filter(load_id_column='source_load_id', valid_from_column='valid_from', valid_to_column='valid_to') %}
+  {%- if is_incremental() %}
+  where (
+    {{ load_id_column }} > (
+      select coalesce(max({{ load_id_column }}), '')
+      from {{ this }}
+    )
+    {%- if valid_to_column %}
+    or
+    {{ valid_to_column }} > (
+      select coalesce(max(coalesce({{ valid_to_column }}, {{ valid_from_column }})), '1900-01-01'::timestamp)
+      from {{ this }}
+    )
+    {%- endif %}
+  )
+  {%- endif %}
+{% endmacro %}
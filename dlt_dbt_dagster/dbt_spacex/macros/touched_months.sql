@@ -0,0 +1,46 @@
+{#
+  Incremental scope of the gold models, which aggregate the launches by month. touched_months lists the months of the
+  launches in the silver rows of the loads newer than the latest load already aggregated in the model, plus the
+  launches selected by the body of a call block, like the ones of changed payloads, and the months of their earlier
+  rows too, so a launch moved to another month is taken out of the old one. A full build lists every month.
+  latest_launch_rows keeps the current rows of the launches of those months. The delete+insert on year and month
+  replaces the rows of each month recomputed, whatever the length of the history, and delete_months_without_rows, the
+  post-hook of the models, deletes the months left without a current row, which have nothing to replace theirs with.
+#}
+{% macro loaded_after_watermark(load_id_column='source_load_id') %}
+  {{ load_id_column }} > (select coalesce(max(source_load_id), '') from {{ this }})
+{%- endmacro %}
+
+{% macro touched_months(launches) %}
+select distinct year, month
+from {{ launches }}
+{%- if is_incremental() %}
+where id in (
+  select id from {{ launches }} where {{ loaded_after_watermark() }}
+  {%- if caller is defined %}
+  union
+  {{ caller() }}
+  {%- endif %}
+)
+{%- endif %}
+{% endmacro %}
+
+{% macro latest_launch_rows(relation, launches, months='touched_months', launch_id_column='id') %}
+select *
+from {{ relation }}
+where is_current_record
+  and {{ launch_id_column }} in (
+    select launches.id
+    from {{ launches }} as launches
+    inner join {{ months }} as months
+      on launches.year = months.year
+      and launches.month = months.month
+  )
+{% endmacro %}
+
+{% macro delete_months_without_rows(relation) %}
+delete from {{ this }}
+where year * 100 + month not in (
+  select year * 100 + month from {{ relation }} where is_current_record
+)
+{% endmacro %}
@@ -0,0 +1,48 @@
+{#- Reuse and landings of the cores flown by launch month, from the cores of each launch -#}
+
+{{
+  config(
+    post_hook="{{ delete_months_without_rows(ref('silver_launch_cores')) }}"
+  )
+}}
+
+with touched_months as (
+  {{ touched_months(ref('silver_launches')) }}
+),
+
+launch_cores as (
+  {{ latest_launch_rows(ref('silver_launch_cores'), ref('silver_launches'), launch_id_column='launch_id') }}
+),
+
+monthly_cores as (
+  select
+    launch_cores.year,
+    launch_cores.month,
+    count(*) as core_flight_count,
+    count(distinct launch_cores.core_id) as core_count,
+    sum(case when launch_cores.reused then 1 else 0 end) as reused_core_flight_count,
+    max(launch_cores.flight) as max_core_flight,
+    sum(case when launch_cores.landing_attempt then 1 else 0 end) as landing_attempt_count,
+    sum(case when launch_cores.landing_success then 1 else 0 end) as landing_success_count,
+    max(launch_cores.source_load_id) as source_load_id
+  from launch_cores
+  inner join touched_months
+    on launch_cores.year = touched_months.year
+    and launch_cores.month = touched_months.month
+  group by launch_cores.year, launch_cores.month
+)
+
+select
+  year,
+  month,
+  core_flight_count,
+  core_count,
+  reused_core_flight_count,
+  reused_core_flight_count / core_flight_count as reuse_rate,
+  max_core_flight,
+  landing_attempt_count,
+  landing_success_count,
+  landing_success_count / nullif(landing_attempt_count, 0) as landing_success_rate,
+  source_load_id,
+  {{ current_timestamp() }} as gold_load_timestamp
+from monthly_cores
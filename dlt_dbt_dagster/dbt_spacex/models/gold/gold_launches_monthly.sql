@@ -0,0 +1,45 @@
+{#- Launch counts and success rate of each rocket by launch month, the upcoming launches have no outcome yet -#}
+
+{{
+  config(
+    post_hook="{{ delete_months_without_rows(ref('silver_launches')) }}"
+  )
+}}
+
+with touched_months as (
+  {{ touched_months(ref('silver_launches')) }}
+),
+
+launches as (
+  {{ latest_launch_rows(ref('silver_launches'), ref('silver_launches')) }}
+),
+
+monthly_launches as (
+  select
+    launches.year,
+    launches.month,
+    launches.rocket as rocket_id,
+    count(*) as launch_count,
+    sum(case when launches.success then 1 else 0 end) as successful_launch_count,
+    sum(case when not launches.success then 1 else 0 end) as failed_launch_count,
+    sum(case when launches.success is null then 1 else 0 end) as upcoming_launch_count,
+    max(launches.source_load_id) as source_load_id
+  from launches
+  inner join touched_months
+    on launches.year = touched_months.year
+    and launches.month = touched_months.month
+  group by launches.year, launches.month, launches.rocket
+)
+
+select
+  year,
+  month,
+  rocket_id,
+  launch_count,
+  successful_launch_count,
+  failed_launch_count,
+  upcoming_launch_count,
+  successful_launch_count / nullif(successful_launch_count + failed_launch_count, 0) as success_rate,
+  source_load_id,
+  {{ current_timestamp() }} as gold_load_timestamp
+from monthly_launches
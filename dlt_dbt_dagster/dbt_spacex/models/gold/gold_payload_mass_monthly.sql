@@ -0,0 +1,59 @@
+{#- Payload count and mass by orbit and launch month, a new version of a payload recomputes the month of its launch -#}
+
+{{
+  config(
+    post_hook="{{ delete_months_without_rows(ref('silver_launch_payloads')) }}"
+  )
+}}
+
+with touched_months as (
+  {% call touched_months(ref('silver_launches')) %}
+  select launch_id
+  from {{ ref('silver_launch_payloads') }}
+  where payload_id in (select id from {{ ref('silver_payloads') }} where {{ loaded_after_watermark() }})
+  {% endcall %}
+),
+
+launch_payloads as (
+  {{ latest_launch_rows(ref('silver_launch_payloads'), ref('silver_launches'), launch_id_column='launch_id') }}
+),
+
+payloads as (
+  select * from {{ ref('silver_payloads') }}
+  where is_current_record
+),
+
+monthly_payloads as (
+  select
+    launch_payloads.year,
+    launch_payloads.month,
+    -- The payloads missing from silver_payloads have no known orbit, like the ones without one
+    coalesce(payloads.orbit, 'N/A') as orbit,
+    count(*) as payload_count,
+    count(payloads.mass_kg) as payload_with_mass_count,
+    sum(payloads.mass_kg) as total_mass_kg,
+    avg(payloads.mass_kg) as avg_mass_kg,
+    max(payloads.mass_kg) as max_mass_kg,
+    max(launch_payloads.source_load_id) as launch_load_id,
+    max(payloads.source_load_id) as payload_load_id
+  from launch_payloads
+  inner join touched_months
+    on launch_payloads.year = touched_months.year
+    and launch_payloads.month = touched_months.month
+  left join payloads
+    on launch_payloads.payload_id = payloads.id
+  group by launch_payloads.year, launch_payloads.month, coalesce(payloads.orbit, 'N/A')
+)
+
+select
+  year,
+  month,
+  orbit,
+  payload_count,
+  payload_with_mass_count,
+  total_mass_kg,
+  avg_mass_kg,
+  max_mass_kg,
+  greatest(launch_load_id, coalesce(payload_load_id, launch_load_id)) as source_load_id,
+  {{ current_timestamp() }} as gold_load_timestamp
+from monthly_payloads
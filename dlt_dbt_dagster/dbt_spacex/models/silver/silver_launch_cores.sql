@@ -0,0 +1,41 @@
+{{
+  config(
+    unique_key=['launch_id', 'valid_from'],
+    incremental_strategy='delete+insert'
+  )
+}}
+
+{#- The bridge rows of a launch version are replaced together, so a core removed from it does not linger -#}
+
+with silver_launches as (
+  select * from {{ ref('silver_launches') }}
+),
+
+launch_cores as (
+  select
+    silver_launches.id as launch_id,
+    {{ json_element('core', 'core') }} as core_id,
+    try_cast({{ json_element('core', 'flight') }} as integer) as flight,
+    try_cast({{ json_element('core', 'gridfins') }} as boolean) as gridfins,
+    try_cast({{ json_element('core', 'legs') }} as boolean) as legs,
+    try_cast({{ json_element('core', 'reused') }} as boolean) as reused,
+    try_cast({{ json_element('core', 'landing_attempt') }} as boolean) as landing_attempt,
+    try_cast({{ json_element('core', 'landing_success') }} as boolean) as landing_success,
+    {{ json_element('core', 'landing_type') }} as landing_type,
+    {{ json_element('core', 'landpad') }} as landpad_id,
+    silver_launches.year,
+    silver_launches.month,
+    silver_launches.valid_from,
+    silver_launches.valid_to,
+    silver_launches.is_current_record,
+    silver_launches.source_load_id,
+    {{ current_timestamp() }} as silver_load_timestamp
+  from silver_launches
+  {{ unnest_json_array('silver_launches.cores', 'core') }}
+  -- The cores of a launch may be unknown, with a null core id
+  where {{ json_element('core', 'core') }} is not null
+)
+
+select * from launch_cores
+
+{{ new_loads_filter() }}
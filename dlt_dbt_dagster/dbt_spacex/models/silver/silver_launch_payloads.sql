@@ -0,0 +1,31 @@
+{{
+  config(
+    unique_key=['launch_id', 'valid_from'],
+    incremental_strategy='delete+insert'
+  )
+}}
+
+{#- The bridge rows of a launch version are replaced together, so a payload removed from it does not linger -#}
+
+with silver_launches as (
+  select * from {{ ref('silver_launches') }}
+),
+
+launch_payloads as (
+  select
+    silver_launches.id as launch_id,
+    {{ json_element('payload') }} as payload_id,
+    silver_launches.year,
+    silver_launches.month,
+    silver_launches.valid_from,
+    silver_launches.valid_to,
+    silver_launches.is_current_record,
+    silver_launches.source_load_id,
+    {{ current_timestamp() }} as silver_load_timestamp
+  from silver_launches
+  {{ unnest_json_array('silver_launches.payloads', 'payload') }}
+)
+
+select * from launch_payloads
+
+{{ new_loads_filter() }}
@@ -4,6 +4,18 @@
   )
 }}
 
+{#-
+  bronze_launches is a delete-insert table without scd2 validity: a load replaces the launches of its months, or of
+  its ids with the incremental source, and the launches dropped from them are deleted. Each load of a launch is a
+  version valid from the time of the load, its load id. A version stays current while it is the latest of its launch
+  and bronze still holds it, and is retired by the next load of its launch or of its month. An incremental run only
+  revalidates the current versions of the months and launches of the new loads, see new_loads_filter.
+-#}
+{%- set launch_columns = [
+  'id', 'name', 'details', 'flight_number', 'launchpad', 'date_utc', 'rocket', 'payloads', 'ships', 'cores', 'success',
+  'year', 'month', 'valid_from', 'source_load_id'
+] %}
+
 with bronze_launches as (
   select * from {{ source('bronze_spacex', 'bronze_launches') }}
 ),
@@ -23,26 +35,77 @@ cleaned_launches as (
     success,
     year,
     month,
-    _dlt_valid_from as valid_from,
-    _dlt_valid_to as valid_to,
-    case
-      when _dlt_valid_to is null then true
-      else false
-    end as is_current_record,
-    _dlt_load_id as source_load_id,
-    {{ current_timestamp() }} as silver_load_timestamp
+    to_timestamp(cast(_dlt_load_id as double)) as valid_from,
+    _dlt_load_id as source_load_id
   from bronze_launches
-)
+),
+
+new_launches as (
+  select * from cleaned_launches
+  {{ new_loads_filter(valid_to_column=none) }}
+),
 
-select * from cleaned_launches
+month_reloads as (
+  select
+    year,
+    month,
+    min(valid_from) as reloaded_at
+  from new_launches
+  group by year, month
+),
 
-{% if is_incremental() %}
-  where (
-    valid_from > (
-      select coalesce(max(valid_from), '1900-01-01'::timestamp)
-      from {{ this }}
+launch_versions as (
+  select {{ launch_columns | join(', ') }}
+  from new_launches
+  {%- if is_incremental() %}
+
+  union all
+
+  -- The current versions the new loads may have replaced
+  select {{ launch_columns | join(', ') }}
+  from {{ this }}
+  where is_current_record
+    and (
+      id in (select id from new_launches)
+      or year * 100 + month in (select year * 100 + month from month_reloads)
     )
-    or
-    (valid_from is not null and valid_to is not null)
-  )
-{% endif %}
+  {%- endif %}
+),
+
+validated_launches as (
+  select
+    launch_versions.*,
+    coalesce(
+      lead(launch_versions.valid_from) over (partition by launch_versions.id order by launch_versions.valid_from),
+      -- Deleted from bronze by the reload of its month, without a new version
+      case when bronze_rows.id is null then month_reloads.reloaded_at end
+    ) as valid_to
+  from launch_versions
+  left join cleaned_launches as bronze_rows
+    on launch_versions.id = bronze_rows.id
+    and launch_versions.source_load_id = bronze_rows.source_load_id
+  left join month_reloads
+    on launch_versions.year = month_reloads.year
+    and launch_versions.month = month_reloads.month
+)
+
+select
+  id,
+  name,
+  details,
+  flight_number,
+  launchpad,
+  date_utc,
+  rocket,
+  payloads,
+  ships,
+  cores,
+  success,
+  year,
+  month,
+  valid_from,
+  valid_to,
+  valid_to is null as is_current_record,
+  source_load_id,
+  {{ current_timestamp() }} as silver_load_timestamp
+from validated_launches
@@ -0,0 +1,29 @@
+{{
+  config(
+    unique_key=['launchpad_id', 'valid_from'],
+    incremental_strategy='delete+insert'
+  )
+}}
+
+{#- The bridge rows of a launchpad version are replaced together, so a rocket removed from it does not linger -#}
+
+with silver_launchpads as (
+  select * from {{ ref('silver_launchpads') }}
+),
+
+launchpad_rockets as (
+  select
+    silver_launchpads.id as launchpad_id,
+    {{ json_element('rocket') }} as rocket_id,
+    silver_launchpads.valid_from,
+    silver_launchpads.valid_to,
+    silver_launchpads.is_current_record,
+    silver_launchpads.source_load_id,
+    {{ current_timestamp() }} as silver_load_timestamp
+  from silver_launchpads
+  {{ unnest_json_array('silver_launchpads.rockets', 'rocket') }}
+)
+
+select * from launchpad_rockets
+
+{{ new_loads_filter() }}
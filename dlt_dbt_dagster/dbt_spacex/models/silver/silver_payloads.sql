@@ -38,13 +38,4 @@ cleaned_payloads as (
 
 select * from cleaned_payloads
 
-{% if is_incremental() %}
-  where (
-    valid_from > (
-      select coalesce(max(valid_from), '1900-01-01'::timestamp)
-      from {{ this }}
-    )
-    or
-    (valid_from is not null and valid_to is not null)
-  )
-{% endif %}
+{{ new_loads_filter() }}
@@ -0,0 +1,8 @@
+{{
+  config(
+    unique_key='id',
+    post_hook="{{ delete_retired_ids() }}"
+  )
+}}
+
+{{ current_versions(ref('silver_ships')) }}
@@ -0,0 +1,222 @@
+"""Bronze dlt assets of the SpaceX API: launches partitioned by month, the reference tables unpartitioned
+
+The asset keys are the dbt sources of the bronze tables, so the silver dbt assets depend on them. A backfill of the
+launches over any number of months is a single run making a single date range query, with its pages fetched by a
+bounded pool of `page_workers`. Both assets run in the `spacex_api` concurrency pool, whose limit caps how many runs
+query the API and write to the warehouse at once (`dagster instance concurrency set spacex_api 1`). The page, record
+and stage metrics of each table are attached to its materialization, and written as a Prometheus text file per asset
+to the `metrics_dir` of the pipeline resource when it is set.
+"""
+
+from collections.abc import Iterator
+from contextlib import ExitStack
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import dagster as dg
+
+from dlt_dbt_dagster.constants.pipeline import DEFAULT_MAX_LIMIT, DEFAULT_MIN_LIMIT, EXTRACT_WORKERS, MONTH, YEAR
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+
+# dlt and the pipeline are imported when an asset runs, loading the definitions does not need them
+if TYPE_CHECKING:
+    import dlt
+
+    from dlt_dbt_dagster.dlt.custom_paginator import PageSizer
+    from dlt_dbt_dagster.dlt.instrumentation import PipelineMetrics
+    from dlt_dbt_dagster.dlt.request_scheduler import RequestScheduler
+    from dlt_dbt_dagster.dlt.row_fingerprints import RowFingerprintIndex
+
+# Name of the bronze tables source in the dbt project
+DBT_SOURCE_NAME = "bronze_spacex"
+SPACEX_API_POOL = "spacex_api"
+# Month of the first SpaceX launch
+MONTHLY_PARTITIONS = dg.MonthlyPartitionsDefinition(start_date="2006-03-01")
+REFERENCE_TABLES = [
+    BronzeSchema.ROCKETS,
+    BronzeSchema.CORES,
+    BronzeSchema.PAYLOADS,
+    BronzeSchema.LAUNCHPADS,
+    BronzeSchema.SHIPS,
+]
+
+
+class SpaceXPipelineResource(dg.ConfigurableResource):
+    """dlt pipeline loading the SpaceX bronze tables into the stable dataset the dbt sources read"""
+
+    pipeline_name: str = "spacex"
+    destination: str = "duckdb"
+    dataset_name: str = "bronze"
+    page_workers: int = 4
+    # The pages are loaded as Arrow tables, a dataset is loaded either from Arrow pages or from dicts
+    arrow_batches: bool = False
+    extract_workers: int = EXTRACT_WORKERS
+    stream_pages: bool = False
+    # The adaptive page size requests the pages one by one, it requires `page_workers` of 1
+    adaptive_page_size: bool = False
+    min_page_size: int = DEFAULT_MIN_LIMIT
+    max_page_size: int = DEFAULT_MAX_LIMIT
+    # Rate limit of the requests of all the tables of a run, `None` sends them as fast as the workers go
+    requests_per_second: Optional[float] = None
+    metrics_dir: Optional[str] = None
+    # Directory of the Parquet lake written instead of the destination, defaults to `SPACEX_BRONZE_LAKE_DIR`
+    lake_dir: Optional[str] = None
+    # Loader files and workers of the runs, defaults to the profile of the destination
+    performance_profile: Optional[str] = None
+
+    def make_pipeline(self) -> "dlt.Pipeline":
+        import dlt
+
+        from dlt_dbt_dagster.dlt.parquet_lake import get_lake_dir, parquet_lake
+
+        lake_dir = get_lake_dir(self.lake_dir)
+        return dlt.pipeline(
+            pipeline_name=self.pipeline_name,
+            destination=parquet_lake(lake_dir=str(lake_dir)) if lake_dir is not None else self.destination,
+            dataset_name=self.dataset_name,
+            progress="log",
+        )
+
+    def make_page_sizer(self) -> Optional["PageSizer"]:
+        """Make the sizer of the adaptive page size, `None` keeps the page size of the source"""
+        from dlt_dbt_dagster.dlt.custom_paginator import PageSizer
+
+        if not self.adaptive_page_size:
+            return None
+        return PageSizer(min_limit=self.min_page_size, max_limit=self.max_page_size)
+
+    def make_scheduler(self) -> Optional["RequestScheduler"]:
+        """Make the scheduler rate limiting the requests, `None` when there is no rate limit"""
+        from dlt_dbt_dagster.dlt.request_scheduler import RequestScheduler
+
+        if self.requests_per_second is None:
+            return None
+        return RequestScheduler(self.requests_per_second)
+
+    def run(
+        self,
+        source: "dlt.sources.DltSource",
+        metrics: "PipelineMetrics",
+        metrics_name: str,
+        row_fingerprints: Optional["RowFingerprintIndex"] = None,
+    ) -> dict[str, int]:
+        """Load the source made with the metrics and return the rows loaded per table
+
+        With the `row_fingerprints` the source was made with, the rows of the ids it did not extract are retired.
+        """
+        from dlt_dbt_dagster.dlt.parquet_lake import get_lake_dir
+        from dlt_dbt_dagster.dlt.performance_profiles import get_performance_profile, performance_profile_config
+        from dlt_dbt_dagster.dlt.spacex_pipeline import (
+            arrow_batches_config,
+            check_arrow_batches,
+            extract_workers_limit,
+            retire_absent_rows,
+        )
+
+        with extract_workers_limit(self.extract_workers), arrow_batches_config(self.arrow_batches):
+            pipeline = self.make_pipeline()
+            check_arrow_batches(pipeline, self.arrow_batches)
+            run_profile = get_performance_profile(pipeline.destination.destination_name, self.performance_profile)
+            with performance_profile_config(run_profile):
+                pipeline.run(source, loader_file_format=run_profile.loader_file_format)
+            if row_fingerprints is not None:
+                retire_absent_rows(pipeline, row_fingerprints.extracted_ids(), lake_dir=get_lake_dir(self.lake_dir))
+        trace = pipeline.last_trace
+        metrics.record_trace(trace)
+        if self.metrics_dir is not None:
+            metrics.write_prometheus(Path(self.metrics_dir) / f"{metrics_name}.prom")
+        return dict(trace.last_normalize_info.row_counts) if trace and trace.last_normalize_info else {}
+
+
+def bronze_asset_key(schema_type: BronzeSchema) -> dg.AssetKey:
+    return dg.AssetKey([DBT_SOURCE_NAME, schema_type.value])
+
+
+def get_month_bounds(time_window: dg.TimeWindow) -> tuple[int, int, int, int]:
+    """Get the first and last (year, month) of a window of monthly partitions"""
+    last_day = time_window.end - timedelta(days=1)
+    return time_window.start.year, time_window.start.month, last_day.year, last_day.month
+
+
+@dg.asset(
+    key=bronze_asset_key(BronzeSchema.LAUNCHES),
+    partitions_def=MONTHLY_PARTITIONS,
+    backfill_policy=dg.BackfillPolicy.single_run(),
+    pool=SPACEX_API_POOL,
+    group_name="bronze",
+    kinds={"dlt"},
+)
+def bronze_launches(context: dg.AssetExecutionContext, spacex_pipeline: SpaceXPipelineResource) -> dg.MaterializeResult:
+    """Load the launches of the partition months, each launch replaces the rows of its own year and month"""
+    from dlt_dbt_dagster.dlt.instrumentation import PipelineMetrics
+    from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_backfill_source
+
+    start_year, start_month, end_year, end_month = get_month_bounds(context.partition_time_window)
+    metrics = PipelineMetrics()
+    # The session of the source is closed, with its worker pool, once the run is over
+    with ExitStack() as sessions:
+        source = spacex_api_backfill_source(
+            start_year=start_year,
+            start_month=start_month,
+            end_year=end_year,
+            end_month=end_month,
+            page_workers=spacex_pipeline.page_workers,
+            arrow_batches=spacex_pipeline.arrow_batches,
+            metrics=metrics,
+            stream_pages=spacex_pipeline.stream_pages,
+            page_sizer=spacex_pipeline.make_page_sizer(),
+            scheduler=spacex_pipeline.make_scheduler(),
+            exit_stack=sessions,
+        ).with_resources(BronzeSchema.LAUNCHES.value)
+        row_counts = spacex_pipeline.run(source, metrics, metrics_name=context.op_def.name)
+    return dg.MaterializeResult(
+        metadata={
+            "rows": row_counts.get(BronzeSchema.LAUNCHES.value, 0),
+            "months": len(context.partition_keys),
+            **metrics.to_metadata(BronzeSchema.LAUNCHES.value),
+        }
+    )
+
+
+@dg.multi_asset(
+    specs=[
+        dg.AssetSpec(bronze_asset_key(schema_type), group_name="bronze", kinds={"dlt"})
+        for schema_type in REFERENCE_TABLES
+    ],
+    can_subset=True,
+    pool=SPACEX_API_POOL,
+)
+def bronze_reference_tables(
+    context: dg.AssetExecutionContext, spacex_pipeline: SpaceXPipelineResource
+) -> Iterator[dg.MaterializeResult]:
+    """Load the selected reference tables, extracting them concurrently, and retire the rows removed from the API"""
+    from dlt_dbt_dagster.dlt.instrumentation import PipelineMetrics
+    from dlt_dbt_dagster.dlt.row_fingerprints import RowFingerprintIndex
+    from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+
+    selected = {key.path[-1]: key for key in context.selected_asset_keys}
+    metrics = PipelineMetrics()
+    row_fingerprints = RowFingerprintIndex(skip_unchanged=False)
+    # The launches resource is not selected, so the month of the source does not matter
+    with ExitStack() as sessions:
+        source = spacex_api_source(
+            year=YEAR,
+            month=MONTH,
+            page_workers=spacex_pipeline.page_workers,
+            arrow_batches=spacex_pipeline.arrow_batches,
+            parallelized=True,
+            row_fingerprints=row_fingerprints,
+            metrics=metrics,
+            stream_pages=spacex_pipeline.stream_pages,
+            page_sizer=spacex_pipeline.make_page_sizer(),
+            scheduler=spacex_pipeline.make_scheduler(),
+            exit_stack=sessions,
+        ).with_resources(*selected)
+        row_counts = spacex_pipeline.run(
+            source, metrics, metrics_name=context.op_def.name, row_fingerprints=row_fingerprints
+        )
+    for table_name, asset_key in selected.items():
+        yield dg.MaterializeResult(
+            asset_key=asset_key, metadata={"rows": row_counts.get(table_name, 0), **metrics.to_metadata(table_name)}
+        )
@@ -0,0 +1,104 @@
+"""The dbt_spacex project and its manifest, cached by the content of the project files
+
+Parsing the project takes seconds, on every reload of the code location under `dagster dev`. The manifest parsed is
+cached under `target/manifest_cache/<hash>.json`, the hash of the project files, of the profile and of the environment
+variables the project reads, and reused as long as none of them changed. Outside `dagster dev` a manifest packaged with
+`dagster-dbt project prepare-and-package` is used when none is cached. The cache is prebuilt, for example when building
+a deployment image, with:
+    python -m dlt_dbt_dagster.defs.dbt_project
+"""
+
+import hashlib
+import os
+import shutil
+from importlib.metadata import version
+from pathlib import Path
+
+from dagster_dbt import DbtProject
+from dotenv import load_dotenv
+
+# The .env is loaded with the definitions, before the profile location and the manifest hash read the environment and
+# before the bronze assets run, which import the pipeline modules only then
+load_dotenv()
+
+DBT_PROJECT_DIR = Path(__file__).parents[1] / "dbt_spacex"
+# The project ships no profiles.yml, the dbt_spacex profile is looked up where dbt itself looks for it
+DBT_PROFILES_DIR = Path(os.environ.get("DBT_PROFILES_DIR", Path.home() / ".dbt"))
+# Files and directories of the project parsed into the manifest, as configured in dbt_project.yml
+PROJECT_PATHS = (
+    "dbt_project.yml",
+    "packages.yml",
+    "package-lock.yml",
+    "models",
+    "macros",
+    "tests",
+    "seeds",
+    "snapshots",
+    "analyses",
+)
+# Environment variables read by the project while it is parsed
+PROJECT_ENV_VARS = ("SPACEX_BRONZE_LAKE_DIR",)
+MANIFEST_CACHE_DIR = Path("manifest_cache")
+# Manifests kept in the cache, the least recently parsed ones are removed
+MANIFEST_CACHE_SIZE = 5
+
+dbt_spacex_project = DbtProject(
+    project_dir=DBT_PROJECT_DIR, profiles_dir=DBT_PROFILES_DIR if DBT_PROFILES_DIR.exists() else None
+)
+
+
+def hash_project(project: DbtProject = dbt_spacex_project) -> str:
+    """Hash the files of the project, its location, profile and environment variables and the dbt version"""
+    # The manifest holds the absolute paths of the project files
+    digest = hashlib.sha256(f"{version('dbt-core')}:{project.project_dir.resolve()}".encode())
+    for name in PROJECT_PATHS:
+        path = project.project_dir / name
+        for file in sorted(path.rglob("*")) if path.is_dir() else [path]:
+            if file.is_file():
+                digest.update(str(file.relative_to(project.project_dir)).encode())
+                digest.update(file.read_bytes())
+    if project.profiles_dir is not None and (project.profiles_dir / "profiles.yml").exists():
+        digest.update((project.profiles_dir / "profiles.yml").read_bytes())
+    for name in PROJECT_ENV_VARS:
+        digest.update(f"{name}={os.environ.get(name, '')}".encode())
+    return digest.hexdigest()
+
+
+def get_cached_manifest_path(project: DbtProject = dbt_spacex_project) -> Path:
+    """Get the path of the manifest cached for the current content of the project"""
+    return project.project_dir / project.target_path / MANIFEST_CACHE_DIR / f"{hash_project(project)}.json"
+
+
+def prepare_manifest(project: DbtProject = dbt_spacex_project) -> Path:
+    """Install the packages, parse the project and cache its manifest, the oldest manifests cached are removed"""
+    project.preparer.prepare(project)
+    # Hashed once the packages are installed, which may update package-lock.yml
+    cached_path = get_cached_manifest_path(project)
+    cached_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(project.manifest_path, cached_path)
+    older = sorted(
+        (path for path in cached_path.parent.glob("*.json") if path != cached_path),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in older[MANIFEST_CACHE_SIZE - 1 :]:
+        path.unlink()
+    return cached_path
+
+
+def get_manifest_path(project: DbtProject = dbt_spacex_project) -> Path:
+    """Get the manifest of the project, parsed on a change of the project under `dagster dev` only"""
+    cached_path = get_cached_manifest_path(project)
+    if cached_path.exists() and not project.has_uninstalled_deps:
+        return cached_path
+    if not project.preparer.using_dagster_dev() and project.manifest_path.exists():
+        return project.manifest_path
+    return prepare_manifest(project)
+
+
+def main() -> None:
+    print(prepare_manifest())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Resources shared by the SpaceX bronze and silver assets"""
+
+import dagster as dg
+from dagster.components import definitions
+from dagster_dbt import DbtCliResource
+
+from dlt_dbt_dagster.defs.bronze import SpaceXPipelineResource
+from dlt_dbt_dagster.defs.dbt_project import DBT_PROFILES_DIR, dbt_spacex_project
+
+
+@definitions
+def resources() -> dg.Definitions:
+    return dg.Definitions(
+        resources={
+            "spacex_pipeline": SpaceXPipelineResource(),
+            "dbt": DbtCliResource(
+                project_dir=dbt_spacex_project,
+                profiles_dir=str(DBT_PROFILES_DIR) if DBT_PROFILES_DIR.exists() else None,
+            ),
+        }
+    )
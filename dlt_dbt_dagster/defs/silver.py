@@ -0,0 +1,15 @@
+"""Silver dbt models of the SpaceX data, downstream of the bronze dlt assets through the dbt sources"""
+
+from collections.abc import Iterator
+from typing import Any
+
+import dagster as dg
+from dagster_dbt import DbtCliResource, dbt_assets
+
+from dlt_dbt_dagster.defs.dbt_project import dbt_spacex_project, get_manifest_path
+
+
+@dbt_assets(manifest=get_manifest_path(), project=dbt_spacex_project)
+def dbt_spacex_assets(context: dg.AssetExecutionContext, dbt: DbtCliResource) -> Iterator[Any]:
+    """Build the selected dbt models and run their tests"""
+    yield from dbt.cli(["build"], context=context).stream()
@@ -0,0 +1,101 @@
+"""Find the bronze tables changed by a load and build only their silver models
+
+Usage:
+    load_info = load_spacex_bronze_data(year=2021, month=3, production=True)
+    build_changed_models(load_info)
+
+The load goes to the production `bronze` dataset, the one the dbt sources read. This is the selection of the runs
+outside Dagster: there the silver models are built after the bronze assets materialized, as selected in the asset
+graph.
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional, Union, cast
+
+import dlt
+from dbt.cli.main import dbtRunner, dbtRunnerResult
+from dlt.common.pipeline import LoadInfo
+from dlt.destinations.sql_client import SqlClientBase
+
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.spacex_pipeline import MONTH, YEAR, load_spacex_bronze_data
+
+DBT_PROJECT_DIR = Path(__file__).parents[1] / "dbt_spacex"
+# dlt marks the load packages fully loaded to the destination with status 0 in `_dlt_loads`
+LOAD_COMPLETED = 0
+
+
+def get_completed_load_ids(client: SqlClientBase, load_ids: list[str]) -> list[str]:
+    """Keep the load ids recorded as completed in `_dlt_loads`"""
+    placeholders = ", ".join(["%s"] * len(load_ids))
+    rows = client.execute_sql(
+        f"select load_id from {client.make_qualified_table_name('_dlt_loads')} "  # noqa: S608
+        f"where status = {LOAD_COMPLETED} and load_id in ({placeholders})",
+        *load_ids,
+    )
+    return [row[0] for row in rows or []]
+
+
+def get_changed_tables(load_info: LoadInfo) -> list[str]:
+    """Get the bronze tables with rows in the completed loads of the load info, or scd2 rows retired since they began
+
+    dlt retires an scd2 row by setting its `_dlt_valid_to` without changing its load id, so a load that only removed
+    rows leaves no row with its load id. Load ids are the time their package was created, before any retirement.
+    """
+    if not load_info.loads_ids:
+        return []
+    pipeline = cast(dlt.Pipeline, load_info.pipeline)
+    tables = pipeline.default_schema.tables
+    changed = []
+    with pipeline.sql_client() as client:
+        load_ids = get_completed_load_ids(client, list(load_info.loads_ids))
+        if not load_ids:
+            return []
+        first_load_at = datetime.fromtimestamp(min(float(load_id) for load_id in load_ids), tz=timezone.utc)
+        placeholders = ", ".join(["%s"] * len(load_ids))
+        for schema_type in BronzeSchema:
+            table_name = schema_type.value
+            if table_name not in tables:
+                continue
+            condition = f"_dlt_load_id in ({placeholders})"
+            args: list[Any] = [*load_ids]
+            if "_dlt_valid_to" in tables[table_name]["columns"]:
+                condition += " or _dlt_valid_to >= %s"
+                args.append(first_load_at)
+            rows = client.execute_sql(
+                f"select 1 from {client.make_qualified_table_name(table_name)} where {condition} limit 1",  # noqa: S608
+                *args,
+            )
+            if rows:
+                changed.append(table_name)
+    return changed
+
+
+def get_silver_selection(changed_tables: list[str]) -> list[str]:
+    """Select the silver models of the changed bronze tables and every model downstream of them"""
+    return [f"{table_name.replace('bronze_', 'silver_', 1)}+" for table_name in changed_tables]
+
+
+def build_changed_models(
+    load_info: LoadInfo,
+    project_dir: Union[str, Path] = DBT_PROJECT_DIR,
+    profiles_dir: Optional[Union[str, Path]] = None,
+) -> Optional[dbtRunnerResult]:
+    """Build the silver models of the bronze tables changed by the load, nothing when no table changed"""
+    changed_tables = get_changed_tables(load_info)
+    if not changed_tables:
+        print("No bronze table changed, skipping the dbt build")
+        return None
+
+    args = ["build", "--select", *get_silver_selection(changed_tables), "--project-dir", str(project_dir)]
+    if profiles_dir is not None:
+        args += ["--profiles-dir", str(profiles_dir)]
+    result = dbtRunner().invoke(args)
+    if not result.success:
+        raise RuntimeError(f"dbt build of {', '.join(changed_tables)} failed: {result.exception}")  # noqa: TRY003
+    return result
+
+
+if __name__ == "__main__":
+    build_changed_models(load_spacex_bronze_data(year=YEAR, month=MONTH, production=True))
@@ -0,0 +1,34 @@
+"""dlt config values scoped to a block of code
+
+The values are set in the environment, which dlt reads before its config files, as `SECTION__KEY` variables, and the
+previous environment is restored on exit, so they do not carry over to the pipelines run after the block.
+"""
+
+import os
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from typing import Any
+
+
+def get_config_variable(key: str) -> str:
+    """Name of the environment variable of a dotted dlt config key, like `NORMALIZE__WORKERS` for `normalize.workers`"""
+    return key.replace(".", "__").upper()
+
+
+@contextmanager
+def config_scope(values: Mapping[str, Any]) -> Iterator[None]:
+    """Set the dlt config values of the dotted keys in the block and restore the previous ones on exit"""
+    variables = {
+        get_config_variable(key): str(value).lower() if isinstance(value, bool) else str(value)
+        for key, value in values.items()
+    }
+    previous = {name: os.environ.get(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
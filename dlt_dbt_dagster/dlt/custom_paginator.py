@@ -1,30 +1,331 @@
-from typing import Any, Optional
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional, cast
 
-from dlt.sources.helpers.requests import Request, Response
+from dlt.sources.helpers.requests import Client, Request, Response, Session
+from dlt.sources.helpers.requests.retry import DEFAULT_RETRY_STATUS
+from dlt.sources.helpers.requests.session import DEFAULT_TIMEOUT
 from dlt.sources.helpers.rest_client.paginators import BasePaginator
+from requests import PreparedRequest
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from dlt_dbt_dagster.constants.pipeline import DEFAULT_MAX_LIMIT, DEFAULT_MIN_LIMIT
+from dlt_dbt_dagster.dlt.instrumentation import PipelineMetrics
+from dlt_dbt_dagster.dlt.request_scheduler import (
+    RateLimitAdapter,
+    RequestScheduler,
+    close_delegate,
+    get_pooled_adapter,
+)
+
+# Default targets of the adaptive page size
+DEFAULT_TARGET_SECONDS = 1.0
+DEFAULT_MAX_RESPONSE_BYTES = 4 * 1024 * 1024
+
+
+class PrefetchAdapter(HTTPAdapter):
+    """HTTP adapter that serves requests already fetched ahead of time by a bounded worker pool
+
+    The requests are sent with the `delegate` adapter when one is set, otherwise with connections of its own. The
+    prefetched requests are sent with the options (timeout, verify, proxies...) of the last `send`, a prefetched
+    response sent with other options than the ones of its `send` is dropped and the request sent again.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        timeout: float = DEFAULT_TIMEOUT,
+        delegate: Optional[BaseAdapter] = None,  # type: ignore[no-any-unimported]
+        **kwargs: Any,
+    ):
+        super().__init__(pool_maxsize=max(max_workers, 10), **kwargs)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.delegate = delegate
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._send_kwargs: dict[str, Any] = {"timeout": timeout}
+        self._pending: dict[tuple[Optional[str], Any], tuple[Future[Response], dict[str, Any]]] = {}  # type: ignore[no-any-unimported]
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict) -> "PrefetchAdapter":
+        """Returns the adapter itself: dlt deep copies the paginator (and the rest api config) per resource, and the
+        worker pool must stay shared. The copies share the requests in flight too, they are keyed by URL and body so
+        a copy only gets the responses of the requests it sends, and `close` of any copy cancels them all."""
+        return self
+
+    def prefetch(self, request: PreparedRequest) -> None:  # type: ignore[no-any-unimported]
+        """Schedules the request on the worker pool so a later `send` of the same request returns immediately"""
+        with self._lock:
+            key = (request.url, request.body)
+            if key in self._pending:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="spacex-prefetch")
+            kwargs = dict(self._send_kwargs)
+            self._pending[key] = (self._executor.submit(self.send_now, request, **kwargs), kwargs)
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:  # type: ignore[no-any-unimported, override]
+        """Returns the prefetched response for the request if there is one sent with the same options, otherwise
+        sends it"""
+        with self._lock:
+            self._send_kwargs = kwargs
+            future, prefetch_kwargs = self._pending.pop((request.url, request.body), (None, None))
+        if future is not None and not future.cancelled():
+            if prefetch_kwargs == kwargs:
+                return future.result()
+            # The response is not needed anymore, its connection goes back to the pool
+            future.add_done_callback(close_response)
+        return self.send_now(request, **kwargs)
+
+    def send_now(self, request: PreparedRequest, **kwargs: Any) -> Response:  # type: ignore[no-any-unimported]
+        """Sends the request with the delegate, or with the connections of the adapter itself"""
+        if self.delegate is not None:
+            return self.delegate.send(request, **kwargs)
+        return super().send(request, **kwargs)
+
+    def close(self) -> None:
+        """Cancels the prefetched requests, waits for the ones in flight, shuts the worker pool down and closes the
+        delegate, see `close_delegate`"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            future.cancel()
+            future.add_done_callback(close_response)
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if self.delegate is not None:
+            close_delegate(self.delegate)
+        super().close()
+
+
+def close_response(future: Future[Response]) -> None:
+    """Closes the response of a prefetched request that will not be read"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class PageSizer:
+    """Adapts the page size of each endpoint to the latency, the size and the failed attempts of its last page
+
+    The limit doubles while a page answers in under half of `target_seconds` and of `max_response_bytes`, halves when a
+    page goes over either of them or was only answered after failed attempts, and stays between `min_limit` and
+    `max_limit`. The copies of the paginator of every resource share the sizer, each one adapts the limit of its own
+    endpoint.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        target_seconds: float = DEFAULT_TARGET_SECONDS,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+    ):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError(f"Page size bounds must be 1 <= min_limit <= max_limit, got {min_limit} and {max_limit}")  # noqa: TRY003
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_seconds = target_seconds
+        self.max_response_bytes = max_response_bytes
+        # The limits of the pages requested from each endpoint, and its failed attempts
+        self.limits: defaultdict[str, list[int]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self._new_errors: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict) -> "PageSizer":
+        # dlt deep copies the paginator per resource, the failed attempts are recorded by the shared session
+        return self
+
+    def clamp(self, limit: int) -> int:
+        """Bring a limit within the bounds"""
+        return min(max(limit, self.min_limit), self.max_limit)
+
+    def record_error(self, url: str) -> None:
+        """Record a failed attempt of a request to the endpoint"""
+        with self._lock:
+            self.errors[url] += 1
+            self._new_errors[url] += 1
+
+    def next_limit(self, url: str, limit: int, elapsed_seconds: float, response_bytes: int) -> int:
+        """Get the limit of the next page of the endpoint from the last page, answered with the given limit"""
+        with self._lock:
+            new_errors = self._new_errors.pop(url, 0)
+        if new_errors or elapsed_seconds > self.target_seconds or response_bytes > self.max_response_bytes:
+            next_limit = self.clamp(limit // 2)
+        elif elapsed_seconds * 2 <= self.target_seconds and response_bytes * 2 <= self.max_response_bytes:
+            next_limit = self.clamp(limit * 2)
+        else:
+            next_limit = limit
+        with self._lock:
+            self.limits[url].append(next_limit)
+        return next_limit
+
+
+class PageSizingAdapter(HTTPAdapter):
+    """HTTP adapter recording the failed attempts of every request in a PageSizer, the requests go to the delegate"""
+
+    def __init__(self, page_sizer: PageSizer, delegate: BaseAdapter, **kwargs: Any):  # type: ignore[no-any-unimported]
+        super().__init__(**kwargs)
+        self.page_sizer = page_sizer
+        self.delegate = delegate
+
+    def __deepcopy__(self, memo: dict) -> "PageSizingAdapter":
+        return self
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:  # type: ignore[no-any-unimported, override]
+        """Sends the request with the delegate, the retried status codes and the raised errors count as failed"""
+        try:
+            response = self.delegate.send(request, **kwargs)
+        except OSError:
+            # The connection errors and timeouts of requests are OSErrors
+            self.page_sizer.record_error(str(request.url))
+            raise
+        if response.status_code in DEFAULT_RETRY_STATUS:
+            self.page_sizer.record_error(str(request.url))
+        return response
+
+    def close(self) -> None:
+        close_delegate(self.delegate)
+        super().close()
 
 
 class CustomJsonPaginator(BasePaginator):
-    """Implements a custom paginator for the SpaceX API pipeline"""
+    """Implements a custom paginator for the SpaceX API pipeline
+
+    With `max_workers` above 1 the paginator runs in concurrent mode: it reads `totalPages` from the first
+    `/query` response and keeps up to `max_workers` of the following pages in flight on a shared worker pool,
+    while dlt still receives the pages one by one and in order. With `metrics` every page is recorded in them.
+
+    With a `page_sizer` the limit of each page is adapted to the previous page, starting from the limit of the first
+    request. The pages are then requested by offset, the number of documents of the full pages already read, so
+    changing the limit neither skips nor repeats documents. It cannot be combined with the concurrent mode, whose
+    pages are fixed by the `totalPages` of the first response. With a `scheduler` every request, the prefetched ones
+    included, waits for the rate limits and the throttling pauses shared by all the resources.
+    """
 
-    def __init__(self, initial_page: int = 1, options_key: str = "options", page_key: str = "page"):
+    def __init__(
+        self,
+        initial_page: int = 1,
+        options_key: str = "options",
+        page_key: str = "page",
+        total_pages_key: str = "totalPages",
+        max_workers: int = 1,
+        metrics: Optional[PipelineMetrics] = None,
+        page_sizer: Optional[PageSizer] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        limit_key: str = "limit",
+        offset_key: str = "offset",
+    ):
+        if page_sizer is not None and max_workers > 1:
+            raise ValueError("Adaptive page sizing cannot be combined with concurrent pages")  # noqa: TRY003
         super().__init__()
         self.page = initial_page
         self.options_key = options_key
         self.page_key = page_key
+        self.total_pages_key = total_pages_key
+        self.max_workers = max_workers
+        self.metrics = metrics
+        self.page_sizer = page_sizer
+        self.scheduler = scheduler
+        self.limit_key = limit_key
+        self.offset_key = offset_key
+        self.limit: Optional[int] = None
+        self.offset = 0
+        self.last_page: tuple[float, int] = (0.0, 0)
+        self.total_pages: Optional[int] = None
+        self.prefetched_through = initial_page
+        self.prefetch_adapter = PrefetchAdapter(max_workers=max_workers) if max_workers > 1 else None
+
+    def make_session(self) -> Session:
+        """Makes a retrying session on the connections pooled by the process, routed through the scheduler, the
+        prefetch and the page sizing adapters that are set"""
+        transport: BaseAdapter = get_pooled_adapter()  # type: ignore[no-any-unimported]
+        if self.scheduler is not None:
+            transport = RateLimitAdapter(self.scheduler, delegate=transport)
+        if self.prefetch_adapter is not None:
+            # Prefetched pages wait for the scheduler as well
+            self.prefetch_adapter.delegate = transport
+            transport = self.prefetch_adapter
+        if self.page_sizer is not None:
+            transport = PageSizingAdapter(self.page_sizer, delegate=transport)
+
+        session = Client(raise_for_status=False).session
+        session.mount("http://", transport)
+        session.mount("https://", transport)
+        return session
 
     def init_request_json(self, request: Request) -> None:  # type: ignore[no-any-unimported]
         """Sets up the initial API request JSON body parameters"""
         self.update_request(request)
 
+    def init_request(self, request: Request) -> None:  # type: ignore[no-any-unimported]
+        """Starts the adaptive page size from the limit of the first request"""
+        if self.page_sizer is None:
+            return
+        options = cast(dict[str, Any], request.json or {}).get(self.options_key, {})
+        self.limit = self.page_sizer.clamp(int(options.get(self.limit_key, self.page_sizer.min_limit)))
+        self.offset = 0
+        self.update_request(request)
+
     def update_state(self, response: Response, data: Optional[list[Any]] = None) -> None:  # type: ignore[no-any-unimported]
         """Updates the paginator's state based on the response of API call"""
+        started = time.perf_counter()
+        response_json = response.json()
+        self.record_page(response, decode_seconds=time.perf_counter() - started)
+        self.update_page_state(response_json, response.request)
+
+    def record_page(  # type: ignore[no-any-unimported]
+        self, response: Response, decode_seconds: float, response_bytes: Optional[int] = None
+    ) -> None:
+        """Records the page answered by the response in the metrics and for the size of the next page"""
+        if self.metrics is not None:
+            self.metrics.record_page(
+                response, page=self.page, decode_seconds=decode_seconds, response_bytes=response_bytes
+            )
+        if self.page_sizer is not None:
+            response_bytes = len(response.content) if response_bytes is None else response_bytes
+            self.last_page = (response.elapsed.total_seconds(), response_bytes)
+
+    def update_page_state(self, page_info: dict[str, Any], request: PreparedRequest) -> None:  # type: ignore[no-any-unimported]
+        """Updates the paginator's state from the pagination fields of the page answering the request"""
         # Check the 'hasNextPage' field in the JSON response to determine if need to continue to next page or not
-        if response.json().get("hasNextPage"):
+        if page_info.get("hasNextPage"):
             self.page += 1
+            if self.page_sizer is not None and self.limit is not None:
+                # A page followed by another one is full, the next page starts after all of its documents
+                self.offset += self.limit
+                self.limit = self.page_sizer.next_limit(str(request.url), self.limit, *self.last_page)
         else:
             self._has_next_page = False
 
+        if self.prefetch_adapter is not None and self._has_next_page:
+            if self.total_pages is None:
+                self.total_pages = page_info.get(self.total_pages_key)
+            self.prefetch_next_pages(request)
+
+    def prefetch_next_pages(self, request: PreparedRequest) -> None:  # type: ignore[no-any-unimported]
+        """Keeps up to `max_workers` pages after the current one in flight, bounded by the total number of pages"""
+        if self.prefetch_adapter is None or self.total_pages is None:
+            return
+
+        last_page = min(self.total_pages, self.page + self.max_workers - 1)
+        first_page = max(self.page, self.prefetched_through + 1)
+        for page in range(first_page, last_page + 1):
+            self.prefetch_adapter.prefetch(self.make_page_request(request, page))
+        self.prefetched_through = max(self.prefetched_through, last_page)
+
+    def make_page_request(self, request: PreparedRequest, page: int) -> PreparedRequest:  # type: ignore[no-any-unimported]
+        """Copies the prepared request with the JSON body pointing at the given page"""
+        page_request = request.copy()
+        body = json.loads(cast(bytes, request.body) or b"{}")
+        body.setdefault(self.options_key, {})[self.page_key] = page
+        page_request.prepare_body(data=None, files=None, json=body)
+        return page_request
+
     def update_request(self, request: Request) -> None:  # type: ignore[no-any-unimported]
         """Modifies the API request JSON body parameters based on the current state of paginator"""
 
@@ -36,3 +337,7 @@ class CustomJsonPaginator(BasePaginator):
             request.json[self.options_key] = {}
 
         request.json[self.options_key][self.page_key] = self.page
+        if self.limit is not None:
+            options = cast(dict[str, Any], request.json)[self.options_key]
+            options[self.limit_key] = self.limit
+            options[self.offset_key] = self.offset
@@ -0,0 +1,231 @@
+"""Per-page and per-resource performance metrics of the SpaceX pipeline
+
+`PipelineMetrics` is handed to the source, the paginator records the latency, size and decode time of every page
+and the projection step counts the records in and out of it. Once the pipeline ran, `record_trace` adds the extract,
+normalize and load seconds of each resource from the dlt trace. The metrics are written as a Prometheus text file,
+for the node exporter textfile collector, and attached as asset metadata under Dagster.
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from dlt.pipeline.trace import PipelineTrace
+from requests import Response
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+
+METRICS_PREFIX = "spacex_pipeline"
+STAGES = ("extract", "normalize", "load")
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ENDPOINT_RESOURCES = {
+    Endpoints.LAUNCHES.value: BronzeSchema.LAUNCHES.value,
+    Endpoints.ROCKETS.value: BronzeSchema.ROCKETS.value,
+    Endpoints.CORES.value: BronzeSchema.CORES.value,
+    Endpoints.PAYLOADS.value: BronzeSchema.PAYLOADS.value,
+    Endpoints.LAUNCHPADS.value: BronzeSchema.LAUNCHPADS.value,
+    Endpoints.SHIPS.value: BronzeSchema.SHIPS.value,
+}
+
+
+class PageMetrics(NamedTuple):
+    """Metrics of a single page of an endpoint"""
+
+    resource: str
+    page: int
+    latency_seconds: float
+    response_bytes: int
+    decode_seconds: float
+
+
+def get_resource_name(response: Response) -> str:
+    """Get the bronze table of the endpoint the response answers, the URL path for an unknown endpoint"""
+    url = response.request.url if response.request is not None else response.url
+    path = str(url).split("?", 1)[0].rstrip("/")
+    for endpoint, resource in ENDPOINT_RESOURCES.items():
+        if path.endswith(f"/{endpoint}"):
+            return resource
+    return path
+
+
+def writer_seconds(job_metrics: dict[str, Any]) -> dict[str, float]:
+    """Sum the time between the first and last write of the job files of each table"""
+    seconds: dict[str, float] = defaultdict(float)
+    for job_id, metrics in job_metrics.items():
+        seconds[job_id.split(".")[0]] += metrics.last_modified - metrics.created
+    return dict(seconds)
+
+
+def load_seconds(job_metrics: dict[str, Any]) -> dict[str, float]:
+    """Sum the time of the load jobs of each table, the merge jobs that follow them included"""
+    seconds: dict[str, float] = defaultdict(float)
+    for metrics in job_metrics.values():
+        seconds[metrics.table_name] += (metrics.finished_at - metrics.started_at).total_seconds()
+    return dict(seconds)
+
+
+def get_stage_seconds(trace: PipelineTrace) -> dict[str, dict[str, float]]:
+    """Get the extract, normalize and load seconds of each resource from the last run of the pipeline trace"""
+    stage_seconds: dict[str, dict[str, float]] = {stage: {} for stage in STAGES}
+    if trace.last_extract_info is not None:
+        for extract_metrics in trace.last_extract_info.metrics.values():
+            for metrics in extract_metrics:
+                stage_seconds["extract"] |= {
+                    getattr(name, "value", name): writer.last_modified - writer.created
+                    for name, writer in metrics["resource_metrics"].items()
+                }
+    if trace.last_normalize_info is not None:
+        for normalize_metrics in trace.last_normalize_info.metrics.values():
+            for step_metrics in normalize_metrics:
+                stage_seconds["normalize"] |= writer_seconds(step_metrics["job_metrics"])
+    if trace.last_load_info is not None:
+        for load_metrics in trace.last_load_info.metrics.values():
+            for load_step_metrics in load_metrics:
+                stage_seconds["load"] |= load_seconds(load_step_metrics["job_metrics"])
+    return stage_seconds
+
+
+class PipelineMetrics:
+    """Thread safe collector of the page, record and stage metrics of a pipeline run"""
+
+    def __init__(self) -> None:
+        self.pages: list[PageMetrics] = []
+        # [records in, records out] of the projection step of each resource
+        self.records: dict[str, list[int]] = {}
+        self.stage_seconds: dict[str, dict[str, float]] = {stage: {} for stage in STAGES}
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict) -> "PipelineMetrics":
+        # dlt deep copies the paginator (and the rest api config) per resource, every copy must record here
+        return self
+
+    def record_page(
+        self, response: Response, page: int, decode_seconds: float, response_bytes: Optional[int] = None
+    ) -> None:
+        """Record a page of an endpoint, its latency is the time the extract waited for the response
+
+        The `response_bytes` of a streamed response, whose content is consumed, are counted as it is read.
+        """
+        page_metrics = PageMetrics(
+            resource=get_resource_name(response),
+            page=page,
+            latency_seconds=response.elapsed.total_seconds(),
+            response_bytes=len(response.content) if response_bytes is None else response_bytes,
+            decode_seconds=decode_seconds,
+        )
+        with self._lock:
+            self.pages.append(page_metrics)
+
+    def count_records(self, resource: str, step: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Wrap a record step of a resource to count the records in and out of it
+
+        The steps of a resource run one record after the other, so the counts of a resource need no lock.
+        """
+        with self._lock:
+            counts = self.records.setdefault(resource, [0, 0])
+
+        def inner_func(record: Any) -> Any:
+            counts[0] += 1
+            result = step(record)
+            if result is not None:
+                counts[1] += 1
+            return result
+
+        return inner_func
+
+    def record_trace(self, trace: Optional[PipelineTrace]) -> None:
+        """Record the stage seconds of each resource from the trace of the pipeline run"""
+        if trace is not None:
+            self.stage_seconds = get_stage_seconds(trace)
+        self.finished_at = time.time()
+
+    def resources(self) -> list[str]:
+        """List the resources with any metric, in the order of BronzeSchema"""
+        names = {page.resource for page in self.pages} | set(self.records)
+        # The trace also times the dlt tables, `_dlt_pipeline_state` and the like
+        names |= {name for seconds in self.stage_seconds.values() for name in seconds if not name.startswith("_dlt")}
+        ordered = [schema_type.value for schema_type in BronzeSchema if schema_type.value in names]
+        return ordered + sorted(names - set(ordered))
+
+    def summary(self, resource: str) -> dict[str, Union[int, float]]:
+        """Summarize the metrics of a resource"""
+        pages = [page for page in self.pages if page.resource == resource]
+        records_in, records_out = self.records.get(resource, [0, 0])
+        return {
+            "pages": len(pages),
+            "request_seconds": sum(page.latency_seconds for page in pages),
+            "max_page_latency_seconds": max((page.latency_seconds for page in pages), default=0.0),
+            "response_bytes": sum(page.response_bytes for page in pages),
+            "decode_seconds": sum(page.decode_seconds for page in pages),
+            "records_in": records_in,
+            "records_out": records_out,
+            **{f"{stage}_seconds": self.stage_seconds[stage].get(resource, 0.0) for stage in STAGES},
+        }
+
+    def to_metadata(self, resource: str) -> dict[str, Any]:
+        """Get the metrics of a resource as asset metadata, with its slowest pages"""
+        slowest = sorted(
+            (page for page in self.pages if page.resource == resource),
+            key=lambda page: page.latency_seconds,
+            reverse=True,
+        )[:5]
+        return {
+            **self.summary(resource),
+            "slowest_pages": [page._asdict() for page in slowest],
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the metrics of every resource in the Prometheus text format"""
+        lines: list[str] = []
+
+        def add_metric(name: str, metric_type: str, help_text: str, samples: list[tuple[str, str, Any]]) -> None:
+            lines.append(f"# HELP {METRICS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name} {metric_type}")
+            lines.extend(f"{METRICS_PREFIX}_{name}{suffix}{{{labels}}} {value}" for suffix, labels, value in samples)
+
+        resources = self.resources()
+        summaries = {resource: self.summary(resource) for resource in resources}
+        latency_samples: list[tuple[str, str, Any]] = []
+        for resource in resources:
+            latencies = [page.latency_seconds for page in self.pages if page.resource == resource]
+            for bucket in LATENCY_BUCKETS:
+                count = sum(1 for latency in latencies if latency <= bucket)
+                latency_samples.append(("_bucket", f'resource="{resource}",le="{bucket}"', count))
+            latency_samples.append(("_bucket", f'resource="{resource}",le="+Inf"', len(latencies)))
+            latency_samples.append(("_sum", f'resource="{resource}"', sum(latencies)))
+            latency_samples.append(("_count", f'resource="{resource}"', len(latencies)))
+        add_metric("page_latency_seconds", "histogram", "Latency of the API pages", latency_samples)
+
+        for name, key, help_text in (
+            ("response_bytes_total", "response_bytes", "Bytes of the API pages"),
+            ("decode_seconds_total", "decode_seconds", "Seconds spent decoding the JSON of the API pages"),
+            ("records_in_total", "records_in", "Records into the projection step"),
+            ("records_out_total", "records_out", "Records out of the projection step"),
+        ):
+            samples = [("", f'resource="{resource}"', summaries[resource][key]) for resource in resources]
+            add_metric(name, "counter", help_text, samples)
+
+        stage_samples = [
+            ("", f'resource="{resource}",stage="{stage}"', summaries[resource][f"{stage}_seconds"])
+            for resource in resources
+            for stage in STAGES
+        ]
+        add_metric("stage_seconds", "gauge", "Seconds of each pipeline stage of the resource", stage_samples)
+        if self.finished_at is not None:
+            finished_samples = [("", f'resource="{resource}"', self.finished_at) for resource in resources]
+            add_metric("last_run_timestamp_seconds", "gauge", "End of the last run of the resource", finished_samples)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Union[str, Path]) -> Path:
+        """Write the metrics to a Prometheus text file, replaced at once so the collector never reads half of it"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f".{path.name}.{os.getpid()}")
+        temporary_path.write_text(self.to_prometheus())
+        temporary_path.replace(path)
+        return path
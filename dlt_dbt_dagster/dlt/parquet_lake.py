@@ -0,0 +1,224 @@
+"""Hive partitioned Parquet lake of the bronze tables
+
+`parquet_lake` is a dlt destination writing the bronze tables as Parquet files under a directory, read by the dbt
+sources as external tables when the `bronze_lake_dir` dbt var (or the `SPACEX_BRONZE_LAKE_DIR` environment variable) is
+set to it:
+    bronze_launches/year=2021/month=3/<load id>.<file id>.parquet   one file per month of launches
+    bronze_rockets/<load id>.<file id>.parquet                      one compacted file per reference table
+so a query of some months of launches only scans their files. Each load file replaces the rows of earlier loads whose
+merge keys, or else primary keys, it holds in the files it touches, like the delete-insert merge of the DuckDB dataset,
+and all of them without keys. The scd2 tables keep their history like in the warehouse instead: a changed row ends the
+validity of the current row of its id in `_dlt_valid_to`, an unchanged one keeps it, and the current rows of the ids
+missing from a load are retired after it by `retire_absent_ids`.
+"""
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Union
+
+import dlt
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from dlt.common.schema.typing import TTableSchema
+from dlt.common.schema.utils import get_columns_names_with_prop, get_first_column_name_with_prop
+from dlt.common.storages.load_package import ParsedLoadJobFileName
+from dlt.common.typing import TDataItems
+
+from dlt_dbt_dagster.utils.processing_utils import hash_row
+
+# The lake is written by setting this environment variable to its directory
+LAKE_DIR_ENV = "SPACEX_BRONZE_LAKE_DIR"
+PARTITION_COLUMNS = ("year", "month")
+LOAD_ID_COLUMN = "_dlt_load_id"
+DLT_ID_COLUMN = "_dlt_id"
+VALID_FROM_COLUMN = "_dlt_valid_from"
+VALID_TO_COLUMN = "_dlt_valid_to"
+# Column of the scd2 versions compared by a load, dropped before the rows are written
+ROW_VERSION_COLUMN = "_lake_row_version"
+
+
+def get_lake_dir(lake_dir: Optional[Union[str, Path]] = None) -> Optional[Path]:
+    """Get the lake directory given, or the one set in the environment, `None` when loading to the warehouse"""
+    lake_dir = lake_dir if lake_dir is not None else os.environ.get(LAKE_DIR_ENV)
+    return Path(lake_dir) if lake_dir else None
+
+
+def get_key_columns(table: TTableSchema) -> Optional[list[str]]:
+    """Get the columns whose values a load replaces, no columns replaces every row and `None` appends"""
+    if table.get("write_disposition") == "append":
+        return None
+    if table.get("write_disposition") == "replace":
+        return []
+    return get_columns_names_with_prop(table, "merge_key") or get_columns_names_with_prop(table, "primary_key")
+
+
+def read_rows(files: list[Path]) -> Optional[pa.Table]:  # type: ignore[no-any-unimported]
+    """Read the rows of the Parquet files, `None` without files"""
+    if not files:
+        return None
+    return pa.concat_tables([pq.read_table(file) for file in files], promote_options="permissive")
+
+
+def get_loaded_at(load_id: str) -> datetime:
+    """Get the time of a load from its id"""
+    return datetime.fromtimestamp(float(load_id), tz=timezone.utc)
+
+
+def set_valid_to(rows: pa.Table, retired: pa.Array, retired_at: datetime) -> pa.Table:  # type: ignore[no-any-unimported]
+    """End the scd2 validity of the rows selected by the `retired` mask at `retired_at`"""
+    valid_to = rows[VALID_TO_COLUMN]
+    ended = pa.scalar(retired_at, type=valid_to.type)
+    return rows.set_column(
+        rows.column_names.index(VALID_TO_COLUMN), VALID_TO_COLUMN, pc.if_else(retired, ended, valid_to)
+    )
+
+
+def get_row_versions(  # type: ignore[no-any-unimported]
+    rows: pa.Table, columns: list[str], version_column: Optional[str]
+) -> pa.Table:
+    """Add the scd2 versions of the rows, from `version_column` or else hashed from the data `columns` of the load"""
+    if version_column is not None:
+        versions = rows[version_column]
+    else:
+        data_columns = [column for column in columns if not column.startswith("_dlt_")]
+        versions = pa.array([hash_row(record, data_columns) for record in rows.to_pylist()], type=pa.string())
+    return rows.append_column(ROW_VERSION_COLUMN, versions)
+
+
+def compact(  # type: ignore[no-any-unimported]
+    existing: Optional[pa.Table],
+    rows: pa.Table,
+    load_id: str,
+    key_columns: Optional[list[str]],
+    scd2: bool = False,
+    version_column: Optional[str] = None,
+) -> pa.Table:
+    """Merge the rows of a load file into the existing rows of its table or partition
+
+    The existing rows of the same load are kept, the ones of earlier loads unless a row of the load file has the same
+    key columns. The rows of `scd2` tables are versions instead: the current rows of earlier loads with the same key
+    columns are retired at the load unless their version is the one loaded, in which case the loaded row is dropped,
+    and the retired rows are kept.
+    """
+    if existing is None or existing.num_rows == 0:
+        return rows
+    if scd2 and key_columns and VALID_TO_COLUMN in existing.column_names:
+        is_current = pc.and_(pc.is_null(existing[VALID_TO_COLUMN]), pc.not_equal(existing[LOAD_ID_COLUMN], load_id))
+        current = existing.filter(is_current)
+        version_keys = [*key_columns, ROW_VERSION_COLUMN]
+        current_versions = get_row_versions(current, rows.column_names, version_column).select(version_keys)
+        rows = (
+            get_row_versions(rows, rows.column_names, version_column)
+            .join(current_versions, version_keys, join_type="left anti")
+            .drop_columns([ROW_VERSION_COLUMN])
+        )
+        keys = rows.select(key_columns).group_by(key_columns).aggregate([])
+        replaced = current.join(keys, key_columns, join_type="left semi")
+        replaced = set_valid_to(replaced, pa.array([True] * replaced.num_rows), get_loaded_at(load_id))
+        kept = current.join(keys, key_columns, join_type="left anti")
+        return pa.concat_tables(
+            [existing.filter(pc.invert(is_current)), kept, replaced, rows], promote_options="permissive"
+        )
+    if key_columns is not None:
+        same_load = pc.equal(existing[LOAD_ID_COLUMN], load_id)
+        earlier = existing.filter(pc.invert(same_load))
+        if key_columns:
+            keys = rows.select(key_columns).group_by(key_columns).aggregate([])
+            earlier = earlier.join(keys, key_columns, join_type="left anti")
+        else:
+            earlier = earlier.slice(0, 0)
+        existing = pa.concat_tables([earlier, existing.filter(same_load)], promote_options="permissive")
+    return pa.concat_tables([existing, rows], promote_options="permissive")
+
+
+def replace_files(directory: Path, rows: pa.Table, file_name: str) -> Path:  # type: ignore[no-any-unimported]
+    """Write the rows to a single Parquet file of the directory in place of its other files"""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / file_name
+    pq.write_table(rows, path)
+    for file in directory.glob("*.parquet"):
+        if file != path:
+            file.unlink()
+    return path
+
+
+def set_valid_from(rows: pa.Table, load_id: str) -> pa.Table:  # type: ignore[no-any-unimported]
+    """Start the scd2 validity of the rows at their load, the scd2 merge of a warehouse would set it"""
+    if VALID_FROM_COLUMN not in rows.column_names:
+        return rows
+    valid_from = rows[VALID_FROM_COLUMN]
+    loaded_at = pa.scalar(get_loaded_at(load_id), type=valid_from.type)
+    return rows.set_column(
+        rows.column_names.index(VALID_FROM_COLUMN), VALID_FROM_COLUMN, pc.fill_null(valid_from, loaded_at)
+    )
+
+
+def write_load_file(lake_dir: Path, file_path: str, table: TTableSchema, load_id: str) -> list[Path]:
+    """Compact a Parquet load file of the table into the files of its partitions, or of the table, and return them"""
+    rows = set_valid_from(pq.read_table(file_path), load_id)
+    key_columns = get_key_columns(table)
+    scd2 = VALID_TO_COLUMN in table["columns"]
+    # The `_dlt_id` hinted by default is the row hash of the scd2 merge of a warehouse only, the lake hashes the rows
+    version_column = get_first_column_name_with_prop(table, "x-row-version")
+    if version_column == DLT_ID_COLUMN:
+        version_column = None
+    file_name = f"{load_id}.{ParsedLoadJobFileName.parse(file_path).file_id}.parquet"
+    table_dir = lake_dir / str(table["name"])
+    if not set(PARTITION_COLUMNS) <= set(rows.column_names):
+        return [
+            replace_files(
+                table_dir,
+                compact(
+                    read_rows(sorted(table_dir.glob("*.parquet"))), rows, load_id, key_columns, scd2, version_column
+                ),
+                file_name,
+            )
+        ]
+
+    # The partition columns are in the paths of the files, the keys left pick the rows replaced in each partition
+    partition_key_columns = (
+        [column for column in key_columns if column not in PARTITION_COLUMNS] if key_columns is not None else None
+    )
+    written = []
+    for partition in rows.select(PARTITION_COLUMNS).group_by(PARTITION_COLUMNS).aggregate([]).to_pylist():
+        partition_dir = table_dir.joinpath(*(f"{column}={partition[column]}" for column in PARTITION_COLUMNS))
+        in_partition = pc.and_(*(pc.equal(rows[column], partition[column]) for column in PARTITION_COLUMNS))
+        partition_rows = rows.filter(in_partition).drop_columns(list(PARTITION_COLUMNS))
+        existing = read_rows(sorted(partition_dir.glob("*.parquet")))
+        written.append(
+            replace_files(partition_dir, compact(existing, partition_rows, load_id, partition_key_columns), file_name)
+        )
+    return written
+
+
+def retire_absent_ids(lake_dir: Path, extracted_ids: dict[str, list[str]], retired_at: datetime) -> None:
+    """Retire the current rows of the ids not extracted by the last load, the ones removed from the API, in the
+    compacted files of their scd2 tables"""
+    for table_name, ids in extracted_ids.items():
+        table_dir = lake_dir / table_name
+        files = sorted(table_dir.glob("*.parquet"))
+        rows = read_rows(files)
+        if rows is None or VALID_TO_COLUMN not in rows.column_names:
+            continue
+        extracted = pc.is_in(rows["id"], value_set=pa.array(ids, type=rows["id"].type))
+        absent = pc.and_(pc.is_null(rows[VALID_TO_COLUMN]), pc.invert(extracted))
+        if pc.any(absent).as_py():
+            replace_files(table_dir, set_valid_to(rows, absent, retired_at), files[-1].name)
+
+
+@dlt.destination(
+    name="parquet_lake",
+    batch_size=0,
+    loader_file_format="parquet",
+    naming_convention="snake_case",
+    skip_dlt_columns_and_tables=False,
+    # The load files of a table are compacted one after the other into the same files
+    loader_parallelism_strategy="table-sequential",
+)
+def parquet_lake(items: TDataItems, table: TTableSchema, lake_dir: str = dlt.config.value) -> None:
+    """Write a load file of a bronze table to the lake, the dlt tables are left out"""
+    if str(table["name"]).startswith("_dlt"):
+        return
+    write_load_file(Path(lake_dir), str(items), table, dlt.current.load_package_state()["load_id"])
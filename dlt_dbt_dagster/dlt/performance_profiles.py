@@ -0,0 +1,101 @@
+"""Named performance profiles of the extract, normalize and load stages of the SpaceX pipeline
+
+A profile sets the loader file format, the compression, buffer and rotation sizes of the files written by the extract
+and normalize stages, and the workers of the normalize (processes) and load (threads) stages. Each destination has a
+profile of its own: Parquet files normalized in process and loaded by a few threads into the local DuckDB, larger
+Parquet files normalized by several processes and loaded by more threads into Snowflake, which ingests files of about
+100 MB best. The extracted files are rotated so the normalize processes share the rows of a large backfill. The `default` profile keeps the settings of dlt, for comparison.
+Environment variables, like `NORMALIZE__WORKERS`, take precedence over the profile.
+"""
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, NamedTuple, Optional
+
+from dlt.common.destination import TLoaderFileFormat
+
+from dlt_dbt_dagster.dlt.config_scope import config_scope, get_config_variable
+
+DEFAULT_PROFILE = "default"
+# Profile of each destination when none is selected, the Parquet lake is written locally like DuckDB
+DESTINATION_PROFILES = {"duckdb": "duckdb", "parquet_lake": "duckdb", "snowflake": "snowflake"}
+WRITER_STAGES = ("extract", "normalize")
+
+
+class PerformanceProfile(NamedTuple):
+    """Loader file format, file sizes and workers of a run, `None` keeps the setting of dlt"""
+
+    # Like in `dlt.Pipeline.run`, `None` picks the file format preferred by the destination
+    loader_file_format: TLoaderFileFormat = None  # type: ignore[assignment]
+    compression: Optional[str] = None
+    buffer_max_items: Optional[int] = None
+    file_max_items: Optional[int] = None
+    file_max_bytes: Optional[int] = None
+    normalize_workers: Optional[int] = None
+    load_workers: Optional[int] = None
+
+
+PERFORMANCE_PROFILES = {
+    DEFAULT_PROFILE: PerformanceProfile(),
+    "duckdb": PerformanceProfile(
+        loader_file_format="parquet",
+        compression="zstd",
+        buffer_max_items=20_000,
+        file_max_items=200_000,
+        file_max_bytes=64 * 1024**2,
+        # The local volumes are normalized in seconds, in less time than starting worker processes takes
+        normalize_workers=1,
+        # DuckDB writes one table at a time, more threads only wait on it
+        load_workers=4,
+    ),
+    "snowflake": PerformanceProfile(
+        loader_file_format="parquet",
+        # Snowflake reads the Parquet files compressed with snappy
+        compression="snappy",
+        buffer_max_items=50_000,
+        file_max_items=500_000,
+        file_max_bytes=100 * 1024**2,
+        normalize_workers=4,
+        load_workers=16,
+    ),
+}
+
+
+def get_performance_profile(destination_name: str, profile_name: Optional[str] = None) -> PerformanceProfile:
+    """Get the profile selected by name, or else the profile of the destination"""
+    profile_name = profile_name or DESTINATION_PROFILES.get(destination_name, DEFAULT_PROFILE)
+    if profile_name not in PERFORMANCE_PROFILES:
+        raise ValueError(  # noqa: TRY003
+            f"Unknown performance profile {profile_name}, expected one of {', '.join(PERFORMANCE_PROFILES)}"
+        )
+    return PERFORMANCE_PROFILES[profile_name]
+
+
+def get_profile_config(profile: PerformanceProfile) -> dict[str, Any]:
+    """Get the dlt config values of the file sizes and workers set by the profile, by dotted key"""
+    config: dict[str, Any] = {}
+    for stage in WRITER_STAGES:
+        for key in ("buffer_max_items", "file_max_items", "file_max_bytes"):
+            if getattr(profile, key) is not None:
+                config[f"{stage}.data_writer.{key}"] = getattr(profile, key)
+    if profile.compression is not None:
+        config["normalize.data_writer.compression"] = profile.compression
+    if profile.normalize_workers is not None:
+        config["normalize.workers"] = profile.normalize_workers
+    if profile.load_workers is not None:
+        config["load.workers"] = profile.load_workers
+    return config
+
+
+@contextmanager
+def performance_profile_config(profile: PerformanceProfile) -> Iterator[None]:
+    """Set the file sizes and workers of the profile for the run in the block, the loader file format is given to it
+
+    The previous config is restored on exit, and the values already set in the environment are kept.
+    """
+    config = {
+        key: value for key, value in get_profile_config(profile).items() if get_config_variable(key) not in os.environ
+    }
+    with config_scope(config):
+        yield
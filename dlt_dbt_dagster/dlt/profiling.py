@@ -0,0 +1,205 @@
+"""Profiling mode of the SpaceX pipeline
+
+`RunProfile` profiles a pipeline run with a sampling profiler, that reads the stacks of every thread at a fixed
+interval (the threads waiting on the API included), and with tracemalloc, and times the extract, normalize and load
+stages from the dlt trace. Each run writes to its own directory:
+    cpu.folded       the sampled stacks in the folded format of flamegraph.pl, speedscope and inferno
+    summary.txt      the stage timers, the top CPU hotspots and the top allocation sites
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from types import FrameType, TracebackType
+from typing import Optional, Union
+
+from dlt.pipeline.trace import PipelineTrace
+
+# Profiling is enabled by setting this environment variable to the directory of the profiles
+PROFILE_DIR_ENV = "SPACEX_PROFILE_DIR"
+DEFAULT_INTERVAL_SECONDS = 0.01
+DEFAULT_TOP_N = 20
+# Functions a thread sits in while it waits for work, their samples are left out of the hotspots
+IDLE_FUNCTIONS = (
+    ("_worker", "futures/thread.py"),
+    ("wait", "threading.py"),
+    ("_wait_for_tstate_lock", "threading.py"),
+    ("get", "queue.py"),
+    ("select", "selectors.py"),
+)
+
+
+def get_profile_dir(profile_dir: Optional[Union[str, Path]] = None) -> Optional[Path]:
+    """Get the profile directory given, or the one set in the environment, `None` when profiling is off"""
+    profile_dir = profile_dir if profile_dir is not None else os.environ.get(PROFILE_DIR_ENV)
+    return Path(profile_dir) if profile_dir else None
+
+
+def format_frame(frame: FrameType) -> str:
+    """Name the function of a frame by its module file and first line, so every sample of it folds together"""
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def is_idle(function: str) -> bool:
+    """Tell whether a function named by `format_frame` is one a thread waits for work in"""
+    return any(function.startswith(f"{name} (") and f"{file}:" in function for name, file in IDLE_FUNCTIONS)
+
+
+class SamplingProfiler:
+    """Samples the stacks of every other thread at a fixed interval"""
+
+    def __init__(self, interval_seconds: float = DEFAULT_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample, name="spacex-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval_seconds):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                current: Optional[FrameType] = frame
+                while current is not None:
+                    stack.append(format_frame(current))
+                    current = current.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def to_folded(self) -> str:
+        """Render the sampled stacks in the folded format, one `root;...;leaf count` line per stack"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def busy_stacks(self) -> Counter[tuple[str, ...]]:
+        """Get the sampled stacks of the threads that were not waiting for work"""
+        return Counter({
+            stack: count for stack, count in self.stacks.items() if len(stack) > 1 and not is_idle(stack[-1])
+        })
+
+    def hotspots(self, top_n: int = DEFAULT_TOP_N) -> list[tuple[str, int, int]]:
+        """Get the functions most often sampled busy, as (function, self samples, total samples)"""
+        self_samples: Counter[str] = Counter()
+        total_samples: Counter[str] = Counter()
+        for stack, count in self.busy_stacks().items():
+            self_samples[stack[-1]] += count
+            # The first frame of a stack is the thread it was sampled in
+            for function in set(stack[1:]):
+                total_samples[function] += count
+        return [(function, count, total_samples[function]) for function, count in self_samples.most_common(top_n)]
+
+
+class RunProfile:
+    """Context manager profiling the CPU, the allocations and the stages of a pipeline run into a new directory"""
+
+    def __init__(
+        self,
+        profile_dir: Union[str, Path],
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        top_n: int = DEFAULT_TOP_N,
+    ):
+        self.output_dir = Path(profile_dir) / datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        self.top_n = top_n
+        self.profiler = SamplingProfiler(interval_seconds)
+        self.stage_seconds: dict[str, float] = {}
+        self.started: Optional[float] = None
+        self.wall_seconds = 0.0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.peak_bytes = 0
+
+    def __enter__(self) -> "RunProfile":
+        tracemalloc.start()
+        self.started = time.perf_counter()
+        self.profiler.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.profiler.stop()
+        self.wall_seconds = time.perf_counter() - (self.started or 0.0)
+        # The allocations of tracemalloc itself and of the sampled stacks are left out
+        self.snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+            tracemalloc.Filter(inclusive=False, filename_pattern=__file__),
+        ])
+        _, self.peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.write()
+
+    def record_trace(self, trace: Optional[PipelineTrace]) -> None:
+        """Record the wall clock seconds of the extract, normalize and load steps of the pipeline run"""
+        if trace is None:
+            return
+        for step in trace.steps:
+            if step.finished_at is not None:
+                self.stage_seconds[step.step] = (step.finished_at - step.started_at).total_seconds()
+
+    def summary(self) -> str:
+        """Summarize the stage timers, the CPU hotspots and the allocation sites of the run"""
+        lines = ["Stages (wall clock seconds)"]
+        lines += [f"  {stage:<12}{seconds:>10.3f}" for stage, seconds in self.stage_seconds.items()]
+        lines.append(f"  {'total':<12}{self.wall_seconds:>10.3f}")
+
+        busy_samples = sum(self.profiler.busy_stacks().values())
+        samples = max(busy_samples, 1)
+        lines += ["", f"Top {self.top_n} hotspots ({busy_samples} busy thread samples, self % / total %)"]
+        lines += [
+            f"  {self_count / samples:>7.1%} {total_count / samples:>7.1%}  {function}"
+            for function, self_count, total_count in self.profiler.hotspots(self.top_n)
+        ]
+
+        lines += ["", f"Top {self.top_n} allocation sites (peak traced {self.peak_bytes / 1024**2:.1f} MiB)"]
+        if self.snapshot is not None:
+            for statistic in self.snapshot.statistics("lineno")[: self.top_n]:
+                frame = statistic.traceback[0]
+                lines.append(
+                    f"  {statistic.size / 1024**2:>9.2f} MiB {statistic.count:>9} blocks  {frame.filename}:{frame.lineno}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> Path:
+        """Write the folded stacks and the summary of the run to its directory"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        (self.output_dir / "cpu.folded").write_text(self.profiler.to_folded())
+        (self.output_dir / "summary.txt").write_text(self.summary())
+        print(f"Profile written to {self.output_dir}")
+        return self.output_dir
+
+
+@contextmanager
+def profile_run(profile_dir: Optional[Union[str, Path]] = None) -> Iterator[Optional[RunProfile]]:
+    """Profile the run into the directory given or set in the environment, nothing is profiled when neither is"""
+    output_dir = get_profile_dir(profile_dir)
+    if output_dir is None:
+        yield None
+        return
+    with RunProfile(output_dir) as profile:
+        yield profile
@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import cache
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from dlt.sources.helpers.requests import Response
+from requests import PreparedRequest
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+# Status codes of a throttled request, retried by the scheduler once the pause of the pool is over
+THROTTLED_STATUS = (429, 503)
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY_SECONDS = 1.0
+DEFAULT_MAX_DELAY_SECONDS = 60.0
+# Connections kept open per host, enough for the extract workers times the page workers
+POOL_MAXSIZE = 32
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a `Retry-After` header, in seconds or as an HTTP date, into the seconds to wait"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Thread safe token bucket refilled at `rate` tokens per second, holding up to `capacity` tokens"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"The rate of a token bucket must be positive, got {rate}")  # noqa: TRY003
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns the seconds to wait until it is refilled
+
+        The tokens go negative while requests wait for them, so the waiting requests are spaced out at the rate
+        instead of all waking up when the first token is back.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+
+class RequestScheduler:
+    """Schedules the requests of every resource of a source under a global rate and per endpoint rates
+
+    A throttled response pauses every request of the pool, for its `Retry-After` or for an exponential backoff of the
+    consecutive throttled responses, with a jitter so the paused requests do not resume all at once. The copies of the
+    source config share the scheduler.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        burst: Optional[float] = None,
+        endpoint_requests_per_second: Optional[dict[str, float]] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay_seconds: float = DEFAULT_BASE_DELAY_SECONDS,
+        max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+        jitter: float = 0.5,
+    ):
+        self.bucket = TokenBucket(requests_per_second, burst)
+        # Endpoint paths, like `launches/query`, to the token bucket capping their own rate
+        self.endpoint_buckets = {path: TokenBucket(rate) for path, rate in (endpoint_requests_per_second or {}).items()}
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.jitter = jitter
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.consecutive_throttled = 0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict) -> "RequestScheduler":
+        # dlt deep copies the rest api config per resource, every resource must wait on the same buckets
+        return self
+
+    def get_endpoint_bucket(self, url: str) -> Optional[TokenBucket]:
+        """Returns the token bucket of the endpoint of the URL, if it has a rate of its own"""
+        path = urlsplit(url).path
+        return next((bucket for endpoint, bucket in self.endpoint_buckets.items() if path.endswith(endpoint)), None)
+
+    def acquire(self, url: str) -> None:
+        """Waits until the request to the URL may be sent"""
+        endpoint_bucket = self.get_endpoint_bucket(url)
+        wait_seconds = self.bucket.reserve()
+        if endpoint_bucket is not None:
+            wait_seconds = max(wait_seconds, endpoint_bucket.reserve())
+        deadline = time.monotonic() + wait_seconds
+        # The pool may be paused by a throttled response while this request is waiting for its tokens
+        while (delay := max(deadline, self.paused_until) - time.monotonic()) > 0:
+            time.sleep(delay)
+
+    def record_response(self, response: Response) -> bool:
+        """Records the response, pausing the pool when it was throttled, and returns whether it was"""
+        if response.status_code not in THROTTLED_STATUS:
+            with self._lock:
+                self.consecutive_throttled = 0
+            return False
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        with self._lock:
+            self.throttled += 1
+            self.consecutive_throttled += 1
+            if retry_after is None:
+                retry_after = min(
+                    self.max_delay_seconds, self.base_delay_seconds * 2 ** (self.consecutive_throttled - 1)
+                )
+            delay = retry_after * (1 + random.uniform(0, self.jitter))  # noqa: S311
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return True
+
+
+class RateLimitAdapter(HTTPAdapter):
+    """HTTP adapter sending the requests through a RequestScheduler, the throttled ones are retried after the pause"""
+
+    def __init__(self, scheduler: RequestScheduler, delegate: BaseAdapter, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+        self.delegate = delegate
+
+    def __deepcopy__(self, memo: dict) -> "RateLimitAdapter":
+        return self
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:  # type: ignore[override]
+        """Sends the request once the scheduler allows it, the last throttled response is returned as is"""
+        attempt = 1
+        while True:
+            self.scheduler.acquire(str(request.url))
+            response = self.delegate.send(request, **kwargs)
+            if not self.scheduler.record_response(response) or attempt >= self.scheduler.max_attempts:
+                return response
+            response.close()
+            attempt += 1
+
+    def close(self) -> None:
+        close_delegate(self.delegate)
+        super().close()
+
+
+@cache
+def get_pooled_adapter() -> HTTPAdapter:
+    """Returns the HTTP adapter shared by every session of the process, so the connections (and their TLS handshakes)
+    are reused across the resources, the sources and the months loaded"""
+    return HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+
+
+def close_delegate(delegate: BaseAdapter) -> None:
+    """Closes the delegate of a wrapping adapter, which owns it, unless it is the pooled adapter owned by the process:
+    closing it would drop the connections of every other session"""
+    if delegate is not get_pooled_adapter():
+        delegate.close()
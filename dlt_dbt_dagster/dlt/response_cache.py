@@ -0,0 +1,235 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, NamedTuple, Optional, Union, cast
+from urllib.parse import urlsplit
+
+from dlt.sources.helpers.requests import Client, Response, Session
+from dlt.sources.helpers.rest_client import RESTClient
+from dlt.sources.helpers.rest_client.paginators import BasePaginator
+from requests import PreparedRequest
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from dlt_dbt_dagster.dlt.request_scheduler import close_delegate
+
+DEFAULT_CACHE_PATH = Path(".spacex_cache") / "responses.sqlite"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Requests with this header are revalidated with the server even while their cached response is fresh
+REVALIDATE_HEADERS = {"Cache-Control": "no-cache"}
+
+
+class CachedResponse(NamedTuple):
+    """A response stored in the cache with its validators"""
+
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    stored_at: float
+
+
+class ResponseCache:
+    """Persistent SQLite cache of API responses keyed by endpoint and JSON body, with a TTL and LRU eviction by size"""
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict) -> "ResponseCache":
+        # dlt deep copies the rest api config per resource, every copy must write to the same connection
+        return self
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute(
+                """
+                create table if not exists responses (
+                    key text primary key,
+                    status_code integer not null,
+                    headers text not null,
+                    content blob not null,
+                    etag text,
+                    last_modified text,
+                    content_hash text not null,
+                    size integer not null,
+                    stored_at real not null,
+                    accessed_at real not null
+                )
+                """
+            )
+        return self._connection
+
+    @staticmethod
+    def make_key(request: PreparedRequest) -> str:  # type: ignore[no-any-unimported]
+        """Hashes the endpoint and the canonical JSON body, so the key does not depend on the key order of the body"""
+        body = cast(bytes, request.body) or b"{}"
+        canonical_body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{request.method} {request.url} {canonical_body}".encode()).hexdigest()
+
+    def is_fresh(self, cached: CachedResponse) -> bool:
+        """Checks if the cached response is young enough to be served without asking the server"""
+        return time.time() - cached.stored_at < self.ttl_seconds
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Returns the cached response for the key and marks it as recently used"""
+        with self._lock:
+            row = self.connection.execute(
+                "select status_code, headers, content, etag, last_modified, content_hash, stored_at "
+                "from responses where key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("update responses set accessed_at = ? where key = ?", (time.time(), key))
+        status_code, headers, content, etag, last_modified, content_hash, stored_at = row
+        return CachedResponse(status_code, json.loads(headers), content, etag, last_modified, content_hash, stored_at)
+
+    def put(self, key: str, response: Response) -> None:  # type: ignore[no-any-unimported]
+        """Stores the response with its ETag/Last-Modified validators and content hash, then evicts down to size"""
+        content = response.content
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "insert or replace into responses values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.status_code,
+                    json.dumps(dict(response.headers)),
+                    content,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    hashlib.sha256(content).hexdigest(),
+                    len(content),
+                    now,
+                    now,
+                ),
+            )
+            self.evict()
+
+    def revalidated(self, key: str) -> None:
+        """Restarts the TTL of a cached response the server confirmed as not modified"""
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "update responses set stored_at = ?, accessed_at = ? where key = ?", (now, now, key)
+            )
+
+    def evict(self) -> None:
+        """Drops the least recently used responses until the cache fits in `max_bytes`"""
+        (total_size,) = self.connection.execute("select coalesce(sum(size), 0) from responses").fetchone()
+        if total_size <= self.max_bytes:
+            return
+        rows = self.connection.execute("select key, size from responses order by accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total_size -= size
+        self.connection.executemany("delete from responses where key = ?", evicted)
+
+    def make_session(self, paths: Iterable[str], session: Optional[Session] = None) -> Session:
+        """Routes the POSTs to the given endpoint paths of the session (a dlt retrying session by default) through
+        the cache, the other requests go to the adapters already mounted"""
+        if session is None:
+            session = Client(raise_for_status=False).session
+        for prefix in ("http://", "https://"):
+            session.mount(prefix, CachingAdapter(self, paths, delegate=session.adapters[prefix]))
+        return session
+
+
+class CachingAdapter(HTTPAdapter):
+    """HTTP adapter serving fresh responses from a ResponseCache and revalidating stale ones with the server"""
+
+    def __init__(self, cache: ResponseCache, paths: Iterable[str], delegate: BaseAdapter, **kwargs: Any):  # type: ignore[no-any-unimported]
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.paths = tuple(paths)
+        self.delegate = delegate
+
+    def __deepcopy__(self, memo: dict) -> "CachingAdapter":
+        return self
+
+    def is_cached(self, request: PreparedRequest) -> bool:  # type: ignore[no-any-unimported]
+        """Only POSTs to the configured endpoint paths are cached"""
+        return request.method == "POST" and urlsplit(str(request.url)).path.endswith(self.paths)
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:  # type: ignore[no-any-unimported, override]
+        """Returns the cached response while it is fresh, otherwise asks the server if it changed
+
+        A `Cache-Control: no-cache` request always asks the server, so it sees changes made within the TTL.
+        """
+        if not self.is_cached(request):
+            return self.delegate.send(request, **kwargs)
+
+        key = self.cache.make_key(request)
+        cached = self.cache.get(key)
+        revalidate = "no-cache" in request.headers.get("Cache-Control", "")
+        if cached is not None and not revalidate and self.cache.is_fresh(cached):
+            return self.build_cached_response(request, cached)
+
+        if cached is not None and cached.etag:
+            request.headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            request.headers["If-Modified-Since"] = cached.last_modified
+        response = self.delegate.send(request, **kwargs)
+
+        if cached is not None and response.status_code == 304:
+            self.cache.revalidated(key)
+            return self.build_cached_response(request, cached)
+        if response.status_code == 200:
+            self.cache.put(key, response)
+        return response
+
+    def build_cached_response(self, request: PreparedRequest, cached: CachedResponse) -> Response:  # type: ignore[no-any-unimported]
+        """Makes a requests response out of a cached one"""
+        response = Response()
+        response.status_code = cached.status_code
+        response.headers = CaseInsensitiveDict(cached.headers)
+        response._content = cached.content
+        response.encoding = "utf-8"
+        response.url = str(request.url)
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self) -> None:
+        close_delegate(self.delegate)
+        super().close()
+
+
+def fingerprint_endpoint(  # type: ignore[no-any-unimported]
+    base_url: str, session: Session, paginator: BasePaginator, path: str, body: dict[str, Any]
+) -> str:
+    """Hashes the content of every page of a `/query` endpoint, so an unchanged endpoint keeps the same fingerprint
+
+    Through a caching session the pages are revalidated with the server rather than read from the cache while fresh,
+    so the fingerprint follows the API within the TTL too. They are stored in the cache as well, and the extraction
+    that follows reads them from there instead of asking the server again.
+    """
+    client = RESTClient(base_url=base_url, headers=REVALIDATE_HEADERS, paginator=paginator, session=session)
+    fingerprint = hashlib.sha256()
+    # The paginator writes the page number into the body it is given
+    for page in client.paginate(path, method="POST", json=deepcopy(body), data_selector="docs[*]"):
+        fingerprint.update(hashlib.sha256(page.response.content).digest())
+    return fingerprint.hexdigest()
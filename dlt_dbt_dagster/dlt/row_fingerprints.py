@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Callable
+
+import dlt
+
+from dlt_dbt_dagster.utils.processing_utils import hash_row
+
+ROW_FINGERPRINTS_STATE_KEY = "row_fingerprints"
+
+
+class RowFingerprintIndex:
+    """Index from row `id` to row hash of every table it filters, kept in the dlt source state
+
+    The response hook of a table swaps the index loaded with the last run for a fresh one on the first page of its
+    endpoint, even one without rows, and so does its filter on the first row. Once the extraction is over the fresh
+    index holds the ids of every row extracted, the rows of the other ids were removed from the API. Without
+    `skip_unchanged` the filter forwards every row and only indexes them, so the index stays current for a later run
+    skipping the unchanged rows.
+    """
+
+    def __init__(self, id_column: str = "id", skip_unchanged: bool = True):
+        self.id_column = id_column
+        self.skip_unchanged = skip_unchanged
+        self.previous: dict[str, dict[str, str]] = {}
+        self.current: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def start_table(self, table_name: str) -> dict[str, str]:
+        """Returns the fresh index of the table, replacing the one of the last run in the source state"""
+        with self._lock:
+            if table_name not in self.current:
+                state = dlt.current.source_state().setdefault(ROW_FINGERPRINTS_STATE_KEY, {})
+                self.previous[table_name] = state.get(table_name, {})
+                self.current[table_name] = state[table_name] = {}
+            return self.current[table_name]
+
+    def make_response_hook(self, table_name: str) -> Callable[..., None]:
+        """Make a response hook starting the table on the pages of its endpoint, which may have no rows at all"""
+
+        def start_table_on_response(response: Any, *args: Any, **kwargs: Any) -> None:
+            self.start_table(table_name)
+
+        return start_table_on_response
+
+    def make_filter(self, table_name: str, columns: list[str]) -> Callable[[dict], bool]:
+        """Make a filter step keeping only the rows that are new or changed since the last run, or every row without
+        `skip_unchanged`"""
+
+        def is_new_or_changed(record: dict) -> bool:
+            current = self.start_table(table_name)
+            row_id = str(record[self.id_column])
+            row_hash = current[row_id] = hash_row(record, columns)
+            return not self.skip_unchanged or self.previous[table_name].get(row_id) != row_hash
+
+        return is_new_or_changed
+
+    def extracted_ids(self) -> dict[str, list[str]]:
+        """Returns the ids of the rows extracted in this run, for the tables extracted in this run"""
+        return {table_name: sorted(current) for table_name, current in self.current.items()}
@@ -1,36 +1,130 @@
-"""This script extracts SpaceX API data and loads it into a local DuckDB database. It's designed for local development and testing purposes only."""
+"""This script extracts SpaceX API data and loads it into a local DuckDB database, or a local Parquet lake. It's designed for local development and testing, except for its production mode loading the new launches of every run into a stable dataset."""
 
-from typing import Any
+import argparse
+import os
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Optional, Union, cast
 
 import dlt
+import pyarrow as pa
+from dlt.common.pipeline import LoadInfo
+from dlt.common.time import ensure_pendulum_datetime
+from dlt.extract import DltResource, DltSource
+from dlt.sources.helpers.requests import Session
 from dlt.sources.rest_api import RESTAPIConfig, rest_api_resources
 from dotenv import load_dotenv
 
 from dlt_dbt_dagster.constants.endpoints import BASE_URL, Endpoints
+from dlt_dbt_dagster.constants.pipeline import DEFAULT_MAX_LIMIT, DEFAULT_MIN_LIMIT, EXTRACT_WORKERS, MONTH, YEAR
 from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
-from dlt_dbt_dagster.dlt.custom_paginator import CustomJsonPaginator
-from dlt_dbt_dagster.utils.processing_utils import add_year_month, get_month_range, keep_specific_columns
+from dlt_dbt_dagster.dlt.config_scope import config_scope
+from dlt_dbt_dagster.dlt.custom_paginator import CustomJsonPaginator, PageSizer
+from dlt_dbt_dagster.dlt.instrumentation import PipelineMetrics
+from dlt_dbt_dagster.dlt.parquet_lake import LAKE_DIR_ENV, get_lake_dir, parquet_lake, retire_absent_ids
+from dlt_dbt_dagster.dlt.performance_profiles import (
+    PERFORMANCE_PROFILES,
+    get_performance_profile,
+    performance_profile_config,
+)
+from dlt_dbt_dagster.dlt.profiling import PROFILE_DIR_ENV, profile_run
+from dlt_dbt_dagster.dlt.request_scheduler import RequestScheduler
+from dlt_dbt_dagster.dlt.response_cache import ResponseCache, fingerprint_endpoint
+from dlt_dbt_dagster.dlt.row_fingerprints import RowFingerprintIndex
+from dlt_dbt_dagster.dlt.streaming import stream_resources
+from dlt_dbt_dagster.utils.processing_utils import (
+    add_year_month,
+    add_year_month_columns,
+    add_year_month_columns_from_date,
+    add_year_month_from_date,
+    get_month_range,
+    keep_projected_columns,
+    make_arrow_table,
+)
 
 load_dotenv()
 
-YEAR = 2021
-MONTH = 3
+# The incremental launches start from the month of the first SpaceX launch
+FIRST_LAUNCH_DATE = "2006-03-01T00:00:00Z"
+PRODUCTION_PIPELINE_NAME = "spacex"
+# Reference datasets rarely change, their responses are cached and the resource is skipped when nothing changed
+REFERENCE_ENDPOINTS = (Endpoints.ROCKETS, Endpoints.CORES, Endpoints.PAYLOADS, Endpoints.LAUNCHPADS, Endpoints.SHIPS)
+FINGERPRINTS_STATE_KEY = "reference_fingerprints"
+# Arrow tables have no `_dlt_id` hashed from their content, the scd2 merge compares this column of theirs instead
+ROW_HASH_COLUMN = "row_hash"
+# The Arrow tables skip the JSON normalizer, which adds the dlt row and load ids the dbt models rely on
+ARROW_NORMALIZER_CONFIG = {
+    "normalize.parquet_normalizer.add_dlt_id": True,
+    "normalize.parquet_normalizer.add_dlt_load_id": True,
+}
+# The scd2 merge of the reference tables only retires the rows of the ids in the load, in every mode so their schema
+# stays the same, the rows of the ids missing from a run are retired after it, see `retire_absent_rows`. The hint is
+# typed so that it also applies to the tables loaded without it, the data types of the source are frozen
+SCD2_MERGE_KEY_HINTS = {"id": {"data_type": "text", "merge_key": True}}
+EXTRACT_WORKERS_ENV = "EXTRACT__WORKERS"
 
 
-@dlt.source(
-    name="spacex_api_source",
-    max_table_nesting=0,
-    schema_contract={"tables": "evolve", "columns": "discard_value", "data_type": "freeze"},
-)
-def spacex_api_source(year: int, month: int) -> Any:
-    """Make the SpaceX API source"""
-    start_date, end_date = get_month_range(year, month)
+def format_cursor(value: Any) -> str:
+    """Format a `date_utc` cursor value for the launches query"""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def make_session(
+    paginator: CustomJsonPaginator,
+    response_cache: Optional[ResponseCache] = None,
+    exit_stack: Optional[ExitStack] = None,
+) -> Session:
+    """Make the HTTP session of the resources, serving the reference endpoints from the `response_cache` when set
+
+    The session is closed with the `exit_stack`, the worker pool of the concurrent pages included.
+    """
+    session = paginator.make_session()
+    if response_cache is not None:
+        session = response_cache.make_session([endpoint.value for endpoint in REFERENCE_ENDPOINTS], session)
+    if exit_stack is not None:
+        exit_stack.enter_context(session)
+    return session
+
+
+def make_rest_api_config(
+    start_date: str,
+    end_date: str,
+    add_partition: Callable[[dict], dict],
+    page_workers: int = 1,
+    arrow_batches: bool = False,
+    parallelized: bool = False,
+    response_cache: Optional[ResponseCache] = None,
+    base_url: str = BASE_URL,
+    metrics: Optional[PipelineMetrics] = None,
+    page_sizer: Optional[PageSizer] = None,
+    scheduler: Optional[RequestScheduler] = None,
+    incremental_launches: bool = False,
+    exit_stack: Optional[ExitStack] = None,
+) -> RESTAPIConfig:
+    """Make the REST API config for launches between the two dates, `add_partition` sets each launch's year and month
+
+    With `incremental_launches` the launches start from a `date_utc` cursor kept in the pipeline state instead, whose
+    initial value is the start date. The HTTP session of the resources is closed with the `exit_stack`, see
+    `make_session`.
+    """
+    if response_cache is not None and page_sizer is not None:
+        # The pages are cached by their limit, which an adaptive page size does not repeat from one run to the next
+        raise ValueError("Cached responses cannot be combined with an adaptive page size")  # noqa: TRY003
+    paginator = CustomJsonPaginator(
+        max_workers=page_workers, metrics=metrics, page_sizer=page_sizer, scheduler=scheduler
+    )
+    session = make_session(paginator, response_cache=response_cache, exit_stack=exit_stack)
     rest_api_config: RESTAPIConfig = {
         "client": {
-            "base_url": BASE_URL,
-            "paginator": CustomJsonPaginator(),
+            "base_url": base_url,
+            "paginator": paginator,
+            "session": session,
         },
         "resource_defaults": {
+            "parallelized": parallelized,
             "write_disposition": {"disposition": "merge", "strategy": "scd2"},
             "endpoint": {
                 "method": "POST",
@@ -50,81 +144,593 @@ def spacex_api_source(year: int, month: int) -> Any:
                     "path": Endpoints.LAUNCHES,
                     "json": {
                         "query": {"date_utc": {"$gte": start_date, "$lt": end_date}},
-                        "options": {"limit": 50},
+                        "options": {"limit": 50, "select": BronzeSchema.get_select(BronzeSchema.LAUNCHES)},
                     },
                 },
                 "processing_steps": [
-                    {"map": keep_specific_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.LAUNCHES))},  # type: ignore[typeddict-item]
-                    {"map": add_year_month(year=year, month=month)},  # type: ignore[typeddict-item]
+                    {"map": keep_projected_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.LAUNCHES))},  # type: ignore[typeddict-item]
+                    {"map": add_partition},  # type: ignore[typeddict-item]
                 ],
             },
             {
                 "name": BronzeSchema.ROCKETS,
                 "endpoint": {
                     "path": Endpoints.ROCKETS,
+                    "json": {
+                        "options": {"limit": 50, "select": BronzeSchema.get_select(BronzeSchema.ROCKETS)},
+                    },
                 },
                 "processing_steps": [
-                    {"map": keep_specific_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.ROCKETS))},  # type: ignore[typeddict-item]
+                    {"map": keep_projected_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.ROCKETS))},  # type: ignore[typeddict-item]
                 ],
             },
             {
                 "name": BronzeSchema.CORES,
                 "endpoint": {
                     "path": Endpoints.CORES,
+                    "json": {
+                        "options": {"limit": 50, "select": BronzeSchema.get_select(BronzeSchema.CORES)},
+                    },
                 },
                 "processing_steps": [
-                    {"map": keep_specific_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.CORES))},  # type: ignore[typeddict-item]
+                    {"map": keep_projected_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.CORES))},  # type: ignore[typeddict-item]
                 ],
             },
             {
                 "name": BronzeSchema.PAYLOADS,
                 "endpoint": {
                     "path": Endpoints.PAYLOADS,
+                    "json": {
+                        "options": {"limit": 50, "select": BronzeSchema.get_select(BronzeSchema.PAYLOADS)},
+                    },
                 },
                 "columns": {
                     "mass_kg": {"data_type": "double"},
                     "lifespan_years": {"data_type": "double"},
                 },
                 "processing_steps": [
-                    {"map": keep_specific_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.PAYLOADS))},  # type: ignore[typeddict-item]
+                    {"map": keep_projected_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.PAYLOADS))},  # type: ignore[typeddict-item]
                 ],
             },
             {
                 "name": BronzeSchema.LAUNCHPADS,
                 "endpoint": {
                     "path": Endpoints.LAUNCHPADS,
+                    "json": {
+                        "options": {"limit": 50, "select": BronzeSchema.get_select(BronzeSchema.LAUNCHPADS)},
+                    },
                 },
                 "processing_steps": [
-                    {"map": keep_specific_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.LAUNCHPADS))},  # type: ignore[typeddict-item]
+                    {"map": keep_projected_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.LAUNCHPADS))},  # type: ignore[typeddict-item]
                 ],
             },
             {
                 "name": BronzeSchema.SHIPS,
                 "endpoint": {
                     "path": Endpoints.SHIPS,
+                    "json": {
+                        "options": {"limit": 50, "select": BronzeSchema.get_select(BronzeSchema.SHIPS)},
+                    },
                 },
                 "processing_steps": [
-                    {"map": keep_specific_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.SHIPS))},  # type: ignore[typeddict-item]
+                    {"map": keep_projected_columns(columns_to_keep=BronzeSchema.get_columns(BronzeSchema.SHIPS))},  # type: ignore[typeddict-item]
                 ],
             },
         ],
     }
-    yield from rest_api_resources(rest_api_config)
 
+    for resource in rest_api_config["resources"][1:]:
+        resource_config = cast(dict[str, Any], resource)
+        resource_config["columns"] = SCD2_MERGE_KEY_HINTS | resource_config.get("columns", {})
+
+    if incremental_launches:
+        # The launches newer than the cursor replace the rows of their own ids rather than of their whole month
+        launches = cast(dict[str, Any], rest_api_config["resources"][0])
+        del launches["merge_key"]
+        launches["primary_key"] = "id"
+        launches["endpoint"]["json"]["query"]["date_utc"]["$gte"] = "{incremental.start_value}"
+        launches["endpoint"]["incremental"] = {"cursor_path": "date_utc", "initial_value": start_date}
+        if arrow_batches:
+            # Arrow pages type `date_utc` as a timestamp, so is the cursor, which the query gets back as an ISO date
+            launches["endpoint"]["incremental"].update(
+                initial_value=ensure_pendulum_datetime(start_date), convert=format_cursor
+            )
+
+    if metrics is not None:
+        for resource in rest_api_config["resources"]:
+            resource_config = cast(dict[str, Any], resource)
+            projection = resource_config["processing_steps"][0]
+            projection["map"] = metrics.count_records(BronzeSchema(resource_config["name"]).value, projection["map"])
+
+    if arrow_batches:
+        # Projection and partitioning run on whole pages instead, see `add_arrow_batches`
+        for resource in rest_api_config["resources"]:
+            resource.pop("processing_steps")  # type: ignore[union-attr]
+        resource_defaults = cast(dict[str, Any], rest_api_config["resource_defaults"])
+        resource_defaults["write_disposition"]["row_version_column_name"] = ROW_HASH_COLUMN
+
+    return rest_api_config
+
+
+def add_arrow_batches(  # type: ignore[no-any-unimported]
+    resources: list[DltResource], add_partition_columns: Callable[[pa.Table], pa.Table]
+) -> list[DltResource]:
+    """Convert each page of every resource into an Arrow table typed after BronzeSchema and the resource hints
+
+    The scd2 tables get the content hash of their rows in `ROW_HASH_COLUMN`, the launches their partition columns.
+    The run normalizing them needs the `ARROW_NORMALIZER_CONFIG`, see `arrow_batches_config`.
+    """
+    for resource in resources:
+        schema_type = BronzeSchema(resource.name)
+        column_hints = resource.columns if isinstance(resource.columns, dict) else {}
+        column_types = BronzeSchema.get_column_types(schema_type) | {
+            name: str(hints["data_type"]) for name, hints in column_hints.items() if "data_type" in hints
+        }
+        if schema_type == BronzeSchema.LAUNCHES:
+            resource.add_step(make_arrow_table(column_types, add_partition_columns=add_partition_columns))  # type: ignore[arg-type]
+        else:
+            resource.add_step(make_arrow_table(column_types, row_hash_column=ROW_HASH_COLUMN))  # type: ignore[arg-type]
+    return resources
+
+
+def skip_unchanged_resources(rest_api_config: RESTAPIConfig, loaded_fingerprints: dict[str, str]) -> dict[str, str]:
+    """Drop the reference resources whose pages did not change since the last load from the config
+
+    Returns the fingerprints of the reference resources left in the config, to be saved once they are extracted.
+    """
+    client = cast(dict[str, Any], rest_api_config["client"])
+    default_body = cast(dict[str, Any], rest_api_config["resource_defaults"])["endpoint"]["json"]
+    fingerprints = {}
+    resources = []
+    for resource in rest_api_config["resources"]:
+        resource_config = cast(dict[str, Any], resource)
+        endpoint = resource_config["endpoint"]
+        if endpoint["path"] not in REFERENCE_ENDPOINTS:
+            resources.append(resource)
+            continue
+        # dlt merges the endpoint json one level deep, so does the fingerprint request
+        fingerprint = fingerprint_endpoint(
+            client["base_url"],
+            client["session"],
+            client["paginator"],
+            endpoint["path"],
+            default_body | endpoint["json"],
+        )
+        name = BronzeSchema(resource_config["name"]).value
+        if loaded_fingerprints.get(name) != fingerprint:
+            resources.append(resource)
+            fingerprints[name] = fingerprint
+    rest_api_config["resources"] = resources
+    return fingerprints
+
+
+def save_fingerprint(name: str, fingerprint: str) -> Callable[[Any], Any]:
+    """Make a step saving the resource fingerprint in the source state as its items are extracted"""
+
+    def save(item: Any) -> Any:
+        dlt.current.source_state().setdefault(FINGERPRINTS_STATE_KEY, {})[name] = fingerprint
+        return item
+
+    return save
+
+
+def start_row_fingerprint_tables(rest_api_config: RESTAPIConfig, row_fingerprints: RowFingerprintIndex) -> None:
+    """Start the index of every reference table on the responses of its endpoint, see `add_row_fingerprints`
+
+    The filter of a table only starts its index on the first row, an endpoint returning none would keep the index of
+    the last run and never have its removed rows retired.
+    """
+    for resource in rest_api_config["resources"]:
+        resource_config = cast(dict[str, Any], resource)
+        schema_type = BronzeSchema(resource_config["name"])
+        if schema_type == BronzeSchema.LAUNCHES:
+            continue
+        endpoint = resource_config["endpoint"]
+        endpoint["response_actions"] = [
+            *endpoint.get("response_actions", []),
+            row_fingerprints.make_response_hook(schema_type.value),
+        ]
+
+
+def add_row_fingerprints(  # type: ignore[no-any-unimported]
+    resources: list[DltResource], row_fingerprints: RowFingerprintIndex
+) -> list[DltResource]:
+    """Index the rows of the reference resources, filtering them down to the new or changed ones when the index skips
+    the unchanged rows"""
+    for resource in resources:
+        schema_type = BronzeSchema(resource.name)
+        if schema_type == BronzeSchema.LAUNCHES:
+            continue
+        resource.add_filter(
+            row_fingerprints.make_filter(schema_type.value, columns=BronzeSchema.get_columns(schema_type))
+        )
+    return resources
+
+
+def retire_absent_rows(
+    pipeline: dlt.Pipeline, extracted_ids: dict[str, list[str]], lake_dir: Optional[Path] = None
+) -> None:
+    """Close the scd2 validity of the active rows whose ids were not extracted, the ones removed from the API
+
+    The rows are retired in the compacted files of the Parquet lake in `lake_dir`, when given, instead.
+    """
+    if not extracted_ids:
+        return
+    retired_at = datetime.now(timezone.utc)
+    if lake_dir is not None:
+        retire_absent_ids(lake_dir, extracted_ids, retired_at)
+        return
+    loaded_tables = pipeline.default_schema.data_table_names(seen_data_only=True)
+    with pipeline.sql_client() as client:
+        for table_name, ids in extracted_ids.items():
+            if table_name not in loaded_tables:
+                continue
+            absent = f" and id not in ({', '.join(['%s'] * len(ids))})" if ids else ""
+            client.execute_sql(
+                f"update {client.make_qualified_table_name(table_name)} set _dlt_valid_to = %s "  # noqa: S608
+                f"where _dlt_valid_to is null{absent}",
+                retired_at,
+                *ids,
+            )
+
+
+def make_resources(  # type: ignore[no-any-unimported]
+    rest_api_config: RESTAPIConfig,
+    add_partition_columns: Callable[[pa.Table], pa.Table],
+    arrow_batches: bool = False,
+    response_cache: Optional[ResponseCache] = None,
+    row_fingerprints: Optional[RowFingerprintIndex] = None,
+    stream_pages: bool = False,
+) -> list[DltResource]:
+    """Make the SpaceX resources out of the REST API config
+
+    With a `response_cache` the reference resources whose pages are unchanged since the last load are skipped, so no
+    extract, normalize or scd2 merge work is done for them. With `row_fingerprints` the rows of the reference resources
+    are indexed, and only the ones new or changed since the last load forwarded when the index skips unchanged rows. With `stream_pages` the documents of each page are
+    yielded one by one as the response is decoded, see `stream_resources`.
+    """
+    if arrow_batches and stream_pages:
+        raise ValueError("Arrow batches are made of whole pages, they cannot be combined with streamed pages")  # noqa: TRY003
+    fingerprints = {}
+    if response_cache is not None:
+        fingerprints = skip_unchanged_resources(
+            rest_api_config, dlt.current.source_state().get(FINGERPRINTS_STATE_KEY, {})
+        )
+    if row_fingerprints is not None:
+        start_row_fingerprint_tables(rest_api_config, row_fingerprints)
+    resources = stream_resources(rest_api_config) if stream_pages else rest_api_resources(rest_api_config)
+    if row_fingerprints is not None:
+        add_row_fingerprints(resources, row_fingerprints)
+    if arrow_batches:
+        resources = add_arrow_batches(resources, add_partition_columns=add_partition_columns)
+    for resource in resources:
+        name = BronzeSchema(resource.name).value
+        if name in fingerprints:
+            resource.add_map(save_fingerprint(name, fingerprints[name]))
+    return resources
 
-def load_spacex_bronze_data(year: int, month: int) -> None:
-    """Load monthly SpaceX API bronze data to DuckDB"""
 
-    pipeline = dlt.pipeline(
+@dlt.source(
+    name="spacex_api_source",
+    max_table_nesting=0,
+    schema_contract={"tables": "evolve", "columns": "discard_value", "data_type": "freeze"},
+)
+def spacex_api_range_source(
+    start_date: str,
+    end_date: str,
+    partition: Optional[tuple[int, int]] = None,
+    incremental_launches: bool = False,
+    page_workers: int = 1,
+    arrow_batches: bool = False,
+    parallelized: bool = False,
+    cache_responses: bool = False,
+    row_fingerprints: Optional[RowFingerprintIndex] = None,
+    base_url: str = BASE_URL,
+    metrics: Optional[PipelineMetrics] = None,
+    stream_pages: bool = False,
+    page_sizer: Optional[PageSizer] = None,
+    scheduler: Optional[RequestScheduler] = None,
+    exit_stack: Optional[ExitStack] = None,
+) -> Any:
+    """Make the SpaceX API source for the launches between the two dates, the source of every entry point below
+
+    With a `partition` year and month every launch is loaded to it, otherwise to the month of its `date_utc`. With
+    `incremental_launches` the launches start from a `date_utc` cursor instead, see `make_rest_api_config`.
+
+    The options:
+    - `page_workers` above 1 fetches the pages of each endpoint concurrently.
+    - `arrow_batches` yields each page as an Arrow table, which dlt normalizes on its Arrow fast path.
+    - `parallelized` extracts the resources concurrently on the dlt extract workers, the pages of each stay in order.
+    - `cache_responses` caches the reference endpoints on disk and skips the ones unchanged since the last load.
+    - `row_fingerprints` indexes the rows of the reference endpoints, to retire the removed ones after the load.
+    - `base_url` points the source at a stand-in of the API, it is injected from the `sources.spacex_api_source` config.
+    - `metrics` records the pages and projected records of every resource.
+    - `stream_pages` decodes each page once while it is read and yields its documents one by one.
+    - `page_sizer` adapts the page size of each endpoint to its latency, response size and failed attempts.
+    - `scheduler` rate limits the requests of every resource and pauses them all when the API throttles one.
+    - `exit_stack` closes the HTTP session of the source, with the prefetch worker pool, when it exits.
+    """
+    if partition is not None:
+        add_partition = add_year_month(*partition)
+        add_partition_columns = add_year_month_columns(*partition)
+    else:
+        add_partition = add_year_month_from_date(date_column="date_utc")
+        add_partition_columns = add_year_month_columns_from_date(date_column="date_utc")
+    response_cache = ResponseCache() if cache_responses else None
+    rest_api_config = make_rest_api_config(
+        start_date,
+        end_date,
+        add_partition=add_partition,
+        page_workers=page_workers,
+        arrow_batches=arrow_batches,
+        parallelized=parallelized,
+        response_cache=response_cache,
+        base_url=base_url,
+        metrics=metrics,
+        page_sizer=page_sizer,
+        scheduler=scheduler,
+        incremental_launches=incremental_launches,
+        exit_stack=exit_stack,
+    )
+    yield from make_resources(
+        rest_api_config,
+        add_partition_columns=add_partition_columns,
+        arrow_batches=arrow_batches,
+        response_cache=response_cache,
+        row_fingerprints=row_fingerprints,
+        stream_pages=stream_pages,
+    )
+
+
+def spacex_api_source(year: int, month: int, **options: Any) -> DltSource:
+    """Make the SpaceX API source for a month, the options are the ones of `spacex_api_range_source`"""
+    start_date, end_date = get_month_range(year, month)
+    return spacex_api_range_source(start_date, end_date, partition=(year, month), **options)
+
+
+def spacex_api_backfill_source(
+    start_year: int, start_month: int, end_year: int, end_month: int, **options: Any
+) -> DltSource:
+    """Make the SpaceX API source for all months from start to end (inclusive) with a single launches query"""
+    start_date, _ = get_month_range(start_year, start_month)
+    _, end_date = get_month_range(end_year, end_month)
+    if start_date >= end_date:
+        raise ValueError(f"Backfill start {start_year}-{start_month:02d} is after end {end_year}-{end_month:02d}")  # noqa: TRY003
+
+    # Each launch is routed to its own year/month partition, so the delete-insert merge_key replaces every month loaded
+    return spacex_api_range_source(start_date, end_date, **options)
+
+
+def spacex_api_incremental_source(initial_date: str = FIRST_LAUNCH_DATE, **options: Any) -> DltSource:
+    """Make the SpaceX API source for the launches newer than the `date_utc` cursor of the last run
+
+    The cursor starts at `initial_date` and is kept in the pipeline state. The launches are bounded by the time of the
+    run, so an upcoming launch is loaded once it happened and cannot move the cursor past launches still to be added.
+    """
+    end_date = datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds") + "Z"
+    return spacex_api_range_source(initial_date, end_date, incremental_launches=True, **options)
+
+
+def make_pipeline(production: bool = False, lake_dir: Optional[Path] = None) -> dlt.Pipeline:
+    """Make the bronze DuckDB pipeline, a fresh local dataset per run unless in production
+
+    In production the pipeline loads the same dataset every run and keeps its state, the cursors included. With a
+    `lake_dir` the bronze tables are written as hive partitioned Parquet files there instead, see `parquet_lake`.
+    """
+    destination = parquet_lake(lake_dir=str(lake_dir)) if lake_dir is not None else "duckdb"
+    if production:
+        return dlt.pipeline(
+            pipeline_name=PRODUCTION_PIPELINE_NAME,
+            destination=destination,
+            dataset_name="bronze",
+            progress="log",
+        )
+    return dlt.pipeline(
         pipeline_name="dev",
-        destination="duckdb",
+        destination=destination,
         dataset_name="bronze",
         progress="log",
         dev_mode=True,
     )
-    load_info = pipeline.run(spacex_api_source(year=year, month=month))
-    print(load_info)
+
+
+@contextmanager
+def extract_workers_limit(extract_workers: int) -> Iterator[None]:
+    """Cap the number of resources dlt extracts concurrently in the block
+
+    The cap is set in the environment, which dlt reads first, and the previous value is restored on exit, so it does
+    not carry over to the pipelines run after the block.
+    """
+    previous = os.environ.get(EXTRACT_WORKERS_ENV)
+    os.environ[EXTRACT_WORKERS_ENV] = str(extract_workers)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop(EXTRACT_WORKERS_ENV, None)
+        else:
+            os.environ[EXTRACT_WORKERS_ENV] = previous
+
+
+def arrow_batches_config(arrow_batches: bool) -> AbstractContextManager[None]:
+    """Scope the `ARROW_NORMALIZER_CONFIG` to the run in the block when it loads Arrow pages"""
+    return config_scope(ARROW_NORMALIZER_CONFIG if arrow_batches else {})
+
+
+def check_arrow_batches(pipeline: dlt.Pipeline, arrow_batches: bool) -> None:
+    """Refuse to load Arrow pages to a dataset loaded from dicts, or dicts to a dataset loaded from Arrow pages
+
+    The scd2 reference tables of the two differ: the Arrow ones version their rows by `ROW_HASH_COLUMN` and type all
+    their columns nullable, a change of data types the frozen contract of the source rejects.
+    """
+    if pipeline.first_run or pipeline.default_schema_name is None:
+        return
+    schema = pipeline.default_schema
+    for table_name in schema.data_table_names(seen_data_only=True):
+        if table_name == BronzeSchema.LAUNCHES.value:
+            continue
+        if (ROW_HASH_COLUMN in schema.get_table_columns(table_name)) != arrow_batches:
+            loaded_from = "dicts" if arrow_batches else "Arrow pages"
+            raise ValueError(  # noqa: TRY003
+                f"The {table_name} table of the {pipeline.dataset_name} dataset was loaded from {loaded_from}, "
+                f"load it with arrow_batches={not arrow_batches}"
+            )
+
+
+def run_bronze_load(
+    make_source: Callable[..., DltSource],
+    *,
+    production: bool = False,
+    page_workers: int = 1,
+    arrow_batches: bool = False,
+    parallelized: bool = False,
+    extract_workers: int = EXTRACT_WORKERS,
+    cache_responses: bool = False,
+    fingerprint_rows: bool = False,
+    stream_pages: bool = False,
+    page_sizer: Optional[PageSizer] = None,
+    scheduler: Optional[RequestScheduler] = None,
+    metrics_path: Optional[Union[str, Path]] = None,
+    profile_dir: Optional[Union[str, Path]] = None,
+    lake_dir: Optional[Union[str, Path]] = None,
+    performance_profile: Optional[str] = None,
+) -> LoadInfo:
+    """Load the source made by `make_source` from the source options, the run shared by the loaders below
+
+    `page_workers` above 1 fetches the pages of each endpoint concurrently, the session of the source is closed with
+    its worker pool once the run is over. `arrow_batches` loads the pages as Arrow tables, a dataset is loaded either
+    from Arrow pages or from dicts, see `check_arrow_batches`. `parallelized` extracts up to `extract_workers`
+    resources at once. With `metrics_path` the page, record and stage metrics of every resource are written there as a
+    Prometheus text file. With `profile_dir`, or the `SPACEX_PROFILE_DIR` environment variable, the run is profiled
+    into a new directory in it. With `lake_dir`, or the `SPACEX_BRONZE_LAKE_DIR` environment variable, the data is
+    loaded to a Parquet lake in it. The loader files and the workers follow the named `performance_profile`, by
+    default the profile of the destination.
+
+    `cache_responses` skips the reference endpoints unchanged since the last load of the pipeline and
+    `fingerprint_rows` their rows unchanged since then, both compare with the fingerprints in its state, so they need
+    the `production` pipeline: the other one starts from an empty state every run. Either way the rows of the ids
+    missing from the reference endpoints extracted are retired after the load.
+    """
+    if (cache_responses or fingerprint_rows) and not production:
+        raise ValueError("Skipping unchanged reference endpoints or rows needs the production pipeline state")  # noqa: TRY003
+    with extract_workers_limit(extract_workers), ExitStack() as sessions:
+        lake_path = get_lake_dir(lake_dir)
+        pipeline = make_pipeline(production=production, lake_dir=lake_path)
+        check_arrow_batches(pipeline, arrow_batches)
+        run_profile = get_performance_profile(pipeline.destination.destination_name, performance_profile)
+        row_fingerprints = RowFingerprintIndex(skip_unchanged=fingerprint_rows)
+        metrics = PipelineMetrics() if metrics_path is not None else None
+        source = make_source(
+            page_workers=page_workers,
+            arrow_batches=arrow_batches,
+            parallelized=parallelized,
+            cache_responses=cache_responses,
+            row_fingerprints=row_fingerprints,
+            metrics=metrics,
+            stream_pages=stream_pages,
+            page_sizer=page_sizer,
+            scheduler=scheduler,
+            exit_stack=sessions,
+        )
+        with (
+            profile_run(profile_dir) as profile,
+            performance_profile_config(run_profile),
+            arrow_batches_config(arrow_batches),
+        ):
+            load_info = pipeline.run(source, loader_file_format=run_profile.loader_file_format)
+            retire_absent_rows(pipeline, row_fingerprints.extracted_ids(), lake_dir=lake_path)
+            if metrics is not None and metrics_path is not None:
+                metrics.record_trace(pipeline.last_trace)
+                metrics.write_prometheus(metrics_path)
+            if profile is not None:
+                profile.record_trace(pipeline.last_trace)
+    return load_info
+
+
+def load_spacex_bronze_data(year: int, month: int, **options: Any) -> LoadInfo:
+    """Load monthly SpaceX API bronze data to DuckDB, the options are the ones of `run_bronze_load`"""
+    return run_bronze_load(partial(spacex_api_source, year=year, month=month), **options)
+
+
+def load_spacex_bronze_backfill(
+    start_year: int, start_month: int, end_year: int, end_month: int, **options: Any
+) -> LoadInfo:
+    """Load SpaceX API bronze data for a range of months to DuckDB in a single pipeline run"""
+    return run_bronze_load(
+        partial(
+            spacex_api_backfill_source,
+            start_year=start_year,
+            start_month=start_month,
+            end_year=end_year,
+            end_month=end_month,
+        ),
+        **options,
+    )
+
+
+def load_spacex_bronze_incremental(initial_date: str = FIRST_LAUNCH_DATE, **options: Any) -> LoadInfo:
+    """Load the SpaceX API bronze data to the production DuckDB dataset, with only the launches new since the last run"""
+    return run_bronze_load(
+        partial(spacex_api_incremental_source, initial_date=initial_date), production=True, **options
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load SpaceX API bronze data to DuckDB")
+    parser.add_argument("--year", type=int, default=YEAR)
+    parser.add_argument("--month", type=int, default=MONTH)
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="load the launches new since the last run to the production dataset, instead of a month to a fresh one",
+    )
+    parser.add_argument("--page-workers", type=int, default=1, help="fetch the pages of each endpoint concurrently")
+    parser.add_argument("--arrow-batches", action="store_true", help="load the pages as Arrow tables")
+    parser.add_argument("--parallelized", action="store_true", help="extract the resources concurrently")
+    parser.add_argument("--stream-pages", action="store_true", help="decode the pages while they are read")
+    parser.add_argument(
+        "--adaptive-page-size", action="store_true", help="adapt the page size to the latency and size of the pages"
+    )
+    parser.add_argument("--min-page-size", type=int, default=DEFAULT_MIN_LIMIT)
+    parser.add_argument("--max-page-size", type=int, default=DEFAULT_MAX_LIMIT)
+    parser.add_argument(
+        "--requests-per-second", type=float, help="rate limit the requests and back off together when throttled"
+    )
+    parser.add_argument("--metrics-path", type=Path, help="write the pipeline metrics to this Prometheus text file")
+    parser.add_argument(
+        "--profile", type=Path, metavar="DIR", help=f"profile the run into DIR, also enabled by {PROFILE_DIR_ENV}=DIR"
+    )
+    parser.add_argument(
+        "--lake-dir",
+        type=Path,
+        metavar="DIR",
+        help=f"write hive partitioned Parquet files to DIR instead of DuckDB, also enabled by {LAKE_DIR_ENV}=DIR",
+    )
+    parser.add_argument(
+        "--performance-profile",
+        choices=list(PERFORMANCE_PROFILES),
+        help="loader files and workers of the run, by default the profile of the destination",
+    )
+    args = parser.parse_args()
+    options: dict[str, Any] = {
+        "page_workers": args.page_workers,
+        "arrow_batches": args.arrow_batches,
+        "parallelized": args.parallelized,
+        "stream_pages": args.stream_pages,
+        "page_sizer": (
+            PageSizer(min_limit=args.min_page_size, max_limit=args.max_page_size) if args.adaptive_page_size else None
+        ),
+        "scheduler": RequestScheduler(args.requests_per_second) if args.requests_per_second else None,
+        "metrics_path": args.metrics_path,
+        "profile_dir": args.profile,
+        "lake_dir": args.lake_dir,
+        "performance_profile": args.performance_profile,
+    }
+    if args.production:
+        print(load_spacex_bronze_incremental(**options))
+    else:
+        print(load_spacex_bronze_data(year=args.year, month=args.month, **options))
 
 
 if __name__ == "__main__":
-    load_spacex_bronze_data(year=YEAR, month=MONTH)
+    main()
@@ -0,0 +1,202 @@
+"""Streaming decode of the `docs[*]` pages of the SpaceX API
+
+The dlt REST client decodes each page into Python objects at once and the paginator decodes it again to read
+`hasNextPage`. `PageDecoder` decodes the body of a page once, chunk by chunk as it is read from the socket, yields
+every document of `docs` as soon as it is parsed and keeps the pagination fields around it, so the decoded objects in
+memory are bounded by the size of a document rather than of a page. `stream_resources` makes the resources of a REST
+API config page through their endpoints with it.
+"""
+
+import codecs
+import json
+import time
+from collections.abc import Iterable, Iterator
+from copy import deepcopy
+from typing import Any, Callable, Optional, cast
+
+import dlt
+from dlt.extract import DltResource
+from dlt.extract.incremental import Incremental
+from dlt.sources.helpers.requests import Client, Request, Session
+from dlt.sources.helpers.rest_client.utils import join_url
+from dlt.sources.rest_api import RESTAPIConfig
+from dlt.sources.rest_api.config_setup import (
+    convert_incremental_values,
+    expand_and_index_resources,
+    expand_placeholders,
+    setup_incremental_object,
+)
+
+from dlt_dbt_dagster.dlt.custom_paginator import CustomJsonPaginator
+
+DOCS_KEY = "docs"
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+
+class PageDecoder:
+    """Incremental decoder of a JSON object, yielding the items of its `docs_key` array one by one"""
+
+    def __init__(self, docs_key: str = DOCS_KEY):
+        self.docs_key = docs_key
+        self.page_info: dict[str, Any] = {}
+        self.bytes_read = 0
+        self.decode_seconds = 0.0
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._chunks: Iterator[bytes] = iter(())
+        self._buffer = ""
+        self._position = 0
+
+    def iter_docs(self, chunks: Iterable[bytes]) -> Iterator[Any]:
+        """Yield the documents of the page body read in chunks, `page_info` holds the other fields once exhausted"""
+        self._chunks = iter(chunks)
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            if self._peek() != '"':
+                raise ValueError(f"Expected an object key at character {self._position}")  # noqa: TRY003
+            key = self._value()
+            self._expect(":")
+            if key == self.docs_key and self._peek() == "[":
+                self._expect("[")
+                if self._peek() == "]":
+                    self._position += 1
+                else:
+                    yield self._value()
+                    while self._expect(",", "]") == ",":
+                        yield self._value()
+            else:
+                self.page_info[key] = self._value()
+            if self._expect(",", "}") == "}":
+                return
+
+    def _read(self) -> bool:
+        """Append the next chunk to the unparsed rest of the buffer, `False` once the body is exhausted"""
+        for chunk in self._chunks:
+            self.bytes_read += len(chunk)
+            text = self._text_decoder.decode(chunk)
+            if text:
+                self._buffer = self._buffer[self._position :] + text
+                self._position = 0
+                return True
+        self._text_decoder.decode(b"", final=True)
+        return False
+
+    def _peek(self) -> str:
+        """Skip the whitespace and return the next character without consuming it"""
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read():
+                raise ValueError("Unexpected end of the page body")  # noqa: TRY003
+
+    def _expect(self, *characters: str) -> str:
+        """Consume the next character, one of the expected ones"""
+        character = self._peek()
+        if character not in characters:
+            raise ValueError(f"Expected {' or '.join(characters)} at character {self._position}, got {character}")  # noqa: TRY003
+        self._position += 1
+        return character
+
+    def _value(self) -> Any:
+        """Decode the next JSON value, reading chunks until it is complete"""
+        self._peek()
+        while True:
+            started = time.perf_counter()
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                self.decode_seconds += time.perf_counter() - started
+                if not self._read():
+                    raise
+                continue
+            self.decode_seconds += time.perf_counter() - started
+            # A number ending the buffer may go on in the next chunk
+            if end == len(self._buffer) and self._read():
+                continue
+            self._position = end
+            return value
+
+
+def page_docs(
+    session: Session,
+    url: str,
+    method: str,
+    json_body: Optional[dict[str, Any]],
+    paginator: CustomJsonPaginator,
+    docs_key: str = DOCS_KEY,
+    incremental_object: Optional[Incremental[Any]] = None,
+    incremental_cursor_transform: Optional[Callable[..., Any]] = None,
+    response_hooks: Optional[list[Callable[..., Any]]] = None,
+) -> Iterator[Any]:
+    """Yield the documents of every page of the endpoint as they are decoded from the streamed responses
+
+    With an `incremental_object` its `{incremental.start_value}` placeholders of the JSON body are filled in, like in
+    the dlt REST API source. The `response_hooks` are called with every response before its body is read.
+    """
+    if incremental_object is not None:
+        placeholders: dict[str, Any] = {"incremental": incremental_object}
+        if incremental_cursor_transform is not None:
+            placeholders.update(convert_incremental_values(incremental_object, incremental_cursor_transform))
+        json_body = expand_placeholders(json_body, placeholders, preserve_value_type=True)
+    request = Request(method=method, url=url, json=deepcopy(json_body), hooks={"response": response_hooks or []})
+    paginator.init_request(request)
+    while True:
+        response = session.send(session.prepare_request(request), stream=True)
+        with response:
+            response.raise_for_status()
+            decoder = PageDecoder(docs_key)
+            yield from decoder.iter_docs(response.iter_content(CHUNK_SIZE))
+        paginator.record_page(response, decode_seconds=decoder.decode_seconds, response_bytes=decoder.bytes_read)
+        paginator.update_page_state(decoder.page_info, response.request)
+        paginator.update_request(request)
+        if not paginator.has_next_page:
+            return
+
+
+def stream_resources(rest_api_config: RESTAPIConfig) -> list[DltResource]:
+    """Make the resources of the REST API config, paging through the endpoints with streamed responses
+
+    Every resource pages with its own copy of the paginator, the session is shared like in the dlt REST API source.
+    """
+    client = cast(dict[str, Any], rest_api_config["client"])
+    session = client.get("session") or Client(raise_for_status=False).session
+    endpoint_resources = expand_and_index_resources(
+        rest_api_config["resources"],
+        rest_api_config.get("resource_defaults") or {},
+    )
+    resources = []
+    for endpoint_resource in endpoint_resources.values():
+        resource_config = cast(dict[str, Any], endpoint_resource)
+        endpoint = resource_config.pop("endpoint")
+        processing_steps = resource_config.pop("processing_steps", [])
+        incremental_object, _, incremental_cursor_transform = setup_incremental_object(
+            endpoint.get("params", {}), endpoint.get("incremental")
+        )
+        # The response actions matching on the status or the content would read the body before it is streamed
+        response_hooks = endpoint.get("response_actions") or []
+        if not all(callable(action) for action in response_hooks):
+            raise ValueError("Streamed pages only support response actions that are callables")  # noqa: TRY003
+        resource = dlt.resource(page_docs, **resource_config)(
+            session=session,
+            url=join_url(client["base_url"], endpoint["path"]),
+            method=endpoint.get("method", "GET"),
+            json_body=endpoint.get("json"),
+            paginator=deepcopy(client["paginator"]),
+            docs_key=endpoint.get("data_selector", f"{DOCS_KEY}[*]").split("[", 1)[0],
+            incremental_object=incremental_object,
+            incremental_cursor_transform=incremental_cursor_transform,
+            response_hooks=response_hooks,
+        )
+        # Same order of the steps as in the dlt REST API source
+        for step in processing_steps:
+            if "filter" in step:
+                resource.add_filter(step["filter"])
+            if "map" in step:
+                resource.add_map(step["map"])
+        resources.append(resource)
+    return resources
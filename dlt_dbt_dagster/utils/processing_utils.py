@@ -1,7 +1,21 @@
 """This script holds all utility functions used to process extracted SpaceX API data"""
 
+import hashlib
+import json
 from datetime import datetime
-from typing import Callable, Optional
+from typing import Any, Callable, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Arrow types for the dlt data types used in BronzeSchema, json columns keep the type inferred from the data
+ARROW_TYPES = {
+    "text": pa.string(),
+    "bigint": pa.int64(),
+    "double": pa.float64(),
+    "bool": pa.bool_(),
+    "timestamp": pa.timestamp("us", tz="UTC"),
+}
 
 
 def keep_specific_columns(columns_to_keep: Optional[list[str]] = None) -> Callable[[dict], dict]:
@@ -18,6 +32,19 @@ def keep_specific_columns(columns_to_keep: Optional[list[str]] = None) -> Callab
     return inner_func
 
 
+def keep_projected_columns(columns_to_keep: Optional[list[str]] = None) -> Callable[[dict], dict]:
+    """Keep only the specified columns, passing through records already projected by the API unchanged"""
+    allowed_columns = frozenset(columns_to_keep if columns_to_keep is not None else [])
+    keep_columns = keep_specific_columns(columns_to_keep)
+
+    def inner_func(record: dict) -> dict:
+        if allowed_columns.issuperset(record):
+            return record
+        return keep_columns(record)
+
+    return inner_func
+
+
 def get_month_range(year: int, month: int) -> tuple[str, str]:
     """Get the start and end dates for a given month"""
     start = datetime(year, month, 1)
@@ -34,3 +61,83 @@ def add_year_month(year: int, month: int) -> Callable[[dict], dict]:
         return record
 
     return inner_func
+
+
+def add_year_month_from_date(date_column: str = "date_utc") -> Callable[[dict], dict]:
+    """Add the year and month of the record's own ISO date column to the record"""
+
+    def inner_func(record: dict) -> dict:
+        record_date = datetime.fromisoformat(record[date_column].replace("Z", "+00:00"))
+        record["year"] = record_date.year
+        record["month"] = record_date.month
+        return record
+
+    return inner_func
+
+
+def hash_row(record: dict[str, Any], columns: list[str]) -> str:
+    """Hashes the kept columns of a record into a compact 64 bit hex digest"""
+    kept = {column: record[column] for column in columns if column in record}
+    return hashlib.blake2b(json.dumps(kept, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
+
+def make_arrow_table(  # type: ignore[no-any-unimported]
+    column_types: dict[str, str],
+    add_partition_columns: Optional[Callable[[pa.Table], pa.Table]] = None,
+    row_hash_column: Optional[str] = None,
+) -> Callable[[list[dict]], pa.Table]:
+    """Convert a page of documents into an Arrow table with only the specified columns and types
+
+    With a `row_hash_column` the table gets a hash of the content of each row in it, the same from one run to the next.
+    """
+    columns = list(column_types)
+
+    def inner_func(page: list[dict]) -> pa.Table:  # type: ignore[no-any-unimported]
+        arrays = {
+            column: to_arrow_array([record.get(column) for record in page], data_type)
+            for column, data_type in column_types.items()
+        }
+        if row_hash_column is not None:
+            arrays[row_hash_column] = pa.array([hash_row(record, columns) for record in page], type=pa.string())
+        table = pa.table(arrays)
+        return add_partition_columns(table) if add_partition_columns is not None else table
+
+    return inner_func
+
+
+def to_arrow_array(values: list, data_type: str) -> pa.Array:  # type: ignore[no-any-unimported]
+    """Build an Arrow array of the given dlt data type, unknown types are inferred from the values"""
+    if data_type == "timestamp":
+        # ISO 8601 strings from the API are parsed by Arrow's cast, not in Python
+        return pc.cast(pa.array(values, type=pa.string()), ARROW_TYPES[data_type])
+    if data_type not in ARROW_TYPES:
+        return pa.array(values)
+    return pa.array(values, type=ARROW_TYPES[data_type])
+
+
+def add_year_month_columns(year: int, month: int) -> Callable[[pa.Table], pa.Table]:  # type: ignore[no-any-unimported]
+    """Add the year and month columns to the table"""
+
+    def inner_func(table: pa.Table) -> pa.Table:  # type: ignore[no-any-unimported]
+        table = set_column(table, "year", pa.repeat(pa.scalar(year, pa.int64()), table.num_rows))
+        return set_column(table, "month", pa.repeat(pa.scalar(month, pa.int64()), table.num_rows))
+
+    return inner_func
+
+
+def add_year_month_columns_from_date(date_column: str = "date_utc") -> Callable[[pa.Table], pa.Table]:  # type: ignore[no-any-unimported]
+    """Add the year and month of the table's own timestamp column to the table"""
+
+    def inner_func(table: pa.Table) -> pa.Table:  # type: ignore[no-any-unimported]
+        table = set_column(table, "year", pc.year(table[date_column]))
+        return set_column(table, "month", pc.month(table[date_column]))
+
+    return inner_func
+
+
+def set_column(table: pa.Table, name: str, values: pa.Array) -> pa.Table:  # type: ignore[no-any-unimported]
+    """Replace the named column of the table or append it if missing"""
+    index = table.schema.get_field_index(name)
+    if index == -1:
+        return table.append_column(name, values)
+    return table.set_column(index, name, values)
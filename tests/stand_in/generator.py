@@ -0,0 +1,364 @@
+"""Seeded generator of synthetic SpaceX API documents, from the real API volumes up to millions of launches"""
+
+import random
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+
+# Document counts of the public v4 API at the time its data was frozen
+REALISTIC_COUNTS = {
+    Endpoints.LAUNCHES: 205,
+    Endpoints.ROCKETS: 4,
+    Endpoints.CORES: 83,
+    Endpoints.PAYLOADS: 225,
+    Endpoints.LAUNCHPADS: 6,
+    Endpoints.SHIPS: 29,
+}
+FIRST_LAUNCH = datetime(2006, 3, 24, 22, 30, tzinfo=timezone.utc)
+LAST_LAUNCH = datetime(2022, 12, 5, 21, 25, tzinfo=timezone.utc)
+ENDPOINT_CODES = {endpoint: code for code, endpoint in enumerate(Endpoints)}
+# Caps the reference lists of a document (a core's launches, a launchpad's launches...) at large scales
+MAX_REFERENCES = 50
+
+ROCKET_NAMES = ["Falcon 1", "Falcon 9", "Falcon Heavy", "Starship"]
+LAUNCHPADS = [
+    (
+        "VAFB SLC 3W",
+        "Vandenberg Space Force Base Space Launch Complex 3W",
+        "Vandenberg",
+        "California",
+        34.644,
+        -120.593,
+    ),
+    (
+        "CCSFS SLC 40",
+        "Cape Canaveral Space Force Station Space Launch Complex 40",
+        "Cape Canaveral",
+        "Florida",
+        28.561,
+        -80.577,
+    ),
+    ("STLS", "SpaceX South Texas Launch Site", "Boca Chica Village", "Texas", 25.997, -97.157),
+    ("Kwajalein Atoll", "Kwajalein Atoll Omelek Island", "Omelek Island", "Marshall Islands", 9.048, 167.743),
+    (
+        "VAFB SLC 4E",
+        "Vandenberg Space Force Base Space Launch Complex 4E",
+        "Vandenberg",
+        "California",
+        34.632,
+        -120.611,
+    ),
+    ("KSC LC 39A", "Kennedy Space Center Historic Launch Complex 39A", "Cape Canaveral", "Florida", 28.608, -80.604),
+]
+ORBITS = ["LEO", "ISS", "PO", "GTO", "SSO", "MEO", "VLEO", "HEO", "ES-L1", "TLI"]
+PAYLOAD_TYPES = ["Satellite", "Dragon 1.0", "Dragon 1.1", "Crew Dragon", "Dragon Boat"]
+CUSTOMERS = ["SpaceX", "NASA (CRS)", "NASA (CCtCap)", "SES", "Iridium Communications", "USAF", "Telesat", "Spaceflight"]
+NATIONALITIES = ["United States", "Luxembourg", "Canada", "Germany", "Japan", "Taiwan", "France", "Israel"]
+MANUFACTURERS = ["SpaceX", "Boeing", "Thales Alenia Space", "Orbital ATK", "SSL", "Airbus Defence and Space"]
+CORE_STATUSES = ["active", "inactive", "unknown", "expended", "lost", "retired"]
+SHIP_TYPES = ["Tug", "Cargo", "Barge", "High Speed Craft"]
+HOME_PORTS = ["Port of Los Angeles", "Port Canaveral", "Port of Long Beach"]
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore "
+    "magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo."
+)
+
+
+def make_id(endpoint: Endpoints, index: int) -> str:
+    """Make the 24 hex digits id of a document, shaped like the MongoDB ObjectIds of the real API"""
+    return f"5e9e{ENDPOINT_CODES[endpoint]:04x}{index:016x}"
+
+
+def format_date(timestamp: int) -> str:
+    """Format a unix timestamp the way the API formats `date_utc`"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def parse_date(value: str) -> float:
+    """Parse an ISO date of a query filter into a unix timestamp"""
+    date = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return (date if date.tzinfo else date.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class SpaceXDataGenerator:
+    """Deterministic SpaceX API documents built on demand from the seed and their index
+
+    No document is kept in memory, so any page of millions of documents is generated in the time of the page itself.
+    Launches are spread evenly between `first_launch` and `last_launch` in index order, so a `date_utc` range maps
+    to a range of indexes.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        counts: Optional[dict[Endpoints, int]] = None,
+        first_launch: datetime = FIRST_LAUNCH,
+        last_launch: datetime = LAST_LAUNCH,
+    ):
+        self.seed = seed
+        self.counts = REALISTIC_COUNTS | (counts or {})
+        self.first_launch = int(first_launch.timestamp())
+        self.launch_span = int(last_launch.timestamp()) - self.first_launch
+        self.builders: dict[Endpoints, Callable[[int, random.Random], dict[str, Any]]] = {
+            Endpoints.LAUNCHES: self.make_launch,
+            Endpoints.ROCKETS: self.make_rocket,
+            Endpoints.CORES: self.make_core,
+            Endpoints.PAYLOADS: self.make_payload,
+            Endpoints.LAUNCHPADS: self.make_launchpad,
+            Endpoints.SHIPS: self.make_ship,
+        }
+
+    @classmethod
+    def scaled(cls, scale: float, seed: int = 0) -> "SpaceXDataGenerator":
+        """Make a generator with every realistic volume multiplied by `scale`"""
+        return cls(
+            seed=seed, counts={endpoint: max(1, round(count * scale)) for endpoint, count in REALISTIC_COUNTS.items()}
+        )
+
+    def document(self, endpoint: Endpoints, index: int) -> dict[str, Any]:
+        """Generate the document of the endpoint at the index, always the same for the same seed"""
+        if not 0 <= index < self.counts[endpoint]:
+            raise IndexError(f"{endpoint.value} has {self.counts[endpoint]} documents, no index {index}")  # noqa: TRY003
+        rng = random.Random(self.seed * 1_000_003 + ENDPOINT_CODES[endpoint] * 10**12 + index)  # noqa: S311
+        return self.builders[endpoint](index, rng)
+
+    def launch_timestamp(self, index: int) -> int:
+        """Unix timestamp of the launch at the index"""
+        return self.first_launch + self.launch_span * index // max(1, self.counts[Endpoints.LAUNCHES] - 1)
+
+    def first_launch_index(self, is_after_start: Callable[[int], bool]) -> int:
+        """Binary search of the first launch whose timestamp satisfies a predicate true from some launch onwards"""
+        low, high = 0, self.counts[Endpoints.LAUNCHES]
+        while low < high:
+            middle = (low + high) // 2
+            if is_after_start(self.launch_timestamp(middle)):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def launch_range(self, date_filter: dict[str, str]) -> range:
+        """Indexes of the launches matching a `date_utc` filter with `$gte`, `$gt`, `$lte` and `$lt` operators"""
+        unknown = set(date_filter) - {"$gte", "$gt", "$lte", "$lt"}
+        if unknown:
+            raise ValueError(f"Unsupported date_utc operators: {sorted(unknown)}")  # noqa: TRY003
+        bounds = {operator: parse_date(value) for operator, value in date_filter.items()}
+        start, stop = 0, self.counts[Endpoints.LAUNCHES]
+        if "$gte" in bounds:
+            start = max(start, self.first_launch_index(lambda timestamp: timestamp >= bounds["$gte"]))
+        if "$gt" in bounds:
+            start = max(start, self.first_launch_index(lambda timestamp: timestamp > bounds["$gt"]))
+        if "$lte" in bounds:
+            stop = min(stop, self.first_launch_index(lambda timestamp: timestamp > bounds["$lte"]))
+        if "$lt" in bounds:
+            stop = min(stop, self.first_launch_index(lambda timestamp: timestamp >= bounds["$lt"]))
+        return range(start, max(start, stop))
+
+    def references(self, endpoint: Endpoints, first: int, step: int) -> list[str]:
+        """Ids of the documents of an endpoint at `first`, `first + step`... up to MAX_REFERENCES of them"""
+        return [make_id(endpoint, index) for index in range(first, self.counts[endpoint], step)[:MAX_REFERENCES]]
+
+    def make_launch(self, index: int, rng: random.Random) -> dict[str, Any]:
+        launches, cores = self.counts[Endpoints.LAUNCHES], self.counts[Endpoints.CORES]
+        rocket = index % self.counts[Endpoints.ROCKETS]
+        timestamp = self.launch_timestamp(index)
+        core_count = 3 if rocket == 2 else 1
+        payloads = self.references(Endpoints.PAYLOADS, index, launches) or [
+            make_id(Endpoints.PAYLOADS, index % self.counts[Endpoints.PAYLOADS])
+        ]
+        recovered = rng.random() < 0.8
+        return {
+            "fairings": {
+                "reused": rng.random() < 0.5,
+                "recovery_attempt": recovered,
+                "recovered": recovered,
+                "ships": [],
+            },
+            "links": {
+                "patch": {
+                    "small": f"https://images2.imgbox.com/{index:x}/small_o.png",
+                    "large": f"https://images2.imgbox.com/{index:x}/large_o.png",
+                },
+                "reddit": {
+                    "campaign": None,
+                    "launch": f"https://www.reddit.com/r/spacex/comments/{index:x}",
+                    "media": None,
+                },
+                "flickr": {
+                    "small": [],
+                    "original": [f"https://live.staticflickr.com/65535/{index}_{n}_o.jpg" for n in range(4)],
+                },
+                "presskit": None,
+                "webcast": f"https://youtu.be/{index:011x}",
+                "youtube_id": f"{index:011x}",
+                "article": f"https://spaceflightnow.com/launch/{index}/",
+                "wikipedia": f"https://en.wikipedia.org/wiki/Launch_{index}",
+            },
+            "static_fire_date_utc": format_date(timestamp - 7 * 24 * 3600),
+            "static_fire_date_unix": timestamp - 7 * 24 * 3600,
+            "net": False,
+            "window": rng.choice([0, 0, 3600, 7200]),
+            "rocket": make_id(Endpoints.ROCKETS, rocket),
+            "success": rng.random() < 0.97,
+            "failures": [],
+            "details": rng.choice([None, LOREM[: rng.randrange(40, len(LOREM))]]),
+            "crew": [],
+            "ships": [
+                make_id(Endpoints.SHIPS, (index + n) % self.counts[Endpoints.SHIPS])
+                for n in range(2 if recovered else 0)
+            ],
+            "capsules": [],
+            "payloads": payloads,
+            "launchpad": make_id(Endpoints.LAUNCHPADS, index % self.counts[Endpoints.LAUNCHPADS]),
+            "flight_number": index + 1,
+            "name": f"Mission {index + 1}",
+            "date_utc": format_date(timestamp),
+            "date_unix": timestamp,
+            "date_local": format_date(timestamp),
+            "date_precision": "hour",
+            "upcoming": False,
+            "cores": [
+                {
+                    "core": make_id(Endpoints.CORES, (index + n) % cores),
+                    "flight": (index // cores) + 1,
+                    "gridfins": True,
+                    "legs": True,
+                    "reused": index >= cores,
+                    "landing_attempt": recovered,
+                    "landing_success": recovered and rng.random() < 0.95,
+                    "landing_type": "ASDS" if recovered else None,
+                    "landpad": make_id(Endpoints.LAUNCHPADS, n) if recovered else None,
+                }
+                for n in range(core_count)
+            ],
+            "auto_update": True,
+            "tbd": False,
+            "launch_library_id": None,
+            "id": make_id(Endpoints.LAUNCHES, index),
+        }
+
+    def make_rocket(self, index: int, rng: random.Random) -> dict[str, Any]:
+        height = round(rng.uniform(20, 120), 1)
+        return {
+            "height": {"meters": height, "feet": round(height * 3.281, 1)},
+            "diameter": {"meters": 3.7, "feet": 12},
+            "mass": {"kg": rng.randrange(30_000, 5_000_000), "lb": rng.randrange(66_000, 11_000_000)},
+            "first_stage": {"thrust_sea_level": {"kN": 7607, "lbf": 1710000}, "reusable": True, "engines": 9},
+            "second_stage": {"thrust": {"kN": 934, "lbf": 210000}, "payloads": {"option_1": "dragon"}},
+            "engines": {"number": 9, "type": "merlin", "version": "1D+", "propellant_1": "liquid oxygen"},
+            "landing_legs": {"number": 4, "material": "carbon fiber"},
+            "payload_weights": [{"id": "leo", "name": "Low Earth Orbit", "kg": 22800, "lb": 50265}],
+            "flickr_images": [f"https://farm{n}.staticflickr.com/{index}_{n}_b.jpg" for n in range(4)],
+            "name": ROCKET_NAMES[index] if index < len(ROCKET_NAMES) else f"Rocket {index}",
+            "type": "rocket",
+            "active": rng.random() < 0.75,
+            "stages": 2,
+            "boosters": 2 if index == 2 else 0,
+            "cost_per_launch": rng.randrange(6_000_000, 150_000_000, 500_000),
+            "success_rate_pct": rng.randrange(40, 101),
+            "first_flight": format_date(self.launch_timestamp(index % self.counts[Endpoints.LAUNCHES]))[:10],
+            "country": "United States",
+            "company": "SpaceX",
+            "wikipedia": f"https://en.wikipedia.org/wiki/Rocket_{index}",
+            "description": LOREM,
+            "id": make_id(Endpoints.ROCKETS, index),
+        }
+
+    def make_core(self, index: int, rng: random.Random) -> dict[str, Any]:
+        launches = self.references(Endpoints.LAUNCHES, index, self.counts[Endpoints.CORES])
+        return {
+            "block": rng.choice([None, 1, 2, 3, 4, 5]),
+            "reuse_count": max(0, len(launches) - 1),
+            "rtls_attempts": rng.randrange(0, 3),
+            "rtls_landings": rng.randrange(0, 3),
+            "asds_attempts": rng.randrange(0, 10),
+            "asds_landings": rng.randrange(0, 10),
+            "last_update": LOREM[: rng.randrange(20, 80)],
+            "launches": launches,
+            "serial": f"B{1000 + index}",
+            "status": rng.choice(CORE_STATUSES),
+            "id": make_id(Endpoints.CORES, index),
+        }
+
+    def make_payload(self, index: int, rng: random.Random) -> dict[str, Any]:
+        launch = index % self.counts[Endpoints.LAUNCHES]
+        return {
+            "dragon": {"capsule": None, "mass_returned_kg": None, "flight_time_sec": None, "water_landing": None},
+            "name": f"Payload {index + 1}",
+            "type": rng.choice(PAYLOAD_TYPES),
+            "reused": rng.random() < 0.1,
+            "launch": make_id(Endpoints.LAUNCHES, launch),
+            "customers": [rng.choice(CUSTOMERS)],
+            "norad_ids": [40000 + index],
+            "nationalities": [rng.choice(NATIONALITIES)],
+            "manufacturers": [rng.choice(MANUFACTURERS)],
+            "mass_kg": rng.choice([None, round(rng.uniform(100, 15_600), 1)]),
+            "mass_lbs": None,
+            "orbit": rng.choice(ORBITS),
+            "reference_system": "geocentric",
+            "regime": "low-earth",
+            "longitude": None,
+            "semi_major_axis_km": round(rng.uniform(6_700, 42_000), 3),
+            "eccentricity": round(rng.random() / 100, 7),
+            "periapsis_km": round(rng.uniform(300, 36_000), 3),
+            "apoapsis_km": round(rng.uniform(300, 36_000), 3),
+            "inclination_deg": round(rng.uniform(0, 98), 4),
+            "period_min": round(rng.uniform(90, 1_440), 3),
+            "lifespan_years": rng.choice([None, float(rng.randrange(1, 16))]),
+            "epoch": format_date(self.launch_timestamp(launch) + 3600),
+            "mean_motion": round(rng.uniform(1, 16), 8),
+            "raan": round(rng.uniform(0, 360), 4),
+            "arg_of_pericenter": round(rng.uniform(0, 360), 4),
+            "mean_anomaly": round(rng.uniform(0, 360), 4),
+            "id": make_id(Endpoints.PAYLOADS, index),
+        }
+
+    def make_launchpad(self, index: int, rng: random.Random) -> dict[str, Any]:
+        name, full_name, locality, region, latitude, longitude = LAUNCHPADS[index % len(LAUNCHPADS)]
+        launches = self.references(Endpoints.LAUNCHES, index, self.counts[Endpoints.LAUNCHPADS])
+        return {
+            "images": {"large": [f"https://i.imgur.com/{index:x}_{n}.png" for n in range(2)]},
+            "name": name if index < len(LAUNCHPADS) else f"{name} {index}",
+            "full_name": full_name,
+            "locality": locality,
+            "region": region,
+            "latitude": latitude,
+            "longitude": longitude,
+            "launch_attempts": len(launches),
+            "launch_successes": sum(rng.random() < 0.97 for _ in launches),
+            "rockets": [make_id(Endpoints.ROCKETS, rocket) for rocket in range(min(2, self.counts[Endpoints.ROCKETS]))],
+            "timezone": "America/New_York",
+            "launches": launches,
+            "status": rng.choice(["active", "retired", "under construction"]),
+            "details": LOREM,
+            "id": make_id(Endpoints.LAUNCHPADS, index),
+        }
+
+    def make_ship(self, index: int, rng: random.Random) -> dict[str, Any]:
+        return {
+            "legacy_id": f"SHIP{index}",
+            "model": rng.choice([None, "Boat", "Marmac 300"]),
+            "type": rng.choice(SHIP_TYPES),
+            "roles": ["Support Ship", "Barge Tug"],
+            "imo": 7000000 + index,
+            "mmsi": 300000000 + index,
+            "abs": 500000 + index,
+            "class": 7600000 + index,
+            "mass_kg": rng.randrange(100_000, 1_000_000),
+            "mass_lbs": None,
+            "year_built": rng.randrange(1960, 2020),
+            "home_port": rng.choice(HOME_PORTS),
+            "status": "",
+            "speed_kn": None,
+            "course_deg": None,
+            "latitude": None,
+            "longitude": None,
+            "last_ais_update": None,
+            "link": f"https://www.marinetraffic.com/en/ais/details/ships/shipid:{index}",
+            "image": f"https://i.imgur.com/ship_{index}.jpg",
+            "launches": self.references(Endpoints.LAUNCHES, index, self.counts[Endpoints.SHIPS]),
+            "name": f"Ship {index + 1}",
+            "active": rng.random() < 0.5,
+            "id": make_id(Endpoints.SHIPS, index),
+        }
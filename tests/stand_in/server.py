@@ -0,0 +1,207 @@
+"""Local HTTP stand-in of the SpaceX API `/query` routes, serving the documents of a SpaceXDataGenerator
+
+Usage:
+    uv run python -m tests.stand_in.server --port 8000 --scale 1000
+
+Point the pipeline at it with `SOURCES__SPACEX_API_SOURCE__BASE_URL=http://127.0.0.1:8000/` or with `base_url` in
+the `[sources.spacex_api_source]` section of `.dlt/config.toml`.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Any, Optional, Union
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from tests.stand_in.generator import SpaceXDataGenerator
+
+DEFAULT_LIMIT = 10
+
+
+def parse_select(select: Union[str, list[str], dict[str, int], None]) -> Optional[tuple[bool, set[str]]]:
+    """Parse a mongoose `select` into (inclusive, fields), `id` is always kept by an inclusive projection"""
+    if not select:
+        return None
+    if isinstance(select, str):
+        select = select.split()
+    if isinstance(select, list):
+        excluded = {field[1:] for field in select if field.startswith("-")}
+        return (False, excluded) if excluded else (True, set(select) | {"id"})
+    if all(not value for value in select.values()):
+        return False, set(select)
+    return True, {field for field, value in select.items() if value} | {"id"}
+
+
+def project(document: dict[str, Any], projection: Optional[tuple[bool, set[str]]]) -> dict[str, Any]:
+    """Apply a parsed `select` to a document"""
+    if projection is None:
+        return document
+    inclusive, fields = projection
+    return {key: value for key, value in document.items() if (key in fields) == inclusive}
+
+
+class SpaceXStandIn:
+    """Threaded HTTP server answering the six `Endpoints` `/query` routes like the SpaceX API
+
+    Supports `options.page`, `options.offset` (taking precedence over the page), `options.limit`, `options.select` and `options.pagination`, `$gte`/`$gt`/`$lte`/`$lt`
+    filters on the launches `date_utc`, the mongoose-paginate response fields and weak ETags answered with a 304.
+    """
+
+    def __init__(self, generator: Optional[SpaceXDataGenerator] = None, host: str = "127.0.0.1", port: int = 0):
+        self.generator = generator or SpaceXDataGenerator()
+        self.requests: Counter = Counter()
+        self.bytes_sent: Counter = Counter()
+        self.server = ThreadingHTTPServer((host, port), self.make_handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}/"
+        self._thread: Optional[threading.Thread] = None
+        # The handlers of concurrent requests run on their own threads
+        self._counters_lock = threading.Lock()
+
+    def start(self) -> "SpaceXStandIn":
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port"""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def __enter__(self) -> "SpaceXStandIn":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def query(self, endpoint: Endpoints, body: dict[str, Any]) -> dict[str, Any]:
+        """Answer a `/query` body with a page of documents, raises ValueError on queries the stand-in does not support"""
+        query, options = body.get("query") or {}, body.get("options") or {}
+        unsupported = set(query) - ({"date_utc"} if endpoint == Endpoints.LAUNCHES else set())
+        if unsupported:
+            raise ValueError(f"Unsupported query fields for {endpoint.value}: {sorted(unsupported)}")  # noqa: TRY003
+
+        indexes = range(self.generator.counts[endpoint])
+        if "date_utc" in query:
+            indexes = self.generator.launch_range(query["date_utc"])
+        total_docs = len(indexes)
+        if options.get("pagination", True):
+            page, limit = int(options.get("page", 1)), int(options.get("limit", DEFAULT_LIMIT))
+            # Like mongoose-paginate, an offset takes precedence over the page and the page is the one it falls in
+            offset = int(options["offset"]) if "offset" in options else (page - 1) * limit
+            page = offset // limit + 1
+        else:
+            offset, limit, page = 0, max(1, total_docs), 1
+        total_pages = max(1, -(-total_docs // limit))
+        projection = parse_select(options.get("select"))
+        docs = [
+            project(self.generator.document(endpoint, index), projection) for index in indexes[offset : offset + limit]
+        ]
+        return {
+            "docs": docs,
+            "totalDocs": total_docs,
+            "offset": offset,
+            "limit": limit,
+            "totalPages": total_pages,
+            "page": page,
+            "pagingCounter": offset + 1,
+            "hasPrevPage": offset > 0,
+            "hasNextPage": offset + limit < total_docs,
+            "prevPage": page - 1 if page > 1 else None,
+            "nextPage": page + 1 if page < total_pages else None,
+        }
+
+    def make_handler(self) -> type[BaseHTTPRequestHandler]:
+        stand_in = self
+        routes = {f"/{endpoint.value}": endpoint for endpoint in Endpoints}
+
+        class QueryHandler(BaseHTTPRequestHandler):
+            # Keep-alive connections like the real API, without Nagle delaying the body sent after the headers
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                # Accept a versioned base url, like `http://127.0.0.1:8000/v4/`
+                route = next((route for route in routes if self.path.endswith(route)), None)
+                if route is None:
+                    self.send_json(404, {"error": f"Unknown route {self.path}"})
+                    return
+                with stand_in._counters_lock:
+                    stand_in.requests[route.lstrip("/")] += 1
+                try:
+                    response = stand_in.query(routes[route], json.loads(body or b"{}"))
+                except (ValueError, TypeError) as error:
+                    self.send_json(400, {"error": str(error)})
+                    return
+                response_bytes = self.send_json(200, response)
+                with stand_in._counters_lock:
+                    stand_in.bytes_sent[route.lstrip("/")] += response_bytes
+
+            def send_json(self, status: int, response: dict[str, Any]) -> int:
+                """Send the JSON response and return the bytes of its body"""
+                payload = json.dumps(response, separators=(",", ":")).encode()
+                etag = f'W/"{len(payload):x}-{hashlib.sha1(payload).hexdigest()[:27]}"'  # noqa: S324
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return 0
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 200:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(payload)
+                return len(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                pass
+
+        return QueryHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier of the real API volumes")
+    for endpoint in Endpoints:
+        name = endpoint.value.split("/")[0]
+        parser.add_argument(f"--{name}", type=int, help=f"number of {name}, overrides --scale")
+    args = parser.parse_args()
+
+    generator = SpaceXDataGenerator.scaled(args.scale, seed=args.seed)
+    for endpoint in Endpoints:
+        count = getattr(args, endpoint.value.split("/")[0])
+        if count is not None:
+            generator.counts[endpoint] = count
+    stand_in = SpaceXStandIn(generator, host=args.host, port=args.port)
+    counts = ", ".join(f"{count} {endpoint.value.split('/')[0]}" for endpoint, count in generator.counts.items())
+    print(f"Serving {counts} on {stand_in.base_url}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stand_in.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Unit tests for the change detection between the bronze load and the silver dbt build"""
+
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+import dlt
+import pytest
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.changed_tables import build_changed_models, get_changed_tables, get_silver_selection
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+from tests.stand_in.generator import SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+ALL_TABLES = [schema_type.value for schema_type in BronzeSchema]
+
+
+@pytest.fixture
+def stand_in() -> Generator[SpaceXStandIn, None, None]:
+    """Stand-in of the SpaceX API with about 25 launches a month"""
+    with SpaceXStandIn(SpaceXDataGenerator(counts={Endpoints.LAUNCHES: 5000})) as server:
+        yield server
+
+
+def load(stand_in: SpaceXStandIn, tmp_path: Path) -> dlt.common.pipeline.LoadInfo:
+    """Load a month from the stand-in into the same DuckDB dataset on every call"""
+    pipeline = dlt.pipeline(
+        pipeline_name="changed_tables",
+        pipelines_dir=str(tmp_path),
+        destination=dlt.destinations.duckdb(str(tmp_path / "changed_tables.duckdb")),
+        dataset_name="bronze",
+    )
+    return pipeline.run(spacex_api_source(year=2021, month=3, base_url=stand_in.base_url))
+
+
+class TestChangedTables:
+    """Test which bronze tables a load reports as changed"""
+
+    def test_only_tables_with_new_rows_change(self, stand_in: SpaceXStandIn, tmp_path: Path) -> None:
+        """Test that a reload of unchanged reference data only changes the delete-insert launches"""
+        # The delete-insert of the launches replaces the rows of a load, so its changes are read right after it
+        assert sorted(get_changed_tables(load(stand_in, tmp_path))) == sorted(ALL_TABLES)
+        assert get_changed_tables(load(stand_in, tmp_path)) == [BronzeSchema.LAUNCHES.value]
+
+    def test_retired_rows_change_their_table(self, stand_in: SpaceXStandIn, tmp_path: Path) -> None:
+        """Test that a load retiring scd2 rows without adding any still changes the table"""
+        load(stand_in, tmp_path)
+        stand_in.generator.counts[Endpoints.SHIPS] -= 1
+        load_info = load(stand_in, tmp_path)
+
+        assert get_changed_tables(load_info) == [BronzeSchema.LAUNCHES.value, BronzeSchema.SHIPS.value]
+
+    def test_empty_load_changes_nothing(self) -> None:
+        """Test that a load info without loads reports no change"""
+        assert get_changed_tables(Mock(loads_ids=[])) == []
+
+
+class TestBuildChangedModels:
+    """Test the selective dbt build"""
+
+    def test_get_silver_selection(self) -> None:
+        """Test that each changed table selects its silver model and the models downstream of it"""
+        assert get_silver_selection(["bronze_launches", "bronze_cores"]) == ["silver_launches+", "silver_cores+"]
+
+    @patch("dlt_dbt_dagster.dlt.changed_tables.dbtRunner")
+    @patch("dlt_dbt_dagster.dlt.changed_tables.get_changed_tables")
+    def test_builds_only_changed_models(self, mock_get_changed_tables: Mock, mock_dbt_runner: MagicMock) -> None:
+        """Test that dbt only builds the models of the changed tables"""
+        mock_get_changed_tables.return_value = ["bronze_ships"]
+
+        build_changed_models(Mock(), project_dir="dbt_spacex")
+
+        args = mock_dbt_runner.return_value.invoke.call_args[0][0]
+        assert args == ["build", "--select", "silver_ships+", "--project-dir", "dbt_spacex"]
+
+    @patch("dlt_dbt_dagster.dlt.changed_tables.dbtRunner")
+    @patch("dlt_dbt_dagster.dlt.changed_tables.get_changed_tables")
+    def test_skips_build_without_changes(self, mock_get_changed_tables: Mock, mock_dbt_runner: MagicMock) -> None:
+        """Test that dbt does not run when no bronze table changed"""
+        mock_get_changed_tables.return_value = []
+
+        assert build_changed_models(Mock()) is None
+        mock_dbt_runner.assert_not_called()
+
+    @patch("dlt_dbt_dagster.dlt.changed_tables.dbtRunner")
+    @patch("dlt_dbt_dagster.dlt.changed_tables.get_changed_tables")
+    def test_failed_build_raises(self, mock_get_changed_tables: Mock, mock_dbt_runner: MagicMock) -> None:
+        """Test that a failed dbt build raises"""
+        mock_get_changed_tables.return_value = ["bronze_launches"]
+        mock_dbt_runner.return_value.invoke.return_value = Mock(success=False, exception=None)
+
+        with pytest.raises(RuntimeError, match="bronze_launches"):
+            build_changed_models(Mock())
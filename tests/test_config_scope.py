@@ -0,0 +1,38 @@
+"""Unit tests for the dlt config values scoped to a block"""
+
+import os
+
+import dlt
+import pytest
+
+from dlt_dbt_dagster.dlt.config_scope import config_scope, get_config_variable
+
+
+class TestConfigScope:
+    """Test the dlt config values set in the environment for a block"""
+
+    def test_get_config_variable(self) -> None:
+        """Test that a dotted config key maps to the environment variable dlt reads"""
+        assert (
+            get_config_variable("normalize.parquet_normalizer.add_dlt_id")
+            == "NORMALIZE__PARQUET_NORMALIZER__ADD_DLT_ID"
+        )
+
+    def test_config_scope_restores_the_previous_values(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the values are read by dlt in the block and the previous environment is restored after it"""
+        monkeypatch.setenv("LOAD__WORKERS", "2")
+        monkeypatch.delenv("NORMALIZE__DATA_WRITER__COMPRESSION", raising=False)
+        monkeypatch.delenv("NORMALIZE__PARQUET_NORMALIZER__ADD_DLT_ID", raising=False)
+
+        with config_scope({
+            "load.workers": 8,
+            "normalize.data_writer.compression": "zstd",
+            "normalize.parquet_normalizer.add_dlt_id": True,
+        }):
+            assert dlt.config.get("load.workers", int) == 8
+            assert dlt.config.get("normalize.data_writer.compression", str) == "zstd"
+            assert dlt.config.get("normalize.parquet_normalizer.add_dlt_id", bool) is True
+
+        assert os.environ["LOAD__WORKERS"] == "2"
+        assert "NORMALIZE__DATA_WRITER__COMPRESSION" not in os.environ
+        assert "NORMALIZE__PARQUET_NORMALIZER__ADD_DLT_ID" not in os.environ
@@ -0,0 +1,308 @@
+"""Unit tests for the SpaceX API custom paginator"""
+
+import json
+import threading
+from collections import Counter
+from collections.abc import Generator
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import dlt
+import pytest
+from dlt.sources.helpers.rest_client import RESTClient
+from requests import ConnectTimeout, PreparedRequest, Request
+from requests.adapters import HTTPAdapter
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.custom_paginator import CustomJsonPaginator, PageSizer, PageSizingAdapter, PrefetchAdapter
+from dlt_dbt_dagster.dlt.request_scheduler import RequestScheduler, get_pooled_adapter
+from dlt_dbt_dagster.dlt.response_cache import ResponseCache
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+TOTAL_DOCS = 23
+PAGE_LIMIT = 5
+
+
+@pytest.fixture
+def query_server() -> Generator[tuple[str, Counter], None, None]:
+    """Local server answering SpaceX style `/query` POSTs and counting the requested pages"""
+    requested_pages: Counter = Counter()
+    docs = [{"id": f"doc_{index}"} for index in range(TOTAL_DOCS)]
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            options = body.get("options", {})
+            page, limit = options.get("page", 1), options.get("limit", 10)
+            requested_pages[page] += 1
+            total_pages = -(-len(docs) // limit)
+            payload = json.dumps({
+                "docs": docs[(page - 1) * limit : page * limit],
+                "totalDocs": len(docs),
+                "totalPages": total_pages,
+                "page": page,
+                "hasNextPage": page < total_pages,
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QueryHandler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", requested_pages
+    server.shutdown()
+    server.server_close()
+
+
+def paginate_docs(base_url: str, paginator: CustomJsonPaginator) -> list[list[str]]:
+    """Collect the ids of each page yielded by the dlt REST client"""
+    client = RESTClient(base_url=base_url, paginator=paginator, session=paginator.make_session())
+    pages = client.paginate(
+        "launches/query",
+        method="POST",
+        json={"query": {}, "options": {"limit": PAGE_LIMIT}},
+        data_selector="docs[*]",
+    )
+    return [[doc["id"] for doc in page] for page in pages]
+
+
+class TestCustomJsonPaginator:
+    """Test the sequential and concurrent modes of CustomJsonPaginator"""
+
+    def test_sequential_mode_sends_on_pooled_connections(self) -> None:
+        """Test that the sessions of every paginator send on the connections pooled by the process"""
+        paginator = CustomJsonPaginator()
+
+        assert paginator.prefetch_adapter is None
+        assert paginator.make_session().get_adapter("https://api.spacexdata.com/v4/") is get_pooled_adapter()
+        assert CustomJsonPaginator().make_session().get_adapter("http://localhost/") is get_pooled_adapter()
+
+    def test_sequential_mode_fetches_all_pages(self, query_server: tuple[str, Counter]) -> None:
+        """Test that the sequential mode fetches each page once and in order"""
+        base_url, requested_pages = query_server
+
+        pages = paginate_docs(base_url, CustomJsonPaginator())
+
+        assert [doc_id for page in pages for doc_id in page] == [f"doc_{index}" for index in range(TOTAL_DOCS)]
+        assert requested_pages == Counter({1: 1, 2: 1, 3: 1, 4: 1, 5: 1})
+
+    @pytest.mark.parametrize("max_workers", [2, 3, 8])
+    def test_concurrent_mode_yields_pages_in_order(self, query_server: tuple[str, Counter], max_workers: int) -> None:
+        """Test that the concurrent mode yields the same pages in order and requests each page exactly once"""
+        base_url, requested_pages = query_server
+
+        with patch.object(
+            PrefetchAdapter, "prefetch", autospec=True, side_effect=PrefetchAdapter.prefetch
+        ) as mock_prefetch:
+            pages = paginate_docs(base_url, CustomJsonPaginator(max_workers=max_workers))
+
+        # Every page after the first one is served from the worker pool
+        assert mock_prefetch.call_count == 4
+        assert len(pages) == 5
+        assert [doc_id for page in pages for doc_id in page] == [f"doc_{index}" for index in range(TOTAL_DOCS)]
+        assert requested_pages == Counter({1: 1, 2: 1, 3: 1, 4: 1, 5: 1})
+
+    def test_concurrent_mode_shares_adapter_across_copies(self) -> None:
+        """Test that deep copies made by dlt keep the same worker pool"""
+        paginator = CustomJsonPaginator(max_workers=4)
+
+        paginator_copy = deepcopy(paginator)
+
+        assert paginator_copy.prefetch_adapter is paginator.prefetch_adapter
+
+    @pytest.mark.parametrize("options", [{"max_workers": 2}, {"page_sizer": PageSizer()}])
+    def test_session_close_keeps_the_pooled_adapter_open(self, tmp_path: Path, options: dict) -> None:
+        """Test that closing a session closes every adapter it is routed through, but not the adapter pooled by the
+        process, whose connections the other sessions use"""
+        paginator = CustomJsonPaginator(scheduler=RequestScheduler(10.0), **options)
+        session = ResponseCache(tmp_path / "cache.sqlite").make_session(["rockets/query"], paginator.make_session())
+        adapters = []
+        adapter = session.get_adapter("https://api.spacexdata.com/v4/")
+        while adapter is not get_pooled_adapter():
+            adapters.append(adapter)
+            adapter = adapter.delegate
+
+        with patch.object(HTTPAdapter, "close", autospec=True) as mock_close:
+            session.close()
+
+        closed = [call.args[0] for call in mock_close.call_args_list]
+        # The response cache, the prefetch or page sizing, and the rate limit adapters
+        assert len(adapters) == 3
+        assert all(any(adapter is closed_adapter for closed_adapter in closed) for adapter in adapters)
+        assert not any(closed_adapter is get_pooled_adapter() for closed_adapter in closed)
+
+
+class TestPrefetchAdapter:
+    """Test the options and the shutdown of the prefetched requests of PrefetchAdapter"""
+
+    @staticmethod
+    def make_request(page: int) -> PreparedRequest:
+        """Prepare a POST of a page of the launches"""
+        return Request("POST", "http://localhost/v4/launches/query", json={"options": {"page": page}}).prepare()
+
+    def test_prefetch_uses_the_send_options(self) -> None:
+        """Test that the prefetched requests are sent with the timeout and verify of the last send"""
+        mock_delegate = Mock()
+        adapter = PrefetchAdapter(max_workers=2, delegate=mock_delegate)
+
+        adapter.send(self.make_request(1), timeout=3, verify=False)
+        adapter.prefetch(self.make_request(2))
+        response = adapter.send(self.make_request(2), timeout=3, verify=False)
+        adapter.close()
+
+        assert response is mock_delegate.send.return_value
+        assert mock_delegate.send.call_count == 2
+        assert mock_delegate.send.call_args.kwargs == {"timeout": 3, "verify": False}
+
+    def test_send_with_other_options_sends_again(self) -> None:
+        """Test that a request prefetched with other options than the ones of its send is sent again"""
+        mock_delegate = Mock()
+        adapter = PrefetchAdapter(max_workers=2, delegate=mock_delegate)
+
+        adapter.send(self.make_request(1), timeout=3)
+        adapter.prefetch(self.make_request(2))
+        adapter.send(self.make_request(2), timeout=7)
+        adapter.close()
+
+        assert [call.kwargs for call in mock_delegate.send.call_args_list] == [
+            {"timeout": 3},
+            {"timeout": 3},
+            {"timeout": 7},
+        ]
+
+    def test_close_cancels_the_pending_requests(self) -> None:
+        """Test that close cancels the queued requests, shuts the worker pool down and later sends go to the delegate"""
+        started, release = threading.Event(), threading.Event()
+
+        def send(*args: Any, **kwargs: Any) -> Mock:
+            started.set()
+            release.wait(5)
+            return Mock()
+
+        mock_delegate = Mock()
+        mock_delegate.send.side_effect = send
+        adapter = PrefetchAdapter(max_workers=1, delegate=mock_delegate)
+        adapter.prefetch(self.make_request(2))
+        adapter.prefetch(self.make_request(3))
+        assert started.wait(5)
+        executor = adapter._executor
+
+        threading.Timer(0.05, release.set).start()
+        adapter.close()
+
+        assert executor is not None and executor._shutdown
+        assert adapter._executor is None
+        assert mock_delegate.send.call_count == 1
+        adapter.send(self.make_request(3), timeout=1)
+        assert mock_delegate.send.call_count == 2
+
+
+class TestPageSizer:
+    """Test the adaptive page size of CustomJsonPaginator"""
+
+    def test_next_limit(self) -> None:
+        """Test that the limit grows on fast and small pages, shrinks on slow, large or failed ones within the bounds"""
+        sizer = PageSizer(min_limit=10, max_limit=100, target_seconds=1.0, max_response_bytes=1000)
+        url = "http://localhost:8000/v4/payloads/query"
+
+        assert sizer.next_limit(url, 50, elapsed_seconds=0.1, response_bytes=400) == 100
+        assert sizer.next_limit(url, 80, elapsed_seconds=0.1, response_bytes=400) == 100
+        assert sizer.next_limit(url, 50, elapsed_seconds=0.7, response_bytes=400) == 50
+        assert sizer.next_limit(url, 50, elapsed_seconds=0.1, response_bytes=600) == 50
+        assert sizer.next_limit(url, 50, elapsed_seconds=1.5, response_bytes=400) == 25
+        assert sizer.next_limit(url, 50, elapsed_seconds=0.1, response_bytes=1500) == 25
+        assert sizer.next_limit(url, 15, elapsed_seconds=1.5, response_bytes=400) == 10
+        sizer.record_error(url)
+        assert sizer.next_limit(url, 50, elapsed_seconds=0.1, response_bytes=400) == 25
+        assert sizer.next_limit(url, 50, elapsed_seconds=0.1, response_bytes=400) == 100
+        assert sizer.limits[url] == [100, 100, 50, 50, 25, 25, 10, 25, 100]
+
+    def test_invalid_bounds(self) -> None:
+        """Test that the bounds must be ordered and positive"""
+        with pytest.raises(ValueError, match="min_limit <= max_limit"):
+            PageSizer(min_limit=100, max_limit=10)
+
+    def test_adapter_records_failed_attempts(self) -> None:
+        """Test that the retried status codes and the connection errors count as failed attempts of their endpoint"""
+        sizer = PageSizer()
+        delegate = Mock()
+        adapter = PageSizingAdapter(sizer, delegate=delegate)
+        request = Mock(url="http://localhost:8000/v4/cores/query")
+
+        for status_code in (200, 429, 503, 404):
+            delegate.send.return_value = Mock(status_code=status_code)
+            adapter.send(request)
+        delegate.send.side_effect = ConnectTimeout()
+        with pytest.raises(ConnectTimeout):
+            adapter.send(request)
+
+        assert sizer.errors == Counter({request.url: 3})
+
+    def test_adaptive_mode_cannot_be_concurrent(self) -> None:
+        """Test that the adaptive page size and the concurrent mode are exclusive"""
+        with pytest.raises(ValueError, match="Adaptive page sizing"):
+            CustomJsonPaginator(max_workers=4, page_sizer=PageSizer())
+
+    @pytest.mark.parametrize(
+        ("initial_limit", "max_response_bytes", "grows"), [(7, 1024 * 1024, True), (50, 20 * 1024, False)]
+    )
+    def test_adaptive_pages_cover_every_document_once(
+        self, initial_limit: int, max_response_bytes: int, grows: bool
+    ) -> None:
+        """Test that changing the limit between pages neither skips nor repeats a document"""
+        sizer = PageSizer(min_limit=2, max_limit=64, target_seconds=10.0, max_response_bytes=max_response_bytes)
+        paginator = CustomJsonPaginator(page_sizer=sizer)
+        with SpaceXStandIn(SpaceXDataGenerator()) as stand_in:
+            client = RESTClient(base_url=stand_in.base_url, paginator=paginator, session=paginator.make_session())
+            pages = client.paginate(
+                Endpoints.PAYLOADS.value,
+                method="POST",
+                json={"query": {}, "options": {"limit": initial_limit}},
+                data_selector="docs[*]",
+            )
+            ids = [doc["id"] for page in pages for doc in page]
+
+        (limits,) = sizer.limits.values()
+        assert limits[0] != initial_limit
+        assert (limits[-1] > initial_limit) == grows
+        assert sorted(ids) == sorted(set(ids))
+        assert len(ids) == REALISTIC_COUNTS[Endpoints.PAYLOADS]
+
+    @pytest.mark.parametrize("stream_pages", [False, True])
+    def test_source_with_adaptive_pages_loads_every_row(self, tmp_path: Path, stream_pages: bool) -> None:
+        """Test that the source loads every row of every endpoint with an adaptive page size"""
+        sizer = PageSizer(min_limit=5, max_limit=200)
+        pipeline = dlt.pipeline(
+            pipeline_name="adaptive",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "adaptive.duckdb")),
+            dataset_name="bronze",
+        )
+        with SpaceXStandIn(SpaceXDataGenerator()) as stand_in:
+            source = spacex_api_source(
+                year=2021, month=3, base_url=stand_in.base_url, page_sizer=sizer, stream_pages=stream_pages
+            )
+            pipeline.run(source)
+
+        row_counts = pipeline.last_trace.last_normalize_info.row_counts
+        for endpoint in (Endpoints.CORES, Endpoints.PAYLOADS, Endpoints.SHIPS):
+            assert row_counts[BronzeSchema[endpoint.name].value] == REALISTIC_COUNTS[endpoint]
+        # The local pages are fast and small, so they grow past the 50 documents of the config
+        assert stand_in.requests[Endpoints.PAYLOADS.value] < -(-REALISTIC_COUNTS[Endpoints.PAYLOADS] // 50)
+
+    def test_cached_responses_cannot_have_adaptive_pages(self) -> None:
+        """Test that the response cache and the adaptive page size are exclusive"""
+        with pytest.raises(ValueError, match="adaptive page size"):
+            list(spacex_api_source(year=2021, month=3, cache_responses=True, page_sizer=PageSizer()).resources)
@@ -0,0 +1,149 @@
+"""Build of the silver and gold dbt models on bronze tables loaded from the SpaceX API stand-in
+
+The dbt packages of the project are installed by `dbt deps`, as the CI does before the tests, the build is skipped
+without them.
+"""
+
+from collections import Counter
+from collections.abc import Generator
+from datetime import datetime, timezone
+from pathlib import Path
+
+import dlt
+import pytest
+from dbt.cli.main import dbtRunner
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.changed_tables import DBT_PROJECT_DIR
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_backfill_source, spacex_api_source
+from dlt_dbt_dagster.utils.processing_utils import get_month_range
+from tests.stand_in.generator import SpaceXDataGenerator, make_id
+from tests.stand_in.server import SpaceXStandIn
+
+pytestmark = pytest.mark.skipif(
+    not (DBT_PROJECT_DIR / "dbt_packages" / "dbt_utils").exists(), reason="the dbt packages are not installed"
+)
+
+PROFILES = """dbt_spacex:
+  target: {target}
+  outputs:
+    {target}:
+      type: duckdb
+      path: {path}
+      schema: {target}
+      threads: 1
+"""
+
+
+@pytest.fixture
+def stand_in() -> Generator[SpaceXStandIn, None, None]:
+    """Stand-in of the SpaceX API with about 25 launches a month in the first half of 2021"""
+    generator = SpaceXDataGenerator(
+        counts={Endpoints.LAUNCHES: 150},
+        first_launch=datetime(2021, 1, 1, tzinfo=timezone.utc),
+        last_launch=datetime(2021, 7, 1, tzinfo=timezone.utc),
+    )
+    with SpaceXStandIn(generator) as server:
+        yield server
+
+
+def build(tmp_path: Path, target: str, *args: str) -> None:
+    """Build the silver and gold models of the DuckDB dataset into the schema named after the target"""
+    (tmp_path / "profiles.yml").write_text(PROFILES.format(target=target, path=tmp_path / "spacex.duckdb"))
+    result = dbtRunner().invoke([
+        "build",
+        "--select",
+        "silver+",
+        *args,
+        "--project-dir",
+        str(DBT_PROJECT_DIR),
+        "--profiles-dir",
+        str(tmp_path),
+        "--target-path",
+        str(tmp_path / "target"),
+        "--log-path",
+        str(tmp_path / "logs"),
+    ])
+    assert result.success, result.exception or [str(node.message) for node in result.result or []]
+
+
+def assert_matches_full_refresh(pipeline: dlt.Pipeline) -> None:
+    """Assert that every gold model built incrementally equals its full refresh, up to the rounding of their sums"""
+    with pipeline.sql_client() as client:
+        for model in ("gold_launches_monthly", "gold_payload_mass_monthly", "gold_core_reuse_monthly"):
+            incremental, full_refresh = (
+                Counter(
+                    tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+                    for row in client.execute_sql(f'select * exclude (gold_load_timestamp) from "{target}".{model}')  # noqa: S608
+                )
+                for target in ("incremental", "full")
+            )
+            assert incremental
+            assert incremental == full_refresh, model
+
+
+class TestDbtBuild:
+    """Test the dbt build of the silver and gold layers on bronze tables loaded by the pipeline"""
+
+    def test_incremental_build_matches_full_refresh(self, stand_in: SpaceXStandIn, tmp_path: Path) -> None:
+        """Test that the models build on a backfill and a reload of a month, and equal a full refresh of them"""
+        pipeline = dlt.pipeline(
+            pipeline_name="dbt_build",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "spacex.duckdb")),
+            dataset_name="bronze",
+        )
+        pipeline.run(spacex_api_backfill_source(2021, 1, 2021, 6, base_url=stand_in.base_url))
+        build(tmp_path, "incremental")
+        # The launches of the month come back with other rockets, outcomes and payloads
+        stand_in.generator.seed = 1
+        source = spacex_api_source(year=2021, month=3, base_url=stand_in.base_url)
+        pipeline.run(source.with_resources(BronzeSchema.LAUNCHES.value))
+        build(tmp_path, "incremental")
+        build(tmp_path, "full", "--full-refresh")
+
+        assert_matches_full_refresh(pipeline)
+
+    def test_reloaded_month_retires_the_dropped_launches(self, stand_in: SpaceXStandIn, tmp_path: Path) -> None:
+        """Test that reloading a month retires the launches dropped from it and the earlier versions of the ones moved
+        to it, and that the gold months are recomputed, the one left without launches deleted"""
+        pipeline = dlt.pipeline(
+            pipeline_name="dbt_build",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "spacex.duckdb")),
+            dataset_name="bronze",
+        )
+        pipeline.run(spacex_api_backfill_source(2021, 1, 2021, 6, base_url=stand_in.base_url))
+        build(tmp_path, "incremental")
+        start_date, end_date = get_month_range(2021, 3)
+        march_launches = stand_in.generator.launch_range({"$gte": start_date, "$lt": end_date})
+        march_ids = {make_id(Endpoints.LAUNCHES, index) for index in march_launches}
+        # March now holds the first 30 launches, all of January and a few of February, instead of its own
+        stand_in.generator = SpaceXDataGenerator(
+            counts={Endpoints.LAUNCHES: 30},
+            first_launch=datetime(2021, 3, 1, tzinfo=timezone.utc),
+            last_launch=datetime(2021, 3, 31, tzinfo=timezone.utc),
+        )
+        source = spacex_api_source(year=2021, month=3, base_url=stand_in.base_url)
+        pipeline.run(source.with_resources(BronzeSchema.LAUNCHES.value))
+        build(tmp_path, "incremental")
+        build(tmp_path, "full", "--full-refresh")
+
+        with pipeline.sql_client() as client:
+            [(current, current_ids, bronze_ids)] = client.execute_sql(
+                "select count(*) filter (where is_current_record), count(distinct id) filter (where is_current_record), "
+                "(select count(distinct id) from bronze.bronze_launches) from incremental.silver_launches"
+            )
+            retired = client.execute_sql(
+                "select id, year, month from incremental.silver_launches where not is_current_record and valid_to is not null"
+            )
+            [(january_rows,)] = client.execute_sql(
+                "select count(*) from incremental.gold_launches_monthly where year = 2021 and month = 1"
+            )
+        # Each launch left in bronze has a single current version, the ones dropped from March none
+        assert current == current_ids == bronze_ids
+        assert {row_id for row_id, year, month in retired if (year, month) == (2021, 3)} == march_ids
+        assert {(year, month) for _, year, month in retired} == {(2021, 1), (2021, 2), (2021, 3)}
+        assert january_rows == 0
+        assert_matches_full_refresh(pipeline)
@@ -0,0 +1,83 @@
+"""Unit tests for the dbt manifest cached by the content of the project"""
+
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from dagster_dbt import DbtProject
+
+from dlt_dbt_dagster.defs.dbt_project import MANIFEST_CACHE_SIZE, get_manifest_path, hash_project, prepare_manifest
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> DbtProject:
+    """dbt project of a model, whose parse writes a manifest of the model"""
+    (tmp_path / "models").mkdir()
+    (tmp_path / "dbt_project.yml").write_text("name: spacex\n")
+    (tmp_path / "models" / "silver_rockets.sql").write_text("select 1 as id\n")
+    return DbtProject(project_dir=tmp_path)
+
+
+def parse(project: DbtProject) -> None:
+    """Stand-in of the dbt parse, writing the model SQL as the manifest"""
+    project.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    project.manifest_path.write_text((project.project_dir / "models" / "silver_rockets.sql").read_text())
+
+
+class TestManifestCache:
+    """Test that the manifest is parsed once per content of the project"""
+
+    def test_hash_project(self, project: DbtProject, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the hash changes with a model or an environment variable read by the project only"""
+        monkeypatch.delenv("SPACEX_BRONZE_LAKE_DIR", raising=False)
+        project_hash = hash_project(project)
+        (project.project_dir / "target").mkdir()
+        (project.project_dir / "target" / "run_results.json").write_text("{}")
+        assert hash_project(project) == project_hash
+
+        monkeypatch.setenv("SPACEX_BRONZE_LAKE_DIR", "lake")
+        assert hash_project(project) != project_hash
+        monkeypatch.delenv("SPACEX_BRONZE_LAKE_DIR")
+
+        (project.project_dir / "models" / "silver_rockets.sql").write_text("select 2 as id\n")
+        assert hash_project(project) != project_hash
+
+    @patch("dagster_dbt.dbt_project.DagsterDbtProjectPreparer.using_dagster_dev", return_value=True)
+    @patch("dagster_dbt.dbt_project.DagsterDbtProjectPreparer.prepare", autospec=True)
+    def test_manifest_is_reused_until_the_project_changes(
+        self, mock_prepare: Mock, mock_using_dagster_dev: Mock, project: DbtProject
+    ) -> None:
+        """Test that the project is parsed on a change of a model only, each manifest cached apart"""
+        mock_prepare.side_effect = lambda _preparer, project: parse(project)
+        manifest_path = get_manifest_path(project)
+        assert get_manifest_path(project) == manifest_path
+        assert mock_prepare.call_count == 1
+
+        (project.project_dir / "models" / "silver_rockets.sql").write_text("select 2 as id\n")
+        changed_manifest_path = get_manifest_path(project)
+        assert mock_prepare.call_count == 2
+        assert changed_manifest_path != manifest_path
+        assert manifest_path.read_text() == "select 1 as id\n"
+        assert changed_manifest_path.read_text() == "select 2 as id\n"
+
+    @patch("dagster_dbt.dbt_project.DagsterDbtProjectPreparer.using_dagster_dev", return_value=False)
+    @patch("dagster_dbt.dbt_project.DagsterDbtProjectPreparer.prepare", autospec=True)
+    def test_packaged_manifest_is_used_outside_dev(
+        self, mock_prepare: Mock, mock_using_dagster_dev: Mock, project: DbtProject
+    ) -> None:
+        """Test that a packaged manifest is used as is when no manifest is cached outside `dagster dev`"""
+        parse(project)
+
+        assert get_manifest_path(project) == project.manifest_path
+        mock_prepare.assert_not_called()
+
+    @patch("dagster_dbt.dbt_project.DagsterDbtProjectPreparer.prepare", autospec=True)
+    def test_oldest_manifests_are_removed(self, mock_prepare: Mock, project: DbtProject) -> None:
+        """Test that the cache keeps the manifests of the last project versions parsed"""
+        mock_prepare.side_effect = lambda _preparer, project: parse(project)
+        for version in range(MANIFEST_CACHE_SIZE + 2):
+            (project.project_dir / "models" / "silver_rockets.sql").write_text(f"select {version} as id\n")
+            manifest_path = prepare_manifest(project)
+
+        assert len(list(manifest_path.parent.glob("*.json"))) == MANIFEST_CACHE_SIZE
+        assert manifest_path.exists()
@@ -0,0 +1,85 @@
+"""Unit tests for the Dagster bronze assets, run against the local SpaceX API stand-in"""
+
+from collections.abc import Generator
+from datetime import datetime
+from pathlib import Path
+
+import dagster as dg
+import pytest
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.defs.bronze import (
+    MONTHLY_PARTITIONS,
+    SpaceXPipelineResource,
+    bronze_asset_key,
+    bronze_launches,
+    bronze_reference_tables,
+    get_month_bounds,
+)
+from dlt_dbt_dagster.utils.processing_utils import get_month_range
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+
+@pytest.fixture
+def stand_in(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Generator[SpaceXStandIn, None, None]:
+    """Stand-in of the SpaceX API the source is pointed at, with the pipeline working in a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DLT_DATA_DIR", str(tmp_path))
+    with SpaceXStandIn(SpaceXDataGenerator()) as server:
+        monkeypatch.setenv("SOURCES__SPACEX_API_SOURCE__BASE_URL", server.base_url)
+        yield server
+
+
+class TestBronzeAssets:
+    """Test the partitioned launches asset and the reference tables asset"""
+
+    def test_get_month_bounds(self) -> None:
+        """Test that a window of monthly partitions maps to its first and last month"""
+        time_window = MONTHLY_PARTITIONS.time_window_for_partition_key("2021-12-01")
+
+        assert get_month_bounds(time_window) == (2021, 12, 2021, 12)
+        assert get_month_bounds(dg.TimeWindow(datetime(2020, 11, 1), datetime(2021, 3, 1))) == (2020, 11, 2021, 2)
+
+    def test_launches_backfill_runs_once_for_the_partition_range(self, stand_in: SpaceXStandIn) -> None:
+        """Test that a range of months is loaded in a single run with a single date range query"""
+        result = dg.materialize(
+            [bronze_launches],
+            resources={"spacex_pipeline": SpaceXPipelineResource(page_workers=2)},
+            tags={
+                "dagster/asset_partition_range_start": "2019-01-01",
+                "dagster/asset_partition_range_end": "2020-12-01",
+            },
+        )
+
+        start_date, _ = get_month_range(2019, 1)
+        _, end_date = get_month_range(2020, 12)
+        launches = stand_in.generator.launch_range({"$gte": start_date, "$lt": end_date})
+        materializations = result.asset_materializations_for_node("bronze_spacex__bronze_launches")
+        assert result.success
+        assert len(materializations) == 24
+        assert materializations[0].metadata["rows"].value == len(launches)
+        assert materializations[0].metadata["pages"].value == -(-len(launches) // 50)
+        assert stand_in.requests[Endpoints.LAUNCHES.value] == -(-len(launches) // 50)
+        assert stand_in.requests[Endpoints.ROCKETS.value] == 0
+
+    @pytest.mark.parametrize("arrow_batches", [False, True])
+    def test_reference_tables_load_the_selected_subset(self, stand_in: SpaceXStandIn, arrow_batches: bool) -> None:
+        """Test that only the selected reference tables are queried and materialized, from dicts or Arrow pages"""
+        result = dg.materialize(
+            [bronze_reference_tables],
+            resources={"spacex_pipeline": SpaceXPipelineResource(arrow_batches=arrow_batches)},
+            selection=[bronze_asset_key(BronzeSchema.ROCKETS), bronze_asset_key(BronzeSchema.SHIPS)],
+        )
+
+        materializations = {
+            materialization.asset_key: materialization.metadata["rows"].value
+            for materialization in result.asset_materializations_for_node("bronze_reference_tables")
+        }
+        assert materializations == {
+            bronze_asset_key(BronzeSchema.ROCKETS): REALISTIC_COUNTS[Endpoints.ROCKETS],
+            bronze_asset_key(BronzeSchema.SHIPS): REALISTIC_COUNTS[Endpoints.SHIPS],
+        }
+        assert stand_in.requests[Endpoints.CORES.value] == 0
+        assert stand_in.requests[Endpoints.LAUNCHES.value] == 0
@@ -0,0 +1,97 @@
+"""Unit tests for the performance instrumentation of the SpaceX pipeline"""
+
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import Mock
+
+import dlt
+import pytest
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.instrumentation import PipelineMetrics, get_resource_name
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+
+def make_response(url: str, content: bytes = b'{"docs": []}', elapsed: float = 0.2) -> Mock:
+    """Mock a response of the API to the given URL"""
+    response = Mock(content=content, elapsed=timedelta(seconds=elapsed))
+    response.request.url = url
+    return response
+
+
+class TestPipelineMetrics:
+    """Test the collection and export of the pipeline metrics"""
+
+    def test_get_resource_name(self) -> None:
+        """Test that a response maps to the bronze table of its endpoint"""
+        unknown_url = "http://localhost:8000/v4/dragons"
+        response = make_response(f"http://localhost:8000/v4/{Endpoints.LAUNCHPADS.value}")
+
+        assert get_resource_name(response) == BronzeSchema.LAUNCHPADS.value
+        assert get_resource_name(make_response(unknown_url)) == unknown_url
+
+    def test_count_records(self) -> None:
+        """Test that the wrapped step counts the records in and the records out of it"""
+        metrics = PipelineMetrics()
+        step = metrics.count_records("bronze_ships", lambda record: record if record["keep"] else None)
+
+        for keep in (True, False, True):
+            step({"keep": keep})
+
+        assert metrics.summary("bronze_ships")["records_in"] == 3
+        assert metrics.summary("bronze_ships")["records_out"] == 2
+
+    def test_to_prometheus(self) -> None:
+        """Test that the pages of a resource are exported as a latency histogram and byte counters"""
+        metrics = PipelineMetrics()
+        url = f"http://localhost:8000/v4/{Endpoints.ROCKETS.value}"
+        metrics.record_page(make_response(url, elapsed=0.07), page=1, decode_seconds=0.01)
+        metrics.record_page(make_response(url, content=b"{}", elapsed=3.0), page=2, decode_seconds=0.01)
+
+        text = metrics.to_prometheus()
+
+        assert "# TYPE spacex_pipeline_page_latency_seconds histogram" in text
+        assert 'spacex_pipeline_page_latency_seconds_bucket{resource="bronze_rockets",le="0.1"} 1' in text
+        assert 'spacex_pipeline_page_latency_seconds_bucket{resource="bronze_rockets",le="+Inf"} 2' in text
+        assert 'spacex_pipeline_page_latency_seconds_count{resource="bronze_rockets"} 2' in text
+        assert 'spacex_pipeline_response_bytes_total{resource="bronze_rockets"} 14' in text
+        assert metrics.to_metadata("bronze_rockets")["slowest_pages"][0]["page"] == 2
+
+    def test_pipeline_run_records_every_resource(self, tmp_path: Path) -> None:
+        """Test that a run of the source records the pages, records and stages of every resource"""
+        metrics = PipelineMetrics()
+        pipeline = dlt.pipeline(
+            pipeline_name="instrumentation",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "instrumentation.duckdb")),
+            dataset_name="bronze",
+        )
+        with SpaceXStandIn(SpaceXDataGenerator()) as stand_in:
+            pipeline.run(spacex_api_source(year=2021, month=3, base_url=stand_in.base_url, metrics=metrics))
+            metrics.record_trace(pipeline.last_trace)
+            path = metrics.write_prometheus(tmp_path / "metrics" / "spacex.prom")
+
+        assert metrics.resources() == [schema_type.value for schema_type in BronzeSchema]
+        payloads = metrics.summary(BronzeSchema.PAYLOADS.value)
+        assert payloads["pages"] == -(-REALISTIC_COUNTS[Endpoints.PAYLOADS] // 50)
+        assert payloads["response_bytes"] == stand_in.bytes_sent[Endpoints.PAYLOADS.value]
+        assert payloads["records_in"] == payloads["records_out"] == REALISTIC_COUNTS[Endpoints.PAYLOADS]
+        assert payloads["load_seconds"] > 0
+        assert path.read_text() == metrics.to_prometheus()
+
+    @pytest.mark.parametrize("page_workers", [1, 4])
+    def test_concurrent_pages_are_recorded_once(self, tmp_path: Path, page_workers: int) -> None:
+        """Test that every page is recorded once, whether it was fetched ahead or not"""
+        metrics = PipelineMetrics()
+        pipeline = dlt.pipeline(pipeline_name="pages", pipelines_dir=str(tmp_path), destination="duckdb")
+        with SpaceXStandIn(SpaceXDataGenerator()) as stand_in:
+            source = spacex_api_source(
+                year=2021, month=3, page_workers=page_workers, base_url=stand_in.base_url, metrics=metrics
+            )
+            pipeline.extract(source.with_resources(BronzeSchema.CORES.value))
+
+        pages = [page.page for page in metrics.pages]
+        assert pages == list(range(1, -(-REALISTIC_COUNTS[Endpoints.CORES] // 50) + 1))
@@ -0,0 +1,128 @@
+"""Unit tests for the hive partitioned Parquet lake of the bronze tables"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import dlt
+import duckdb
+import pyarrow as pa
+import pytest
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.parquet_lake import LAKE_DIR_ENV, compact, get_lake_dir, parquet_lake, retire_absent_ids
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_backfill_source, spacex_api_source
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+
+def read_lake(lake_dir: Path, table_name: str, where: str = "true") -> list[tuple]:
+    """Read the rows of a lake table like the dbt external source does"""
+    return duckdb.sql(
+        f"select * from read_parquet('{lake_dir}/{table_name}/**/*.parquet', hive_partitioning = true, "  # noqa: S608
+        f"union_by_name = true) where {where}"
+    ).fetchall()
+
+
+class TestParquetLake:
+    """Test the compaction of the load files and the lake written by the SpaceX sources"""
+
+    def test_get_lake_dir(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the lake is off unless a directory is given or set in the environment"""
+        monkeypatch.delenv(LAKE_DIR_ENV, raising=False)
+        assert get_lake_dir() is None
+        assert get_lake_dir("lake") == Path("lake")
+
+        monkeypatch.setenv(LAKE_DIR_ENV, "lake/env")
+        assert get_lake_dir() == Path("lake/env")
+
+    def test_compact(self) -> None:
+        """Test that a load replaces the rows of earlier loads with its keys and keeps the rows of its own load"""
+        existing = pa.table({"id": ["a", "b", "c"], "_dlt_load_id": ["1", "1", "2"]})
+        rows = pa.table({"id": ["a"], "_dlt_load_id": ["2"]})
+
+        assert sorted(compact(existing, rows, "2", ["id"]).to_pylist(), key=str) == sorted(
+            [{"id": "a", "_dlt_load_id": "2"}, {"id": "b", "_dlt_load_id": "1"}, {"id": "c", "_dlt_load_id": "2"}],
+            key=str,
+        )
+        assert compact(existing, rows, "2", []).column("id").to_pylist() == ["c", "a"]
+        assert compact(existing, rows, "2", None).num_rows == 4
+
+    @pytest.mark.parametrize("version_column", ["_dlt_id", None])
+    def test_compact_scd2(self, version_column: Optional[str]) -> None:
+        """Test that a changed scd2 row retires the current row of its id and an unchanged one keeps it, by the
+        version column hinted or else by the hash of the data columns"""
+        valid_to = pa.array([None, None, datetime(2020, 1, 1, tzinfo=timezone.utc)], type=pa.timestamp("us", tz="UTC"))
+        existing = pa.table({
+            "id": ["a", "b", "a"],
+            "name": ["A1", "B1", "A0"],
+            "_dlt_id": ["a1", "b1", "a0"],
+            "_dlt_load_id": ["1", "1", "0"],
+            "_dlt_valid_to": valid_to,
+        })
+        rows = pa.table({
+            "id": ["a", "b"],
+            "name": ["A2", "B1"],
+            "_dlt_id": ["a2", "b1"],
+            "_dlt_load_id": ["2", "2"],
+            "_dlt_valid_to": pa.nulls(2, type=pa.timestamp("us", tz="UTC")),
+        })
+
+        compacted = compact(existing, rows, "2", ["id"], scd2=True, version_column=version_column)
+
+        assert sorted((row["name"], row["_dlt_load_id"], row["_dlt_valid_to"]) for row in compacted.to_pylist()) == [
+            ("A0", "0", datetime(2020, 1, 1, tzinfo=timezone.utc)),
+            ("A1", "1", datetime(1970, 1, 1, 0, 0, 2, tzinfo=timezone.utc)),
+            ("A2", "2", None),
+            ("B1", "1", None),
+        ]
+
+    def test_sources_write_hive_partitions(self, tmp_path: Path) -> None:
+        """Test that a month reloaded replaces its partition only and the reference tables stay compacted"""
+        lake_dir = tmp_path / "lake"
+        pipeline = dlt.pipeline(
+            pipeline_name="lake", pipelines_dir=str(tmp_path), destination=parquet_lake(lake_dir=str(lake_dir))
+        )
+        with SpaceXStandIn(SpaceXDataGenerator()) as stand_in:
+            pipeline.run(spacex_api_backfill_source(2021, 1, 2021, 6, base_url=stand_in.base_url))
+            backfilled = read_lake(lake_dir, BronzeSchema.LAUNCHES.value)
+            pipeline.run(spacex_api_source(year=2021, month=3, base_url=stand_in.base_url))
+
+        launches_dir = lake_dir / BronzeSchema.LAUNCHES.value
+        assert sorted(path.parent.name for path in launches_dir.glob("year=2021/*/*.parquet")) == [
+            f"month={month}" for month in (1, 2, 3, 4, 5, 6)
+        ]
+        assert len(read_lake(lake_dir, BronzeSchema.LAUNCHES.value)) == len(backfilled)
+        load_ids = {
+            row[0]
+            for row in duckdb.sql(
+                f"select distinct _dlt_load_id from read_parquet('{launches_dir}/**/*.parquet', hive_partitioning = true) "  # noqa: S608
+                "where year = 2021 and month = 3"
+            ).fetchall()
+        }
+        assert load_ids == {pipeline.last_trace.last_normalize_info.loads_ids[0]}
+
+        payloads_dir = lake_dir / BronzeSchema.PAYLOADS.value
+        assert len(list(payloads_dir.glob("*.parquet"))) == 1
+        payloads = read_lake(
+            lake_dir, BronzeSchema.PAYLOADS.value, where="_dlt_valid_from is not null and _dlt_valid_to is null"
+        )
+        assert len(payloads) == REALISTIC_COUNTS[Endpoints.PAYLOADS]
+        # The unchanged payloads keep the validity of the backfill
+        assert len(read_lake(lake_dir, BronzeSchema.PAYLOADS.value)) == REALISTIC_COUNTS[Endpoints.PAYLOADS]
+        assert not (lake_dir / "_dlt_loads").exists()
+
+    def test_retire_absent_ids(self, tmp_path: Path) -> None:
+        """Test that the current rows of the ids not extracted are retired in the compacted file of their table"""
+        table_dir = tmp_path / BronzeSchema.SHIPS.value
+        table_dir.mkdir()
+        duckdb.sql(
+            "copy (select unnest(['a', 'b']) as id, cast(null as timestamptz) as _dlt_valid_to) "
+            f"to '{table_dir}/1.0.parquet'"
+        )
+        retired_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        retire_absent_ids(tmp_path, {BronzeSchema.SHIPS.value: ["b", "c"], BronzeSchema.CORES.value: ["c"]}, retired_at)
+
+        assert sorted(read_lake(tmp_path, BronzeSchema.SHIPS.value)) == [("a", retired_at), ("b", None)]
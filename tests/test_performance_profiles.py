@@ -0,0 +1,84 @@
+"""Unit tests for the performance profiles of the SpaceX pipeline"""
+
+import os
+from pathlib import Path
+
+import dlt
+import pytest
+
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.performance_profiles import (
+    DEFAULT_PROFILE,
+    PERFORMANCE_PROFILES,
+    PerformanceProfile,
+    get_performance_profile,
+    get_profile_config,
+    performance_profile_config,
+)
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+from tests.stand_in.generator import SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+
+class TestPerformanceProfiles:
+    """Test the selection of the profiles and the dlt settings they make"""
+
+    def test_get_performance_profile(self) -> None:
+        """Test that a profile selected by name takes precedence over the profile of the destination"""
+        assert get_performance_profile("duckdb") == PERFORMANCE_PROFILES["duckdb"]
+        assert get_performance_profile("parquet_lake") == PERFORMANCE_PROFILES["duckdb"]
+        assert get_performance_profile("snowflake") == PERFORMANCE_PROFILES["snowflake"]
+        assert get_performance_profile("bigquery") == PERFORMANCE_PROFILES[DEFAULT_PROFILE]
+        assert get_performance_profile("duckdb", "snowflake") == PERFORMANCE_PROFILES["snowflake"]
+
+        with pytest.raises(ValueError, match="Unknown performance profile"):
+            get_performance_profile("duckdb", "fastest")
+
+    def test_get_profile_config(self) -> None:
+        """Test that the file sizes and workers set are in the dlt config of the profile, the ones left unset are not"""
+        profile = PerformanceProfile(
+            loader_file_format="parquet", compression="zstd", buffer_max_items=100, load_workers=2
+        )
+
+        assert get_profile_config(profile) == {
+            "extract.data_writer.buffer_max_items": 100,
+            "normalize.data_writer.buffer_max_items": 100,
+            "normalize.data_writer.compression": "zstd",
+            "load.workers": 2,
+        }
+
+    def test_performance_profile_config_is_scoped_to_the_block(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that the profile is read by dlt in the block, after the environment, and is gone after it"""
+        monkeypatch.delenv("NORMALIZE__WORKERS", raising=False)
+        monkeypatch.setenv("LOAD__WORKERS", "2")
+
+        with performance_profile_config(PERFORMANCE_PROFILES["snowflake"]):
+            assert dlt.config.get("normalize.workers", int) == 4
+            assert dlt.config.get("load.workers", int) == 2
+
+        assert dlt.config.get("normalize.workers", int) is None
+        assert os.environ["LOAD__WORKERS"] == "2"
+
+    def test_duckdb_profile_loads_parquet_files(self, tmp_path: Path) -> None:
+        """Test that the DuckDB profile loads the bronze tables from Parquet files, merged like the default ones"""
+        pipeline = dlt.pipeline(
+            pipeline_name="profiles",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "profiles.duckdb")),
+            dataset_name="bronze",
+        )
+        profile = get_performance_profile(pipeline.destination.destination_name)
+        with SpaceXStandIn(SpaceXDataGenerator()) as stand_in, performance_profile_config(profile):
+            load_info = pipeline.run(
+                spacex_api_source(year=2021, month=3, base_url=stand_in.base_url),
+                loader_file_format=profile.loader_file_format,
+            )
+
+        completed_jobs = [job for package in load_info.load_packages for job in package.jobs["completed_jobs"]]
+        table_jobs = [job for job in completed_jobs if job.job_file_info.table_name in {t.value for t in BronzeSchema}]
+        # The merges of the tables follow the loaded files as sql jobs
+        assert {job.job_file_info.file_format for job in table_jobs} == {"parquet", "sql"}
+        with pipeline.sql_client() as client:
+            rows = client.execute_sql(f"select count(*), count(_dlt_valid_from) from {BronzeSchema.ROCKETS.value}")  # noqa: S608
+        assert rows[0][0] > 0
+        assert rows[0][0] == rows[0][1]
@@ -1,6 +1,19 @@
 from typing import Any
 
-from dlt_dbt_dagster.utils.processing_utils import add_year_month, get_month_range, keep_specific_columns
+import pyarrow as pa
+import pytest
+
+from dlt_dbt_dagster.utils.processing_utils import (
+    add_year_month,
+    add_year_month_columns,
+    add_year_month_columns_from_date,
+    add_year_month_from_date,
+    get_month_range,
+    hash_row,
+    keep_projected_columns,
+    keep_specific_columns,
+    make_arrow_table,
+)
 
 
 class TestProcessingUtils:
@@ -48,6 +61,25 @@ class TestProcessingUtils:
         expected: dict[str, Any] = {}
         assert result == expected
 
+    def test_keep_projected_columns_passes_projected_record(self) -> None:
+        """Test keep_projected_columns returns a record already projected by the API unchanged"""
+        record = {"id": 1, "name": "Test"}
+
+        result_func = keep_projected_columns(["id", "name", "details"])
+        result = result_func(record)
+
+        assert result is record
+
+    def test_keep_projected_columns_filters_unprojected_record(self, sample_launch_record: dict[str, Any]) -> None:
+        """Test keep_projected_columns falls back to filtering when the API returned extra columns"""
+        columns_to_keep = ["id", "name", "flight_number"]
+
+        result_func = keep_projected_columns(columns_to_keep)
+        result = result_func(sample_launch_record)
+
+        expected: dict[str, Any] = {"id": "test_id_123", "name": "Test Launch", "flight_number": 100}
+        assert result == expected
+
     def test_get_month_range_regular_month(self) -> None:
         """Test get_month_range for a regular month (not December)"""
         year, month = 2021, 3
@@ -103,3 +135,92 @@ class TestProcessingUtils:
 
         expected: dict[str, Any] = {"id": "test_id_123", "name": "Test Launch", "flight_number": 100}
         assert result == expected
+
+    def test_add_year_month_from_date(self, sample_launch_record: dict[str, Any]) -> None:
+        """Test add_year_month_from_date routes the record to the month of its date_utc"""
+        result_func = add_year_month_from_date()
+        result = result_func(sample_launch_record)
+
+        assert result["year"] == 2021
+        assert result["month"] == 3
+
+    def test_add_year_month_from_date_with_milliseconds(self) -> None:
+        """Test add_year_month_from_date with the millisecond timestamps returned by the SpaceX API"""
+        record = {"id": 1, "date_utc": "2020-12-31T23:59:59.000Z"}
+
+        result_func = add_year_month_from_date(date_column="date_utc")
+        result = result_func(record)
+
+        expected: dict[str, Any] = {"id": 1, "date_utc": "2020-12-31T23:59:59.000Z", "year": 2020, "month": 12}
+        assert result == expected
+
+    def test_make_arrow_table_projects_and_types_columns(self, sample_launch_record: dict[str, Any]) -> None:
+        """Test make_arrow_table keeps only the given columns with their Arrow types"""
+        column_types = {"id": "text", "flight_number": "bigint", "date_utc": "timestamp", "payloads": "json"}
+
+        result_func = make_arrow_table(column_types)
+        result = result_func([sample_launch_record, {"id": "test_id_456"}])
+
+        assert result.column_names == ["id", "flight_number", "date_utc", "payloads"]
+        assert result.schema.field("flight_number").type == pa.int64()
+        assert result.schema.field("date_utc").type == pa.timestamp("us", tz="UTC")
+        assert result.schema.field("payloads").type == pa.list_(pa.string())
+        assert result.column("flight_number").to_pylist() == [100, None]
+
+    def test_make_arrow_table_casts_mismatched_values(self) -> None:
+        """Test make_arrow_table casts integer values of double columns"""
+        result_func = make_arrow_table({"mass_kg": "double"})
+        result = result_func([{"mass_kg": 20}, {"mass_kg": 3.5}])
+
+        assert result.schema.field("mass_kg").type == pa.float64()
+        assert result.column("mass_kg").to_pylist() == [20.0, 3.5]
+
+    def test_make_arrow_table_rejects_values_of_another_type(self) -> None:
+        """Test make_arrow_table fails on values its column type does not hold rather than casting them unsafely"""
+        result_func = make_arrow_table({"flight_number": "bigint"})
+
+        with pytest.raises((pa.ArrowInvalid, pa.ArrowTypeError)):
+            result_func([{"flight_number": "12"}])
+
+    def test_hash_row_ignores_dropped_columns_and_key_order(self) -> None:
+        """Test that the hash only covers the kept columns and not their order"""
+        columns = ["id", "name", "status"]
+        row = {"id": "c1", "name": "B1049", "status": "active"}
+
+        assert hash_row(row, columns) == hash_row({"status": "active", "id": "c1", "name": "B1049"}, columns)
+        assert hash_row(row, columns) == hash_row({**row, "links": {"reddit": None}}, columns)
+        assert hash_row(row, columns) != hash_row({**row, "status": "lost"}, columns)
+        assert len(hash_row(row, columns)) == 16
+
+    def test_make_arrow_table_row_hash_column(self) -> None:
+        """Test make_arrow_table hashes the content of the kept columns of each row, the same for the same content"""
+        result_func = make_arrow_table({"id": "text", "status": "text"}, row_hash_column="row_hash")
+        result = result_func([{"id": "c1", "status": "active", "links": {}}, {"id": "c1", "status": "lost"}])
+        rerun = result_func([{"status": "active", "id": "c1"}])
+
+        assert result.column_names == ["id", "status", "row_hash"]
+        first_hash, changed_hash = result.column("row_hash").to_pylist()
+        assert first_hash != changed_hash
+        assert rerun.column("row_hash").to_pylist() == [first_hash]
+
+    def test_add_year_month_columns(self) -> None:
+        """Test add_year_month_columns adds constant year and month columns"""
+        table = pa.table({"id": ["a", "b"]})
+
+        result_func = add_year_month_columns(2021, 3)
+        result = result_func(table)
+
+        assert result.column("year").to_pylist() == [2021, 2021]
+        assert result.column("month").to_pylist() == [3, 3]
+
+    def test_add_year_month_columns_from_date(self, sample_launch_record: dict[str, Any]) -> None:
+        """Test add_year_month_columns_from_date derives the partition of every row from its date_utc"""
+        records = [sample_launch_record, {"date_utc": "2020-12-31T23:59:59.000Z"}]
+        table = make_arrow_table({"date_utc": "timestamp", "year": "bigint"})(records)
+
+        result_func = add_year_month_columns_from_date(date_column="date_utc")
+        result = result_func(table)
+
+        assert result.column_names == ["date_utc", "year", "month"]
+        assert result.column("year").to_pylist() == [2021, 2020]
+        assert result.column("month").to_pylist() == [3, 12]
@@ -0,0 +1,93 @@
+"""Unit tests for the profiling mode of the SpaceX pipeline"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dlt_dbt_dagster.dlt.profiling import PROFILE_DIR_ENV, RunProfile, SamplingProfiler, get_profile_dir, profile_run
+from dlt_dbt_dagster.dlt.spacex_pipeline import load_spacex_bronze_data
+
+
+def spin(seconds: float) -> None:
+    """Keep the CPU busy for the given seconds"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+class TestProfiling:
+    """Test the sampling profiler and the run profile"""
+
+    def test_get_profile_dir(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that profiling is off unless a directory is given or set in the environment"""
+        monkeypatch.delenv(PROFILE_DIR_ENV, raising=False)
+        assert get_profile_dir() is None
+        assert get_profile_dir("profiles") == Path("profiles")
+
+        monkeypatch.setenv(PROFILE_DIR_ENV, "profiles/env")
+        assert get_profile_dir() == Path("profiles/env")
+        assert get_profile_dir("profiles") == Path("profiles")
+
+    def test_profile_run_is_off_without_directory(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that nothing is profiled without a profile directory"""
+        monkeypatch.delenv(PROFILE_DIR_ENV, raising=False)
+        with profile_run() as profile:
+            assert profile is None
+
+    def test_sampling_profiler_skips_waiting_threads(self) -> None:
+        """Test that the busy function is a hotspot and the threads waiting for work are not"""
+        stopped = threading.Event()
+        waiting = threading.Thread(target=stopped.wait, name="waiting")
+        waiting.start()
+        profiler = SamplingProfiler(interval_seconds=0.001)
+        profiler.start()
+        spin(0.2)
+        profiler.stop()
+        stopped.set()
+        waiting.join()
+
+        hotspots = [function for function, _, _ in profiler.hotspots()]
+        assert any(function.startswith("spin (") for function in hotspots)
+        assert not any(stack[0] == "waiting" for stack in profiler.busy_stacks())
+        assert any(stack[0] == "waiting" for stack in profiler.stacks)
+
+    def test_run_profile_writes_flamegraph_and_summary(self, tmp_path: Path) -> None:
+        """Test that a run writes its folded stacks and its summary to a directory of its own"""
+        started_at = datetime(2021, 3, 1)
+        trace = Mock(
+            steps=[
+                Mock(step="extract", started_at=started_at, finished_at=started_at + timedelta(seconds=2)),
+                Mock(step="load", started_at=started_at, finished_at=started_at + timedelta(seconds=1)),
+            ]
+        )
+        with RunProfile(tmp_path, interval_seconds=0.001, top_n=5) as profile:
+            spin(0.1)
+            allocated = [bytearray(1024) for _ in range(1000)]
+            profile.record_trace(trace)
+
+        assert allocated
+        assert profile.output_dir.parent == tmp_path
+        folded = (profile.output_dir / "cpu.folded").read_text().splitlines()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+        assert any("spin (" in line for line in folded)
+        summary = (profile.output_dir / "summary.txt").read_text()
+        assert "  extract          2.000" in summary
+        assert "  load             1.000" in summary
+        assert "test_profiling.py" in summary.split("allocation sites")[1]
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.profile_run")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source")
+    def test_load_spacex_bronze_data_profiles_the_run(
+        self, mock_source: Mock, mock_pipeline_class: Mock, mock_profile_run: Mock
+    ) -> None:
+        """Test that the load runs in the profile of the given directory and records its trace"""
+        load_spacex_bronze_data(year=2021, month=3, profile_dir="profiles")
+
+        mock_profile_run.assert_called_once_with("profiles")
+        profile = mock_profile_run.return_value.__enter__.return_value
+        profile.record_trace.assert_called_once_with(mock_pipeline_class.return_value.last_trace)
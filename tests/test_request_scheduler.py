@@ -0,0 +1,127 @@
+"""Unit tests for the rate limited request scheduler of the SpaceX API source"""
+
+import threading
+import time
+from email.utils import formatdate
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import dlt
+import pytest
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.request_scheduler import RateLimitAdapter, RequestScheduler, TokenBucket, parse_retry_after
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+
+def make_response(status_code: int, retry_after: str = "") -> Mock:
+    """Mock a response with the given status code and Retry-After header"""
+    return Mock(status_code=status_code, headers={"Retry-After": retry_after} if retry_after else {})
+
+
+class TestRequestScheduler:
+    """Test the token buckets, the coordinated backoff and the rate limited adapter"""
+
+    def test_parse_retry_after(self) -> None:
+        """Test that Retry-After is read in seconds or as an HTTP date"""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert 8 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10  # type: ignore[operator]
+
+    def test_token_bucket_spaces_requests_at_the_rate(self) -> None:
+        """Test that the requests past the burst wait for their token in turn"""
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        waits = [bucket.reserve() for _ in range(4)]
+
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] == pytest.approx(0.05, abs=0.01)
+        assert waits[3] == pytest.approx(0.1, abs=0.01)
+
+    def test_endpoint_rate(self) -> None:
+        """Test that an endpoint with a rate of its own waits for it on top of the global rate"""
+        scheduler = RequestScheduler(requests_per_second=1000, endpoint_requests_per_second={"cores/query": 1})
+        url = "http://localhost:8000/v4/cores/query"
+
+        assert scheduler.get_endpoint_bucket("http://localhost:8000/v4/ships/query") is None
+        scheduler.acquire(url)
+        started = time.perf_counter()
+        scheduler.acquire("http://localhost:8000/v4/ships/query")
+        assert time.perf_counter() - started < 0.1
+        assert scheduler.get_endpoint_bucket(url).reserve() > 0.9  # type: ignore[union-attr]
+
+    def test_throttled_response_pauses_every_worker(self) -> None:
+        """Test that a Retry-After received by one worker delays the requests of the others"""
+        scheduler = RequestScheduler(requests_per_second=1000, jitter=0)
+        waited = []
+
+        def request() -> None:
+            started = time.perf_counter()
+            scheduler.acquire("http://localhost:8000/v4/rockets/query")
+            waited.append(time.perf_counter() - started)
+
+        assert scheduler.record_response(make_response(429, retry_after="0.2"))
+        workers = [threading.Thread(target=request) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert len(waited) == 3
+        assert min(waited) > 0.15
+        assert scheduler.throttled == 1
+
+    def test_backoff_without_retry_after(self) -> None:
+        """Test that consecutive throttled responses back off exponentially with jitter, a success resets it"""
+        scheduler = RequestScheduler(base_delay_seconds=1.0, max_delay_seconds=3.0, jitter=0.5)
+        pauses = []
+        for response in [make_response(503)] * 3 + [make_response(200), make_response(429)]:
+            scheduler.paused_until = 0.0
+            scheduler.record_response(response)
+            pauses.append(scheduler.paused_until - time.monotonic())
+
+        assert 0.9 < pauses[0] <= 1.5
+        assert 1.9 < pauses[1] <= 3.0
+        assert 2.9 < pauses[2] <= 4.5
+        assert pauses[3] < 0
+        assert 0.9 < pauses[4] <= 1.5
+
+    def test_adapter_retries_throttled_requests(self) -> None:
+        """Test that the adapter retries a throttled request after the pause, up to the max attempts"""
+        scheduler = RequestScheduler(requests_per_second=1000, max_attempts=3, jitter=0)
+        delegate = Mock()
+        adapter = RateLimitAdapter(scheduler, delegate=delegate)
+        request = Mock(url="http://localhost:8000/v4/payloads/query")
+
+        delegate.send.side_effect = [make_response(429, retry_after="0.01"), make_response(200)]
+        assert adapter.send(request).status_code == 200
+
+        delegate.send.side_effect = [make_response(429, retry_after="0")] * 3
+        assert adapter.send(request).status_code == 429
+        assert delegate.send.call_count == 5
+
+    def test_source_with_scheduler_loads_every_row(self, tmp_path: Path) -> None:
+        """Test that the prefetched pages of the parallelized resources all go through the scheduler"""
+        scheduler = RequestScheduler(requests_per_second=200)
+        pipeline = dlt.pipeline(
+            pipeline_name="scheduled",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "scheduled.duckdb")),
+            dataset_name="bronze",
+        )
+        with (
+            SpaceXStandIn(SpaceXDataGenerator()) as stand_in,
+            patch.object(scheduler, "acquire", wraps=scheduler.acquire) as mock_acquire,
+        ):
+            source = spacex_api_source(
+                year=2021, month=3, page_workers=3, parallelized=True, base_url=stand_in.base_url, scheduler=scheduler
+            )
+            pipeline.run(source)
+
+        row_counts = pipeline.last_trace.last_normalize_info.row_counts
+        assert row_counts[BronzeSchema.PAYLOADS.value] == REALISTIC_COUNTS[Endpoints.PAYLOADS]
+        assert mock_acquire.call_count == sum(stand_in.requests.values())
@@ -0,0 +1,176 @@
+"""Unit tests for the SpaceX API response cache"""
+
+import hashlib
+import json
+import threading
+from collections import Counter
+from collections.abc import Generator
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import pytest
+from dlt.sources.helpers.rest_client import RESTClient
+
+from dlt_dbt_dagster.dlt.custom_paginator import CustomJsonPaginator
+from dlt_dbt_dagster.dlt.response_cache import ResponseCache, fingerprint_endpoint
+
+TOTAL_DOCS = 12
+BODY = {"query": {}, "options": {"limit": 5}}
+
+
+class QueryServer:
+    """Local server answering SpaceX style `/query` POSTs, with an ETag per page when `send_etags` is set"""
+
+    def __init__(self) -> None:
+        self.docs = [{"id": f"doc_{index}"} for index in range(TOTAL_DOCS)]
+        self.send_etags = True
+        self.requests: Counter = Counter()
+        self.not_modified = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def make_handler(self) -> type[BaseHTTPRequestHandler]:
+        query_server = self
+
+        class QueryHandler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                page, limit = body["options"].get("page", 1), body["options"]["limit"]
+                query_server.requests[self.path] += 1
+                docs = query_server.docs
+                total_pages = -(-len(docs) // limit)
+                payload = json.dumps({
+                    "docs": docs[(page - 1) * limit : page * limit],
+                    "totalPages": total_pages,
+                    "page": page,
+                    "hasNextPage": page < total_pages,
+                }).encode()
+                etag = f'"{hashlib.sha256(payload).hexdigest()}"'
+                if query_server.send_etags and self.headers.get("If-None-Match") == etag:
+                    query_server.not_modified += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if query_server.send_etags:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                pass
+
+        return QueryHandler
+
+
+@pytest.fixture
+def query_server() -> Generator[QueryServer, None, None]:
+    """Local `/query` server running in a background thread"""
+    server = QueryServer()
+    thread = threading.Thread(target=server.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def fingerprint(query_server: QueryServer, cache: ResponseCache, path: str = "rockets/query") -> str:
+    """Fingerprint an endpoint of the local server through a caching session"""
+    session = cache.make_session(["rockets/query"])
+    return fingerprint_endpoint(query_server.base_url, session, CustomJsonPaginator(), path, BODY)
+
+
+def fetch_pages(query_server: QueryServer, cache: ResponseCache) -> list[bytes]:
+    """Page through an endpoint of the local server through a caching session, like the extraction does"""
+    client = RESTClient(
+        query_server.base_url, paginator=CustomJsonPaginator(), session=cache.make_session(["rockets/query"])
+    )
+    pages = client.paginate("rockets/query", method="POST", json=deepcopy(BODY), data_selector="docs[*]")
+    return [page.response.content for page in pages]
+
+
+class TestResponseCache:
+    """Test the on-disk response cache and the endpoint fingerprints"""
+
+    def test_fresh_responses_are_served_from_disk(self, query_server: QueryServer, tmp_path: Path) -> None:
+        """Test that a fresh cache answers the same requests without calling the server, even after a restart"""
+        first = fetch_pages(query_server, ResponseCache(tmp_path / "cache.sqlite"))
+        second = fetch_pages(query_server, ResponseCache(tmp_path / "cache.sqlite"))
+
+        assert first == second
+        assert query_server.requests["/rockets/query"] == 3
+
+    def test_fingerprint_revalidates_fresh_responses(self, query_server: QueryServer, tmp_path: Path) -> None:
+        """Test that the fingerprint asks the server even while the cache is fresh, and sees a change within the TTL"""
+        cache = ResponseCache(tmp_path / "cache.sqlite")
+
+        first = fingerprint(query_server, cache)
+        unchanged = fingerprint(query_server, cache)
+        query_server.docs[7]["id"] = "doc_changed"
+        changed = fingerprint(query_server, cache)
+        cached_pages = fetch_pages(query_server, cache)
+
+        assert first == unchanged
+        assert changed != first
+        assert query_server.requests["/rockets/query"] == 9
+        assert query_server.not_modified == 5
+        assert b"doc_changed" in cached_pages[1]
+        assert query_server.requests["/rockets/query"] == 9
+
+    def test_stale_responses_are_revalidated_with_etag(self, query_server: QueryServer, tmp_path: Path) -> None:
+        """Test that stale responses are revalidated and a 304 is answered from the cache"""
+        cache = ResponseCache(tmp_path / "cache.sqlite", ttl_seconds=0)
+
+        first = fingerprint(query_server, cache)
+        second = fingerprint(query_server, cache)
+
+        assert first == second
+        assert query_server.requests["/rockets/query"] == 6
+        assert query_server.not_modified == 3
+
+    def test_content_hash_without_validators(self, query_server: QueryServer, tmp_path: Path) -> None:
+        """Test that without ETags the fingerprint follows the content of the pages"""
+        query_server.send_etags = False
+        cache = ResponseCache(tmp_path / "cache.sqlite", ttl_seconds=0)
+
+        first = fingerprint(query_server, cache)
+        unchanged = fingerprint(query_server, cache)
+        query_server.docs[7]["id"] = "doc_changed"
+        changed = fingerprint(query_server, cache)
+
+        assert first == unchanged
+        assert changed != first
+        assert query_server.not_modified == 0
+
+    def test_key_ignores_body_key_order(self, query_server: QueryServer, tmp_path: Path) -> None:
+        """Test that the same request body with keys in another order hits the same cache entry"""
+        cache = ResponseCache(tmp_path / "cache.sqlite")
+        session = cache.make_session(["rockets/query"])
+
+        session.post(f"{query_server.base_url}rockets/query", json={"query": {}, "options": {"limit": 5}})
+        session.post(f"{query_server.base_url}rockets/query", json={"options": {"limit": 5}, "query": {}})
+
+        assert query_server.requests["/rockets/query"] == 1
+
+    def test_other_endpoints_are_not_cached(self, query_server: QueryServer, tmp_path: Path) -> None:
+        """Test that only the configured endpoint paths go through the cache"""
+        cache = ResponseCache(tmp_path / "cache.sqlite")
+
+        fingerprint(query_server, cache, path="launches/query")
+        fingerprint(query_server, cache, path="launches/query")
+
+        assert query_server.requests["/launches/query"] == 6
+
+    def test_lru_eviction_by_size(self, query_server: QueryServer, tmp_path: Path) -> None:
+        """Test that the least recently used responses are evicted once the cache outgrows max_bytes"""
+        cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=200)
+
+        fingerprint(query_server, cache)
+
+        (entries, total_size) = cache.connection.execute("select count(*), sum(size) from responses").fetchone()
+        assert total_size <= 200
+        assert entries < 3
@@ -0,0 +1,76 @@
+"""Unit tests for the row fingerprint index"""
+
+from unittest.mock import Mock, patch
+
+from dlt_dbt_dagster.dlt.row_fingerprints import ROW_FINGERPRINTS_STATE_KEY, RowFingerprintIndex
+
+COLUMNS = ["id", "name", "status"]
+
+
+def filter_rows(state: dict, rows: list[dict], skip_unchanged: bool = True) -> tuple[RowFingerprintIndex, list[dict]]:
+    """Run the rows through a fresh index filter over the given source state"""
+    row_fingerprints = RowFingerprintIndex(skip_unchanged=skip_unchanged)
+    is_new_or_changed = row_fingerprints.make_filter("bronze_cores", columns=COLUMNS)
+    with patch("dlt_dbt_dagster.dlt.row_fingerprints.dlt.current.source_state", Mock(return_value=state)):
+        kept = [row for row in rows if is_new_or_changed(row)]
+    return row_fingerprints, kept
+
+
+class TestRowFingerprintIndex:
+    """Test the id to row hash index kept in the dlt source state"""
+
+    def test_first_run_forwards_every_row(self) -> None:
+        """Test that without a previous index every row is forwarded and indexed in the state"""
+        state: dict = {}
+        rows = [{"id": "c1", "status": "active"}, {"id": "c2", "status": "lost"}]
+
+        row_fingerprints, kept = filter_rows(state, rows)
+
+        assert kept == rows
+        assert set(state[ROW_FINGERPRINTS_STATE_KEY]["bronze_cores"]) == {"c1", "c2"}
+        assert row_fingerprints.extracted_ids() == {"bronze_cores": ["c1", "c2"]}
+
+    def test_next_run_forwards_new_and_changed_rows(self) -> None:
+        """Test that only new or changed rows are forwarded and that the ids of every row are reported extracted"""
+        state: dict = {}
+        filter_rows(state, [{"id": "c1", "status": "active"}, {"id": "c2", "status": "lost"}, {"id": "c3"}])
+
+        row_fingerprints, kept = filter_rows(
+            state, [{"id": "c1", "status": "active"}, {"id": "c2", "status": "retired"}, {"id": "c4"}]
+        )
+
+        assert kept == [{"id": "c2", "status": "retired"}, {"id": "c4"}]
+        assert set(state[ROW_FINGERPRINTS_STATE_KEY]["bronze_cores"]) == {"c1", "c2", "c4"}
+        assert row_fingerprints.extracted_ids() == {"bronze_cores": ["c1", "c2", "c4"]}
+
+    def test_index_without_skipping_forwards_every_row(self) -> None:
+        """Test that an index not skipping unchanged rows forwards every row and keeps indexing them"""
+        state: dict = {}
+        rows = [{"id": "c1", "status": "active"}, {"id": "c2", "status": "lost"}]
+        filter_rows(state, rows)
+
+        _, kept = filter_rows(state, [*rows, {"id": "c3"}], skip_unchanged=False)
+        _, kept_after = filter_rows(state, [*rows, {"id": "c3"}])
+
+        assert kept == [*rows, {"id": "c3"}]
+        assert kept_after == []
+
+    def test_tables_not_extracted_report_no_removals(self) -> None:
+        """Test that a table without rows in this run keeps its index and is not reported extracted"""
+        state = {ROW_FINGERPRINTS_STATE_KEY: {"bronze_ships": {"s1": "0123456789abcdef"}}}
+
+        row_fingerprints, _ = filter_rows(state, [{"id": "c1"}])
+
+        assert row_fingerprints.extracted_ids() == {"bronze_cores": ["c1"]}
+        assert state[ROW_FINGERPRINTS_STATE_KEY]["bronze_ships"] == {"s1": "0123456789abcdef"}
+
+    def test_response_hook_starts_a_table_without_rows(self) -> None:
+        """Test that a table whose endpoint answered without rows is reported extracted without any id"""
+        state = {ROW_FINGERPRINTS_STATE_KEY: {"bronze_ships": {"s1": "0123456789abcdef"}}}
+        row_fingerprints = RowFingerprintIndex()
+
+        with patch("dlt_dbt_dagster.dlt.row_fingerprints.dlt.current.source_state", Mock(return_value=state)):
+            row_fingerprints.make_response_hook("bronze_ships")(Mock())
+
+        assert row_fingerprints.extracted_ids() == {"bronze_ships": []}
+        assert state[ROW_FINGERPRINTS_STATE_KEY]["bronze_ships"] == {}
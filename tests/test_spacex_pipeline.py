@@ -1,12 +1,42 @@
 """Unit tests for SpaceX pipeline functionality"""
 
-from unittest.mock import Mock, patch
+import os
+from functools import partial
+from pathlib import Path
+from typing import Optional
+from unittest.mock import ANY, MagicMock, Mock, patch
 
+import dlt
 import pytest
 
 from dlt_dbt_dagster.constants.endpoints import BASE_URL, Endpoints
 from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
-from dlt_dbt_dagster.dlt.spacex_pipeline import MONTH, YEAR, load_spacex_bronze_data, spacex_api_source
+from dlt_dbt_dagster.dlt.custom_paginator import PrefetchAdapter
+from dlt_dbt_dagster.dlt.performance_profiles import PERFORMANCE_PROFILES
+from dlt_dbt_dagster.dlt.request_scheduler import get_pooled_adapter
+from dlt_dbt_dagster.dlt.response_cache import ResponseCache
+from dlt_dbt_dagster.dlt.row_fingerprints import RowFingerprintIndex
+from dlt_dbt_dagster.dlt.spacex_pipeline import (
+    ARROW_NORMALIZER_CONFIG,
+    EXTRACT_WORKERS_ENV,
+    FIRST_LAUNCH_DATE,
+    MONTH,
+    PRODUCTION_PIPELINE_NAME,
+    YEAR,
+    add_row_fingerprints,
+    arrow_batches_config,
+    check_arrow_batches,
+    extract_workers_limit,
+    load_spacex_bronze_backfill,
+    load_spacex_bronze_data,
+    load_spacex_bronze_incremental,
+    retire_absent_rows,
+    spacex_api_backfill_source,
+    spacex_api_incremental_source,
+    spacex_api_source,
+)
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
 
 
 class TestSpaceXPipeline:
@@ -112,6 +142,133 @@ class TestSpaceXPipeline:
         second_step = processing_steps[1]
         assert "map" in second_step
 
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_source_select_projection(self, mock_rest_api_resources: Mock) -> None:
+        """Test that every endpoint requests only its bronze columns through the `select` option"""
+        mock_rest_api_resources.return_value = []
+
+        list(spacex_api_source(year=2021, month=3))
+
+        config = mock_rest_api_resources.call_args[0][0]
+        for resource in config["resources"]:
+            options = resource["endpoint"]["json"]["options"]
+            assert options["limit"] == 50
+            assert list(options["select"]) == BronzeSchema.get_columns(resource["name"])
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.add_arrow_batches")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_source_arrow_batches(self, mock_rest_api_resources: Mock, mock_add_arrow_batches: Mock) -> None:
+        """Test that arrow_batches replaces the per-record processing steps with Arrow page steps"""
+        mock_rest_api_resources.return_value = []
+        mock_add_arrow_batches.return_value = []
+
+        list(spacex_api_source(year=2021, month=3, arrow_batches=True))
+
+        config = mock_rest_api_resources.call_args[0][0]
+        assert all("processing_steps" not in resource for resource in config["resources"])
+        mock_add_arrow_batches.assert_called_once()
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_source_page_workers(self, mock_rest_api_resources: Mock) -> None:
+        """Test that page_workers switches the paginator to concurrent mode with a prefetching session, both modes
+        sending on the pooled connections"""
+        mock_rest_api_resources.return_value = []
+
+        list(spacex_api_source(year=2021, month=3))
+        sequential_client = mock_rest_api_resources.call_args[0][0]["client"]
+
+        list(spacex_api_source(year=2021, month=3, page_workers=4))
+        concurrent_client = mock_rest_api_resources.call_args[0][0]["client"]
+
+        assert sequential_client["paginator"].max_workers == 1
+        assert sequential_client["session"].get_adapter(BASE_URL) is get_pooled_adapter()
+        assert concurrent_client["paginator"].max_workers == 4
+        assert concurrent_client["session"].get_adapter(BASE_URL) is concurrent_client["paginator"].prefetch_adapter
+        assert concurrent_client["paginator"].prefetch_adapter.delegate is get_pooled_adapter()
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_source_parallelized(self, mock_rest_api_resources: Mock) -> None:
+        """Test that parallelized marks every resource for concurrent extraction"""
+        mock_rest_api_resources.return_value = []
+
+        list(spacex_api_source(year=2021, month=3))
+        sequential_defaults = mock_rest_api_resources.call_args[0][0]["resource_defaults"]
+
+        list(spacex_api_source(year=2021, month=3, parallelized=True))
+        parallel_defaults = mock_rest_api_resources.call_args[0][0]["resource_defaults"]
+
+        assert sequential_defaults["parallelized"] is False
+        assert parallel_defaults["parallelized"] is True
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.current.source_state")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.fingerprint_endpoint")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_source_skips_unchanged_reference_resources(
+        self, mock_rest_api_resources: Mock, mock_fingerprint_endpoint: Mock, mock_source_state: Mock, tmp_path: Path
+    ) -> None:
+        """Test that cache_responses drops the reference resources whose fingerprint matches the last load"""
+        mock_rest_api_resources.return_value = []
+        mock_fingerprint_endpoint.side_effect = lambda base_url, session, paginator, path, body: Endpoints(path).value
+        mock_source_state.return_value = {
+            "reference_fingerprints": {"bronze_rockets": "rockets/query", "bronze_ships": "ships/query_outdated"}
+        }
+
+        with patch("dlt_dbt_dagster.dlt.spacex_pipeline.ResponseCache", return_value=ResponseCache(tmp_path / "db")):
+            list(spacex_api_source(year=2021, month=3, cache_responses=True))
+
+        config = mock_rest_api_resources.call_args[0][0]
+        resource_names = [resource["name"] for resource in config["resources"]]
+        fingerprinted_paths = [call.args[3] for call in mock_fingerprint_endpoint.call_args_list]
+        assert BronzeSchema.ROCKETS not in resource_names
+        assert BronzeSchema.SHIPS in resource_names
+        assert resource_names[0] == BronzeSchema.LAUNCHES
+        assert len(resource_names) == 5
+        assert Endpoints.LAUNCHES not in fingerprinted_paths
+        assert mock_fingerprint_endpoint.call_args_list[0].args[4]["options"]["select"] == BronzeSchema.get_select(
+            BronzeSchema.ROCKETS
+        )
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_backfill_source_date_range(self, mock_rest_api_resources: Mock) -> None:
+        """Test that spacex_api_backfill_source issues a single launches query over the whole range"""
+        mock_rest_api_resources.return_value = []
+
+        list(spacex_api_backfill_source(start_year=2020, start_month=11, end_year=2021, end_month=3))
+
+        mock_rest_api_resources.assert_called_once()
+        config = mock_rest_api_resources.call_args[0][0]
+        launches_resource = config["resources"][0]
+        query = launches_resource["endpoint"]["json"]["query"]
+
+        assert query["date_utc"]["$gte"] == "2020-11-01T00:00:00Z"
+        assert query["date_utc"]["$lt"] == "2021-04-01T00:00:00Z"
+        assert launches_resource["merge_key"] == ["year", "month"]
+        assert launches_resource["write_disposition"] == {"disposition": "merge", "strategy": "delete-insert"}
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_backfill_source_partitions_by_launch_date(
+        self, mock_rest_api_resources: Mock, sample_launch_record: dict
+    ) -> None:
+        """Test that spacex_api_backfill_source routes each launch to the month of its date_utc"""
+        mock_rest_api_resources.return_value = []
+
+        list(spacex_api_backfill_source(start_year=2020, start_month=11, end_year=2021, end_month=3))
+
+        config = mock_rest_api_resources.call_args[0][0]
+        add_partition = config["resources"][0]["processing_steps"][1]["map"]
+
+        assert add_partition({"date_utc": "2020-11-05T10:00:00.000Z"}) == {
+            "date_utc": "2020-11-05T10:00:00.000Z",
+            "year": 2020,
+            "month": 11,
+        }
+        assert add_partition(sample_launch_record)["month"] == 3
+
+    def test_spacex_api_backfill_source_invalid_range(self) -> None:
+        """Test that spacex_api_backfill_source rejects a start month after the end month"""
+        with pytest.raises(ValueError, match="after end"):
+            list(spacex_api_backfill_source(start_year=2021, start_month=5, end_year=2021, end_month=3))
+
     @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
     @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source")
     def test_load_spacex_bronze_data_pipeline_config(self, mock_source: Mock, mock_pipeline_class: Mock) -> None:
@@ -138,11 +295,15 @@ class TestSpaceXPipeline:
         # Verify pipeline.run was called
         mock_pipeline.run.assert_called_once()
 
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.performance_profile_config")
     @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
     @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source")
-    def test_load_spacex_bronze_data_source_called(self, mock_source: Mock, mock_pipeline_class: Mock) -> None:
+    def test_load_spacex_bronze_data_source_called(
+        self, mock_source: Mock, mock_pipeline_class: Mock, mock_performance_profile_config: Mock
+    ) -> None:
         """Test that load_spacex_bronze_data calls spacex_api_source with correct parameters"""
         mock_pipeline = Mock()
+        mock_pipeline.destination.destination_name = "duckdb"
         mock_pipeline_class.return_value = mock_pipeline
         mock_pipeline.run.return_value = Mock()
 
@@ -151,10 +312,243 @@ class TestSpaceXPipeline:
         load_spacex_bronze_data(year=2021, month=3)
 
         # Verify spacex_api_source was called with correct parameters
-        mock_source.assert_called_once_with(year=2021, month=3)
+        mock_source.assert_called_once_with(
+            year=2021,
+            month=3,
+            page_workers=1,
+            arrow_batches=False,
+            parallelized=False,
+            cache_responses=False,
+            row_fingerprints=ANY,
+            metrics=None,
+            stream_pages=False,
+            page_sizer=None,
+            scheduler=None,
+            exit_stack=ANY,
+        )
+
+        # Verify the source was passed to pipeline.run, loaded with the performance profile of DuckDB
+        mock_performance_profile_config.assert_called_once_with(PERFORMANCE_PROFILES["duckdb"])
+        mock_pipeline.run.assert_called_once_with(mock_source.return_value, loader_file_format="parquet")
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.extract_workers_limit")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source")
+    def test_load_spacex_bronze_data_parallelized(
+        self, mock_source: Mock, mock_pipeline_class: Mock, mock_extract_workers_limit: Mock
+    ) -> None:
+        """Test that load_spacex_bronze_data caps the extract workers and parallelizes the source"""
+        mock_source.return_value = []
+
+        load_spacex_bronze_data(year=2021, month=3, parallelized=True, extract_workers=3)
+
+        mock_extract_workers_limit.assert_called_once_with(3)
+        mock_source.assert_called_once_with(
+            year=2021,
+            month=3,
+            page_workers=1,
+            arrow_batches=False,
+            parallelized=True,
+            cache_responses=False,
+            row_fingerprints=ANY,
+            metrics=None,
+            stream_pages=False,
+            page_sizer=None,
+            scheduler=None,
+            exit_stack=ANY,
+        )
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source")
+    def test_load_spacex_bronze_data_arrow_batches(self, mock_source: Mock, mock_pipeline_class: Mock) -> None:
+        """Test that Arrow pages are loaded with the dlt row and load ids added, in the run only"""
+        mock_source.return_value = []
+        config_in_run = []
+        mock_pipeline_class.return_value.run.side_effect = lambda *args, **kwargs: config_in_run.extend(
+            dlt.config.get(key, bool) for key in ARROW_NORMALIZER_CONFIG
+        )
 
-        # Verify the source was passed to pipeline.run
-        mock_pipeline.run.assert_called_once_with(mock_source.return_value)
+        load_spacex_bronze_data(year=2021, month=3, arrow_batches=True)
+
+        assert mock_source.call_args.kwargs["arrow_batches"] is True
+        assert config_in_run == [True, True]
+        assert dlt.config.get("normalize.parquet_normalizer.add_dlt_id") is None
+
+    @pytest.mark.parametrize("arrow_batches", [False, True])
+    def test_check_arrow_batches(self, tmp_path: Path, arrow_batches: bool) -> None:
+        """Test that a dataset loaded from dicts refuses Arrow pages and one loaded from Arrow pages refuses dicts"""
+        pipeline = dlt.pipeline(
+            pipeline_name="batches",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "batches.duckdb")),
+            dataset_name="bronze",
+        )
+        # Nothing was loaded yet, either way is accepted
+        check_arrow_batches(pipeline, not arrow_batches)
+        with SpaceXStandIn() as stand_in, arrow_batches_config(arrow_batches):
+            source = spacex_api_source(year=2021, month=3, base_url=stand_in.base_url, arrow_batches=arrow_batches)
+            pipeline.run(source.with_resources(BronzeSchema.SHIPS.value))
+
+        check_arrow_batches(pipeline, arrow_batches)
+        with pytest.raises(ValueError, match=f"bronze_ships table .* arrow_batches={arrow_batches}"):
+            check_arrow_batches(pipeline, not arrow_batches)
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    def test_load_spacex_bronze_data_closes_the_session(self, mock_pipeline_class: Mock) -> None:
+        """Test that the session of the source is closed with its prefetch worker pool, also when the run fails"""
+        mock_pipeline_class.return_value.run.side_effect = RuntimeError("load failed")
+
+        with (
+            patch.object(PrefetchAdapter, "close", autospec=True) as mock_close,
+            pytest.raises(RuntimeError, match="load failed"),
+        ):
+            load_spacex_bronze_data(year=2021, month=3, page_workers=3)
+
+        # The adapter is mounted for both schemes
+        assert {call.args[0].max_workers for call in mock_close.call_args_list} == {3}
+
+    @pytest.mark.parametrize("previous", [None, "2"])
+    def test_extract_workers_limit_is_scoped_to_the_block(
+        self, monkeypatch: pytest.MonkeyPatch, previous: Optional[str]
+    ) -> None:
+        """Test that the extract workers cap is read by dlt in the block and the previous cap is restored after it"""
+        monkeypatch.delenv(EXTRACT_WORKERS_ENV, raising=False)
+        if previous is not None:
+            monkeypatch.setenv(EXTRACT_WORKERS_ENV, previous)
+
+        with extract_workers_limit(3):
+            assert dlt.config["extract.workers"] == 3
+
+        assert os.environ.get(EXTRACT_WORKERS_ENV) == previous
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source")
+    def test_load_spacex_bronze_data_cache_responses(self, mock_source: Mock, mock_pipeline_class: Mock) -> None:
+        """Test that cached responses skipping unchanged endpoints are only loaded with the persistent pipeline"""
+        mock_source.return_value = []
+
+        with pytest.raises(ValueError, match="production pipeline state"):
+            load_spacex_bronze_data(year=2021, month=3, cache_responses=True)
+        mock_pipeline_class.assert_not_called()
+
+        load_spacex_bronze_data(year=2021, month=3, cache_responses=True, production=True)
+
+        assert mock_pipeline_class.call_args.kwargs["pipeline_name"] == PRODUCTION_PIPELINE_NAME
+        assert mock_source.call_args.kwargs["cache_responses"] is True
+
+    @pytest.mark.parametrize("fingerprint_rows", [False, True])
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.retire_absent_rows")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source")
+    def test_load_spacex_bronze_data_fingerprint_rows(
+        self, mock_source: Mock, mock_pipeline_class: Mock, mock_retire_absent_rows: Mock, fingerprint_rows: bool
+    ) -> None:
+        """Test that the source always indexes its rows, skipping the unchanged ones with fingerprint_rows, and that
+        the rows of the ids missing from the load are retired"""
+        mock_source.return_value = []
+
+        if fingerprint_rows:
+            with pytest.raises(ValueError, match="production pipeline state"):
+                load_spacex_bronze_data(year=2021, month=3, fingerprint_rows=True)
+        load_spacex_bronze_data(year=2021, month=3, fingerprint_rows=fingerprint_rows, production=True)
+
+        row_fingerprints = mock_source.call_args.kwargs["row_fingerprints"]
+        assert isinstance(row_fingerprints, RowFingerprintIndex)
+        assert row_fingerprints.skip_unchanged is fingerprint_rows
+        mock_retire_absent_rows.assert_called_once_with(mock_pipeline_class.return_value, {}, lake_dir=None)
+
+    def test_add_row_fingerprints_filters_reference_resources(self) -> None:
+        """Test that only the reference resources are filtered, without changing their table hints"""
+        launches, rockets = Mock(), Mock()
+        launches.name, rockets.name = BronzeSchema.LAUNCHES, BronzeSchema.ROCKETS
+
+        add_row_fingerprints([launches, rockets], RowFingerprintIndex())
+
+        launches.add_filter.assert_not_called()
+        rockets.apply_hints.assert_not_called()
+        rockets.add_filter.assert_called_once()
+
+    @pytest.mark.parametrize("options", [{}, {"stream_pages": True}, {"parallelized": True}])
+    def test_row_fingerprints_retire_the_rows_of_an_emptied_endpoint(self, tmp_path: Path, options: dict) -> None:
+        """Test that the rows of an endpoint now returning none are retired and its index emptied"""
+        pipeline = dlt.pipeline(
+            pipeline_name="fingerprints",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "fingerprints.duckdb")),
+            dataset_name="bronze",
+        )
+        ships = BronzeSchema.SHIPS.value
+        with SpaceXStandIn() as stand_in:
+            for counts in ({}, {Endpoints.SHIPS: 0}):
+                stand_in.generator = SpaceXDataGenerator(counts=counts)
+                row_fingerprints = RowFingerprintIndex()
+                source = spacex_api_source(
+                    year=2021, month=3, base_url=stand_in.base_url, row_fingerprints=row_fingerprints, **options
+                )
+                pipeline.run(source.with_resources(ships))
+                retire_absent_rows(pipeline, row_fingerprints.extracted_ids())
+
+        assert pipeline.state["sources"]["spacex_api_source"]["row_fingerprints"][ships] == {}
+        with pipeline.sql_client() as client:
+            [(rows, retired)] = client.execute_sql(f"select count(*), count(_dlt_valid_to) from {ships}")  # noqa: S608
+        assert rows == retired == REALISTIC_COUNTS[Endpoints.SHIPS]
+
+    def test_retire_absent_rows(self) -> None:
+        """Test that the active rows of the ids not extracted are retired, in the tables already loaded only"""
+        mock_pipeline = MagicMock()
+        mock_pipeline.default_schema.data_table_names.return_value = ["bronze_cores", "bronze_ships"]
+        client = mock_pipeline.sql_client.return_value.__enter__.return_value
+        client.make_qualified_table_name.side_effect = lambda table_name: f"bronze.{table_name}"
+
+        retire_absent_rows(mock_pipeline, {"bronze_cores": ["c2", "c3"], "bronze_ships": [], "bronze_rockets": ["r1"]})
+
+        [cores_call, ships_call] = client.execute_sql.call_args_list
+        sql, _, *ids = cores_call.args
+        assert sql.startswith("update bronze.bronze_cores set _dlt_valid_to = %s")
+        assert sql.endswith("where _dlt_valid_to is null and id not in (%s, %s)")
+        assert ids == ["c2", "c3"]
+        assert ships_call.args[0].endswith("bronze.bronze_ships set _dlt_valid_to = %s where _dlt_valid_to is null")
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.retire_absent_ids")
+    def test_retire_absent_rows_in_the_lake(self, mock_retire_absent_ids: Mock) -> None:
+        """Test that the rows of the ids not extracted are retired in the Parquet lake instead"""
+        mock_pipeline = Mock()
+
+        retire_absent_rows(mock_pipeline, {"bronze_cores": ["c1"]}, lake_dir=Path("lake"))
+
+        mock_retire_absent_ids.assert_called_once_with(Path("lake"), {"bronze_cores": ["c1"]}, ANY)
+        mock_pipeline.sql_client.assert_not_called()
+
+    def test_reference_tables_switch_between_plain_and_fingerprint_runs(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a production dataset loads plain, then fingerprint, then plain runs with the same table hints,
+        each retiring the ships removed from the API and versioning the changed ones"""
+        pipeline = dlt.pipeline(
+            pipeline_name="switch",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "switch.duckdb")),
+            dataset_name="bronze",
+        )
+        ships = BronzeSchema.SHIPS.value
+        current_ships = []
+        with (
+            SpaceXStandIn() as stand_in,
+            patch("dlt_dbt_dagster.dlt.spacex_pipeline.make_pipeline", return_value=pipeline),
+            patch(
+                "dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_source",
+                partial(spacex_api_source, base_url=stand_in.base_url),
+            ),
+        ):
+            for seed, count, fingerprint_rows in ((0, 25, False), (1, 20, True), (2, 15, False)):
+                stand_in.generator = SpaceXDataGenerator(seed=seed, counts={Endpoints.SHIPS: count})
+                load_spacex_bronze_data(year=2021, month=3, production=True, fingerprint_rows=fingerprint_rows)
+                with pipeline.sql_client() as client:
+                    [(current,)] = client.execute_sql(f"select count(*) from {ships} where _dlt_valid_to is null")  # noqa: S608
+                current_ships.append(current)
+                assert pipeline.default_schema.get_table_columns(ships)["id"]["merge_key"] is True
+
+        assert current_ships == [25, 20, 15]
 
     def test_load_spacex_bronze_data_with_fixtures(self, mock_dlt_pipeline: Mock) -> None:
         """Test load_spacex_bronze_data using fixtures"""
@@ -167,6 +561,135 @@ class TestSpaceXPipeline:
             # Verify the mock pipeline was used
             mock_dlt_pipeline.run.assert_called_once()
 
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_backfill_source")
+    def test_load_spacex_bronze_backfill_single_run(self, mock_source: Mock, mock_pipeline_class: Mock) -> None:
+        """Test that load_spacex_bronze_backfill loads the whole range in a single pipeline run"""
+        mock_pipeline = Mock()
+        mock_pipeline_class.return_value = mock_pipeline
+        mock_source.return_value = []
+
+        load_spacex_bronze_backfill(start_year=2016, start_month=1, end_year=2020, end_month=12)
+
+        mock_source.assert_called_once_with(
+            start_year=2016,
+            start_month=1,
+            end_year=2020,
+            end_month=12,
+            page_workers=1,
+            arrow_batches=False,
+            parallelized=False,
+            cache_responses=False,
+            row_fingerprints=ANY,
+            metrics=None,
+            stream_pages=False,
+            page_sizer=None,
+            scheduler=None,
+            exit_stack=ANY,
+        )
+        mock_pipeline.run.assert_called_once_with(mock_source.return_value, loader_file_format=None)
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.rest_api_resources")
+    def test_spacex_api_incremental_source_cursor(self, mock_rest_api_resources: Mock) -> None:
+        """Test that spacex_api_incremental_source queries the launches from the date_utc cursor up to now"""
+        mock_rest_api_resources.return_value = []
+
+        list(spacex_api_incremental_source())
+
+        launches_resource = mock_rest_api_resources.call_args[0][0]["resources"][0]
+        endpoint = launches_resource["endpoint"]
+        assert endpoint["incremental"] == {"cursor_path": "date_utc", "initial_value": FIRST_LAUNCH_DATE}
+        assert endpoint["json"]["query"]["date_utc"]["$gte"] == "{incremental.start_value}"
+        assert endpoint["json"]["query"]["date_utc"]["$lt"].endswith("Z")
+        assert launches_resource["primary_key"] == "id"
+        assert "merge_key" not in launches_resource
+
+    @pytest.mark.parametrize("options", [{}, {"stream_pages": True}, {"arrow_batches": True}])
+    def test_spacex_api_incremental_source_loads_only_new_launches(self, tmp_path: Path, options: dict) -> None:
+        """Test that a second run of the incremental source queries from the last launch and loads nothing new"""
+        pipeline = dlt.pipeline(
+            pipeline_name="incremental",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "incremental.duckdb")),
+            dataset_name="bronze",
+        )
+        launches = BronzeSchema.LAUNCHES.value
+        with (
+            SpaceXStandIn(SpaceXDataGenerator()) as stand_in,
+            arrow_batches_config(options.get("arrow_batches", False)),
+        ):
+            for _ in range(2):
+                source = spacex_api_incremental_source(
+                    initial_date="2022-01-01T00:00:00Z", base_url=stand_in.base_url, **options
+                )
+                pipeline.run(source.with_resources(launches))
+                if launches in pipeline.last_trace.last_normalize_info.row_counts:
+                    first_row_counts = dict(pipeline.last_trace.last_normalize_info.row_counts)
+                    first_bytes_sent = stand_in.bytes_sent[Endpoints.LAUNCHES.value]
+
+        # The second run only got the last launch back, the one at the cursor
+        assert stand_in.bytes_sent[Endpoints.LAUNCHES.value] - first_bytes_sent < first_bytes_sent / 5
+        assert launches not in pipeline.last_trace.last_normalize_info.row_counts
+        with pipeline.sql_client() as client:
+            [(rows, ids, first_month)] = client.execute_sql(
+                f"select count(*), count(distinct id), min(year * 100 + month) from {launches}"  # noqa: S608
+            )
+        assert rows == ids == first_row_counts[launches]
+        assert first_month == 202201
+
+    @pytest.mark.parametrize("options", [{}, {"arrow_batches": True}])
+    def test_spacex_api_source_reloads_keep_the_scd2_versions(self, tmp_path: Path, options: dict) -> None:
+        """Test that loading the same reference rows twice adds no scd2 version, Arrow rows included"""
+        pipeline = dlt.pipeline(
+            pipeline_name="reload",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "reload.duckdb")),
+            dataset_name="bronze",
+        )
+        cores = BronzeSchema.CORES.value
+        with SpaceXStandIn() as stand_in, arrow_batches_config(options.get("arrow_batches", False)):
+            for _ in range(2):
+                pipeline.run(
+                    spacex_api_source(year=2021, month=3, base_url=stand_in.base_url, **options).with_resources(cores)
+                )
+
+        with pipeline.sql_client() as client:
+            [(rows, current, ids)] = client.execute_sql(
+                f"select count(*), count(*) filter (where _dlt_valid_to is null), count(distinct _dlt_id) from {cores}"  # noqa: S608
+            )
+        assert rows == current == ids == REALISTIC_COUNTS[Endpoints.CORES]
+
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.dlt.pipeline")
+    @patch("dlt_dbt_dagster.dlt.spacex_pipeline.spacex_api_incremental_source")
+    def test_load_spacex_bronze_incremental_production_pipeline(
+        self, mock_source: Mock, mock_pipeline_class: Mock
+    ) -> None:
+        """Test that load_spacex_bronze_incremental loads the stable production dataset, keeping its state"""
+        mock_source.return_value = []
+
+        load_spacex_bronze_incremental(initial_date="2022-01-01T00:00:00Z")
+
+        mock_pipeline_class.assert_called_once_with(
+            pipeline_name=PRODUCTION_PIPELINE_NAME,
+            destination="duckdb",
+            dataset_name="bronze",
+            progress="log",
+        )
+        mock_source.assert_called_once_with(
+            initial_date="2022-01-01T00:00:00Z",
+            page_workers=1,
+            arrow_batches=False,
+            parallelized=False,
+            cache_responses=False,
+            row_fingerprints=ANY,
+            metrics=None,
+            stream_pages=False,
+            page_sizer=None,
+            scheduler=None,
+            exit_stack=ANY,
+        )
+        mock_pipeline_class.return_value.run.assert_called_once_with(mock_source.return_value, loader_file_format=None)
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,156 @@
+"""Unit tests for the local SpaceX API stand-in and its data generator"""
+
+from collections.abc import Generator
+from pathlib import Path
+
+import dlt
+import pytest
+import requests
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+from dlt_dbt_dagster.utils.processing_utils import get_month_range
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+
+@pytest.fixture
+def stand_in() -> Generator[SpaceXStandIn, None, None]:
+    """Stand-in of the SpaceX API with the realistic volumes, running in a background thread"""
+    with SpaceXStandIn(SpaceXDataGenerator(seed=7)) as server:
+        yield server
+
+
+def query(stand_in: SpaceXStandIn, endpoint: Endpoints, body: dict) -> requests.Response:
+    return requests.post(f"{stand_in.base_url}{endpoint.value}", json=body, timeout=10)
+
+
+class TestSpaceXDataGenerator:
+    """Test the seeded document generator"""
+
+    def test_documents_are_deterministic_per_seed(self) -> None:
+        """Test that a seed always generates the same documents and another seed different ones"""
+        first, second, other = SpaceXDataGenerator(seed=1), SpaceXDataGenerator(seed=1), SpaceXDataGenerator(seed=2)
+
+        for endpoint in Endpoints:
+            assert first.document(endpoint, 3) == second.document(endpoint, 3)
+        assert first.document(Endpoints.PAYLOADS, 3) != other.document(Endpoints.PAYLOADS, 3)
+
+    def test_documents_have_the_bronze_columns(self) -> None:
+        """Test that every endpoint generates the columns BronzeSchema loads"""
+        generator = SpaceXDataGenerator()
+        resources = {
+            Endpoints.LAUNCHES: BronzeSchema.LAUNCHES,
+            Endpoints.ROCKETS: BronzeSchema.ROCKETS,
+            Endpoints.CORES: BronzeSchema.CORES,
+            Endpoints.PAYLOADS: BronzeSchema.PAYLOADS,
+            Endpoints.LAUNCHPADS: BronzeSchema.LAUNCHPADS,
+            Endpoints.SHIPS: BronzeSchema.SHIPS,
+        }
+
+        for endpoint, schema_type in resources.items():
+            assert set(BronzeSchema.get_columns(schema_type)) <= set(generator.document(endpoint, 0))
+
+    def test_millions_of_documents_are_generated_on_demand(self) -> None:
+        """Test that a generator of millions of launches and cores serves the last ones without building the others"""
+        generator = SpaceXDataGenerator(counts={Endpoints.LAUNCHES: 5_000_000, Endpoints.CORES: 2_000_000})
+
+        launch = generator.document(Endpoints.LAUNCHES, 4_999_999)
+        core = generator.document(Endpoints.CORES, 1_999_999)
+
+        assert launch["flight_number"] == 5_000_000
+        assert launch["date_utc"].startswith("2022-12-05")
+        assert core["launches"][0] == generator.document(Endpoints.LAUNCHES, 1_999_999)["id"]
+        with pytest.raises(IndexError):
+            generator.document(Endpoints.CORES, 2_000_000)
+
+    def test_launch_range_matches_date_filter(self) -> None:
+        """Test that the index range of a date filter holds exactly the launches between the bounds"""
+        generator = SpaceXDataGenerator(counts={Endpoints.LAUNCHES: 10_000})
+        start_date, end_date = get_month_range(2021, 3)
+
+        launches = generator.launch_range({"$gte": start_date, "$lt": end_date})
+
+        dates = [generator.document(Endpoints.LAUNCHES, index)["date_utc"] for index in launches]
+        assert len(dates) > 0
+        assert all(date.startswith("2021-03") for date in dates)
+        assert generator.document(Endpoints.LAUNCHES, launches.start - 1)["date_utc"] < start_date
+        assert generator.document(Endpoints.LAUNCHES, launches.stop)["date_utc"] >= end_date
+
+
+class TestSpaceXStandIn:
+    """Test the HTTP stand-in of the `/query` routes"""
+
+    def test_pages_cover_every_document_once(self, stand_in: SpaceXStandIn) -> None:
+        """Test the mongoose-paginate fields and that the pages cover every document exactly once"""
+        ids = []
+        page = 1
+        while True:
+            response = query(stand_in, Endpoints.CORES, {"query": {}, "options": {"page": page, "limit": 20}}).json()
+            ids.extend(doc["id"] for doc in response["docs"])
+            assert response["totalDocs"] == REALISTIC_COUNTS[Endpoints.CORES]
+            assert response["totalPages"] == 5
+            if not response["hasNextPage"]:
+                break
+            page += 1
+
+        assert page == 5
+        assert len(ids) == len(set(ids)) == REALISTIC_COUNTS[Endpoints.CORES]
+
+    def test_select_projection(self, stand_in: SpaceXStandIn) -> None:
+        """Test that `select` keeps the selected fields plus `id`, and that an exclusion drops fields"""
+        selected = query(stand_in, Endpoints.ROCKETS, {"options": {"select": {"name": 1}}}).json()["docs"][0]
+        excluded = query(stand_in, Endpoints.ROCKETS, {"options": {"select": "-description -flickr_images"}}).json()
+
+        assert set(selected) == {"id", "name"}
+        assert "description" not in excluded["docs"][0]
+        assert "engines" in excluded["docs"][0]
+
+    def test_date_filter_on_launches(self, stand_in: SpaceXStandIn) -> None:
+        """Test that the launches are filtered on `date_utc`"""
+        response = query(
+            stand_in,
+            Endpoints.LAUNCHES,
+            {"query": {"date_utc": {"$gte": "2020-01-01T00:00:00Z", "$lt": "2021-01-01T00:00:00Z"}}, "options": {}},
+        ).json()
+
+        assert 0 < response["totalDocs"] < REALISTIC_COUNTS[Endpoints.LAUNCHES]
+        assert all(doc["date_utc"].startswith("2020") for doc in response["docs"])
+
+    def test_unsupported_queries_are_rejected(self, stand_in: SpaceXStandIn) -> None:
+        """Test that queries the stand-in cannot answer faithfully fail instead of returning every document"""
+        assert query(stand_in, Endpoints.ROCKETS, {"query": {"name": "Falcon 9"}}).status_code == 400
+        assert query(stand_in, Endpoints.LAUNCHES, {"query": {"date_utc": {"$ne": "2020"}}}).status_code == 400
+
+    def test_etag_revalidation(self, stand_in: SpaceXStandIn) -> None:
+        """Test that an unchanged page is answered with a 304 to its ETag"""
+        first = query(stand_in, Endpoints.SHIPS, {"options": {"limit": 5}})
+        revalidated = requests.post(
+            f"{stand_in.base_url}{Endpoints.SHIPS.value}",
+            json={"options": {"limit": 5}},
+            headers={"If-None-Match": first.headers["ETag"]},
+            timeout=10,
+        )
+
+        assert revalidated.status_code == 304
+
+    def test_pipeline_loads_from_stand_in_through_config(
+        self, stand_in: SpaceXStandIn, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the source reads `base_url` from the config and loads every stand-in document"""
+        monkeypatch.setenv("SOURCES__SPACEX_API_SOURCE__BASE_URL", stand_in.base_url)
+        pipeline = dlt.pipeline(
+            pipeline_name="stand_in",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "stand_in.duckdb")),
+            dataset_name="bronze",
+        )
+
+        pipeline.run(spacex_api_source(year=2021, month=3))
+
+        launches = stand_in.generator.launch_range(dict(zip(("$gte", "$lt"), get_month_range(2021, 3))))
+        row_counts = pipeline.last_trace.last_normalize_info.row_counts
+        assert row_counts[BronzeSchema.LAUNCHES.value] == len(launches)
+        assert row_counts[BronzeSchema.SHIPS.value] == REALISTIC_COUNTS[Endpoints.SHIPS]
+        assert stand_in.requests[Endpoints.PAYLOADS.value] == 5
@@ -0,0 +1,113 @@
+"""Unit tests for the streaming decode of the SpaceX API pages"""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import dlt
+import pytest
+
+from dlt_dbt_dagster.constants.endpoints import Endpoints
+from dlt_dbt_dagster.constants.schema.bronze import BronzeSchema
+from dlt_dbt_dagster.dlt.instrumentation import PipelineMetrics
+from dlt_dbt_dagster.dlt.spacex_pipeline import spacex_api_source
+from dlt_dbt_dagster.dlt.streaming import PageDecoder
+from tests.stand_in.generator import REALISTIC_COUNTS, SpaceXDataGenerator
+from tests.stand_in.server import SpaceXStandIn
+
+PAGE = {
+    "docs": [
+        {"id": "a", "name": "Falcon 9 Block 5 « réutilisé »", "mass": 549054.5, "flights": 12345678901234},
+        {"id": "b", "tags": [], "nested": {"values": [1, 2.5e-3, None, True]}},
+    ],
+    "totalDocs": 2,
+    "hasNextPage": False,
+}
+
+
+def split(body: bytes, chunk_size: int) -> list[bytes]:
+    """Split the body into chunks of the given size"""
+    return [body[start : start + chunk_size] for start in range(0, len(body), chunk_size)]
+
+
+class TestPageDecoder:
+    """Test the incremental decode of a page body"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 1024])
+    def test_docs_and_page_info_in_any_chunks(self, chunk_size: int) -> None:
+        """Test that the documents and the pagination fields decode the same however the body is split"""
+        body = json.dumps({"limit": 50, **PAGE}, ensure_ascii=False, indent=1).encode()
+        decoder = PageDecoder()
+
+        docs = list(decoder.iter_docs(split(body, chunk_size)))
+
+        assert docs == PAGE["docs"]
+        assert decoder.page_info == {"limit": 50, "totalDocs": 2, "hasNextPage": False}
+        assert decoder.bytes_read == len(body)
+
+    def test_documents_are_yielded_before_the_body_is_read(self) -> None:
+        """Test that the first document is yielded while the rest of the body is still unread"""
+        chunks_read = []
+
+        def chunks() -> Iterator[bytes]:
+            for chunk in split(json.dumps(PAGE).encode(), 16):
+                chunks_read.append(chunk)
+                yield chunk
+
+        first = next(PageDecoder().iter_docs(chunks()))
+
+        assert first == PAGE["docs"][0]
+        assert len(b"".join(chunks_read)) < len(json.dumps(PAGE))
+
+    def test_empty_docs(self) -> None:
+        """Test that a page without documents only decodes its pagination fields"""
+        decoder = PageDecoder()
+
+        assert list(decoder.iter_docs([b'{"docs": [ ], "hasNextPage": true}'])) == []
+        assert decoder.page_info == {"hasNextPage": True}
+
+    @pytest.mark.parametrize("body", [b'{"docs": [{"id": "a"}', b'{"docs": [{"id": "a"} {"id": "b"}]}', b"[]"])
+    def test_invalid_body_raises(self, body: bytes) -> None:
+        """Test that a truncated or malformed body raises"""
+        with pytest.raises(ValueError):
+            list(PageDecoder().iter_docs(split(body, 4)))
+
+
+class TestStreamedSource:
+    """Test the source paging through the stand-in with streamed responses"""
+
+    @pytest.mark.parametrize("page_workers", [1, 3])
+    def test_streamed_pages_load_every_document(self, tmp_path: Path, page_workers: int) -> None:
+        """Test that streaming loads the same rows as the dlt REST client and counts every page"""
+        metrics = PipelineMetrics()
+        pipeline = dlt.pipeline(
+            pipeline_name="streaming",
+            pipelines_dir=str(tmp_path),
+            destination=dlt.destinations.duckdb(str(tmp_path / "streaming.duckdb")),
+            dataset_name="bronze",
+        )
+        with SpaceXStandIn(SpaceXDataGenerator()) as stand_in:
+            source = spacex_api_source(
+                year=2021,
+                month=3,
+                page_workers=page_workers,
+                base_url=stand_in.base_url,
+                metrics=metrics,
+                stream_pages=True,
+            )
+            pipeline.run(source)
+
+        row_counts = pipeline.last_trace.last_normalize_info.row_counts
+        assert row_counts[BronzeSchema.PAYLOADS.value] == REALISTIC_COUNTS[Endpoints.PAYLOADS]
+        assert row_counts[BronzeSchema.CORES.value] == REALISTIC_COUNTS[Endpoints.CORES]
+        payloads = metrics.summary(BronzeSchema.PAYLOADS.value)
+        assert payloads["pages"] == -(-REALISTIC_COUNTS[Endpoints.PAYLOADS] // 50)
+        assert payloads["response_bytes"] == stand_in.bytes_sent[Endpoints.PAYLOADS.value]
+        assert set(pipeline.default_schema.tables[BronzeSchema.PAYLOADS.value]["columns"]) >= set(
+            BronzeSchema.get_columns(BronzeSchema.PAYLOADS)
+        )
+
+    def test_arrow_batches_cannot_be_streamed(self) -> None:
+        """Test that whole page Arrow batches and streamed pages are exclusive"""
+        with pytest.raises(ValueError, match="Arrow batches"):
+            list(spacex_api_source(year=2021, month=3, arrow_batches=True, stream_pages=True).resources)